@@ -1,4 +1,5 @@
 import os
+import tempfile
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -7,7 +8,10 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 # See https://docs.djangoproject.com/en/1.8/howto/deployment/checklist/
 
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = os.environ['SECRET_KEY']
+# Django needs it to start. The other environment variables read below
+# default to '', user_account.checks reports the missing ones (manage.py
+# check, runserver and migrate run it)
+SECRET_KEY = os.environ.get('SECRET_KEY', '')
 
 # Application definition
 INTERNAL_APPS = (
@@ -21,7 +25,6 @@ INTERNAL_APPS = (
 # Third party apps
 THIRD_PARTY_APPS = (
     'phonenumber_field',
-    'django_nose',
 )
 
 # user defined apps
@@ -30,10 +33,13 @@ USER_DEFINED_APPS = ('user_account',)
 INSTALLED_APPS = INTERNAL_APPS + USER_DEFINED_APPS + THIRD_PARTY_APPS
 
 MIDDLEWARE_CLASSES = (
+    # answers /static/ requests itself when SERVE_STATIC is set
+    'user_account.assets.StaticFilesMiddleware',
+    'user_account.metrics.MetricsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'user_account.auth.ProfileAuthenticationMiddleware',
     'django.contrib.auth.middleware.SessionAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
@@ -42,9 +48,36 @@ MIDDLEWARE_CLASSES = (
 
 ROOT_URLCONF = 'beyonic_portal.urls'
 
+# auth settings. The signed in user is loaded with its profile in one
+# query and, if AUTH_USER_CACHE_TIMEOUT is non zero, cached per session
+# in AUTH_USER_CACHE for that many seconds. Saving a User or UserProfile
+# drops the cached copies, so use a cache shared by all the workers.
+AUTHENTICATION_BACKENDS = (
+    'user_account.auth.ProfileBackend',
+    # the login form's username can also be the phone number
+    'user_account.auth.PhoneNumberBackend',
+)
+AUTH_USER_CACHE = 'default'
+AUTH_USER_CACHE_TIMEOUT = 0
+
+# session settings. user_account.sessions is the database engine writing
+# only when a session really changed, and skipping saves that would move
+# an unchanged session's expiry by less than SESSION_SAVE_INTERVAL
+# seconds. 'django.contrib.sessions.backends.signed_cookies' writes
+# nothing to the database; 'django.contrib.sessions.backends.cached_db'
+# needs a cache shared by all the workers. Compare them with the
+# benchmark_sessions command. Expired sessions are deleted by the
+# sweep_sessions command every SESSION_SWEEP_INTERVAL seconds.
+SESSION_ENGINE = 'user_account.sessions'
+SESSION_SAVE_INTERVAL = 60
+SESSION_SWEEP_INTERVAL = 3600
+# flash messages travel in a cookie, never in the session
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # the django backend, timing renders for user_account.metrics
+        'BACKEND': 'user_account.metrics.InstrumentedDjangoTemplates',
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -59,6 +92,13 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'beyonic_portal.wsgi.application'
+# with WSGI_WARMUP set, beyonic_portal.wsgi prepares the application for
+# its first request (see user_account.warmup) when it is loaded. Meant
+# for servers that load it before forking the workers, e.g. gunicorn
+# --preload, so they all start warm. WARMUP_PHONE_REGIONS are the regions
+# whose phone number metadata is loaded
+WSGI_WARMUP = bool(os.environ.get('WSGI_WARMUP'))
+WARMUP_PHONE_REGIONS = ('KE',)
 
 
 # Database
@@ -70,9 +110,21 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        # seconds to keep a connection open between requests, 0 closes it
+        # after every request
+        'CONN_MAX_AGE': 0,
     }
 }
 
+# sqlite settings, applied to every new connection by user_account.sqlite.
+# In WAL mode readers carry on while a registration writes and NORMAL
+# skips an fsync per commit, which is safe with WAL. A writer waits up to
+# SQLITE_BUSY_TIMEOUT seconds for the lock before "database is locked".
+# Measure with the benchmark_registrations command.
+SQLITE_JOURNAL_MODE = 'WAL'
+SQLITE_SYNCHRONOUS = 'NORMAL'
+SQLITE_BUSY_TIMEOUT = 20
+
 # Internationalization
 # https://docs.djangoproject.com/en/1.8/topics/i18n/
 
@@ -99,37 +151,185 @@ STATICFILES_DIRS = (
 #local directory that stores static files(css,js,imgs)
 STATIC_ROOT =os.path.join(BASE_DIR,'served')
 
+# static pipeline settings, see user_account.assets. collectstatic
+# writes every file under a content hashed name too, recorded in the
+# manifest {% static %} reads, and .gz/.br siblings of the text files.
+# The bundles are built from the files they list, minified unless
+# named .min., into STATIC_BUNDLE_ROOT. With SERVE_STATIC set the
+# workers serve STATIC_ROOT, for containers without a web server in
+# front; hashed names are cached for a year, the rest STATIC_MAX_AGE
+# seconds.
+STATICFILES_STORAGE = 'user_account.assets.CompressedManifestStorage'
+STATICFILES_FINDERS = (
+    'django.contrib.staticfiles.finders.FileSystemFinder',
+    'django.contrib.staticfiles.finders.AppDirectoriesFinder',
+    'user_account.assets.BundleFinder',
+)
+STATIC_BUNDLES = {
+    'css/site.css': (
+        'bootstrap/css/bootstrap.min.css',
+        'font-awesome/css/font-awesome.min.css',
+        'css/style.css',
+    ),
+    'js/site.js': (
+        'jquery/jquery-1.11.3.min.js',
+        'bootstrap/js/bootstrap.min.js',
+        'js/script.js',
+    ),
+}
+STATIC_BUNDLE_ROOT = os.path.join(tempfile.gettempdir(),
+                                  'beyonic_portal_bundles')
+SERVE_STATIC = bool(os.environ.get('SERVE_STATIC'))
+STATIC_MAX_AGE = 3600
+
 AUTH_PROFILE_MODULE = 'user_account'
 
 # phone number settings
 PHONENUMBER_DB_FORMAT = 'E164'
+# entries in each of the parse, validate and format caches of
+# user_account.phones
+PHONE_NUMBER_CACHE_SIZE = 4096
 
 # email settings
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = 'smtp.gmail.com'
 EMAIL_PORT = '587'
-EMAIL_HOST_USER = os.environ['EMAIL_HOST_USER']
-EMAIL_HOST_PASSWORD = os.environ['EMAIL_HOST_PASSWORD']
+EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
 EMAIL_USE_TLS = True
+# the mail connection is kept open between messages. It is replaced after
+# EMAIL_CONNECTION_MAX_AGE seconds, and checked with a NOOP when it has
+# been idle for more than EMAIL_CONNECTION_CHECK seconds
+EMAIL_CONNECTION_MAX_AGE = 5 * 60
+EMAIL_CONNECTION_CHECK = 30
 
-# using local memory cache to store sms codes for phone number verification
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
         'LOCATION': 'unique-snowflake',
-    }
+    },
+    # the {% cache %} fragments of base.html, keyed by a digest of the
+    # templates and the static manifest so a deploy never serves the
+    # previous release's fragments
+    'template_fragments': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'template-fragments',
+        'KEY_FUNCTION': 'user_account.templatecache.make_key',
+    },
 }
 
+# page cache settings. The sign-up, login and home pages of signed out
+# visitors are cached in PAGE_CACHE for PAGE_CACHE_TIMEOUT seconds (0
+# turns it off) with the visitor's CSRF token put in when served, see
+# user_account.pagecache. Use a cache shared by all the workers.
+PAGE_CACHE = 'default'
+PAGE_CACHE_TIMEOUT = 300
+
+# username settings. The unique constraint rejects a taken username when
+# the account is inserted. With USERNAME_FILTER each process also keeps a
+# Bloom filter of the usernames, rebuilt every USERNAME_FILTER_REFRESH
+# seconds, so the registration form can turn a taken name away before
+# hashing the password; a name the filter has not seen costs no query.
+USERNAME_FILTER = False
+USERNAME_FILTER_CAPACITY = 10000
+USERNAME_FILTER_ERROR_RATE = 0.01
+USERNAME_FILTER_REFRESH = 300
+# the sign-up page's availability checks, always answered from the filter:
+# at most this many (requests, per seconds) from one client, counted in
+# THROTTLE_CACHE
+USERNAME_CHECK_RATE = (30, 60)
+THROTTLE_CACHE = 'default'
+# clients are told apart by REMOTE_ADDR. Behind reverse proxies it is the
+# proxy's address for everybody: set this to the number of proxies, each
+# appending to X-Forwarded-For, to go by the address the outermost one saw
+THROTTLE_TRUSTED_PROXIES = int(os.environ.get('THROTTLE_TRUSTED_PROXIES')
+                               or 0)
+
+# sms codes for phone number verification. The store must be shared by all
+# the workers: either the database table (default) or, with
+# 'user_account.verification.CacheCodeStore', a memcached/redis cache
+# named by VERIFICATION_CODE_CACHE.
+# 'user_account.verification.TotpCodeStore' stores nothing and derives the
+# codes from VERIFICATION_CODE_SECRET and the current time window instead.
+# Whatever the store, confirming the e-mail address sends a new code, so
+# a code only has to last until the user is back from their mailbox.
+VERIFICATION_CODE_STORE = 'user_account.verification.DatabaseCodeStore'
+VERIFICATION_CODE_LENGTH = 5
+VERIFICATION_CODE_CACHE = 'default'
+VERIFICATION_CODE_PREFIX = 'verification'
+VERIFICATION_CODE_TIMEOUT = 24 * 3600
+VERIFICATION_CODE_SWEEP_INTERVAL = 10 * 60
+VERIFICATION_CODE_SECRET = SECRET_KEY
+# length of a time window in seconds, and how many windows either side of
+# the current one are still accepted
+VERIFICATION_CODE_TOTP_STEP = 10 * 60
+VERIFICATION_CODE_TOTP_SKEW = 1
+
 # twilio settings
-TWILIO_ACCOUNT_SID = os.environ['TWILIO_ACCOUNT_SID']
-TWILIO_AUTH_TOKEN = os.environ['TWILIO_AUTH_TOKEN']
-TWILIO_DEFAULT_CALLERID = os.environ['TWILIO_DEFAULT_CALLERID']
-CALLER_ID = os.environ['CALLER_ID']
+TWILIO_ACCOUNT_SID = os.environ.get('TWILIO_ACCOUNT_SID', '')
+TWILIO_AUTH_TOKEN = os.environ.get('TWILIO_AUTH_TOKEN', '')
+TWILIO_DEFAULT_CALLERID = os.environ.get('TWILIO_DEFAULT_CALLERID', '')
+CALLER_ID = os.environ.get('CALLER_ID', '')
+# sms settings. Backends live in user_account.sms.backends: twilio, console,
+# filebased (writes to SMS_FILE_PATH), locmem (for the tests) and batch,
+# which sends through SMS_BATCH_BACKEND in chunks of SMS_BATCH_SIZE,
+# SMS_BATCH_CONCURRENCY chunks at a time
+SMS_BACKEND = 'user_account.sms.backends.twilio.SMSBackend'
+SMS_FILE_PATH = None
+SMS_BATCH_BACKEND = 'user_account.sms.backends.twilio.SMSBackend'
+SMS_BATCH_SIZE = 10
+SMS_BATCH_CONCURRENCY = 4
+
+# socket timeout, in seconds, for connecting to and reading from Twilio
+TWILIO_TIMEOUT = 10
+TWILIO_API_BASE = 'https://api.twilio.com'
+
+# outbound notification queue settings, drained by the process_outbox
+# management command
+OUTBOX_WORKER_THREADS = 4
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_POLL_INTERVAL = 2
+# seconds after which a notification stuck in the sending state is requeued
+OUTBOX_STALE_AFTER = 15 * 60
 
 # root url for the mail activation link
-ROOT_URL = os.environ['ROOT_URL']
+ROOT_URL = os.environ.get('ROOT_URL', '')
+
+# performance metrics, served in the Prometheus text format at /metrics/ to
+# the addresses in METRICS_ALLOWED_IPS. Behind a reverse proxy every
+# request comes from the proxy's address, so there set METRICS_TOKEN
+# instead: /metrics/ then only answers requests with an
+# "Authorization: Bearer <METRICS_TOKEN>" header (Prometheus'
+# bearer_token) and ignores the addresses. With several worker processes,
+# set METRICS_MULTIPROCESS_DIR to an existing directory shared by them:
+# each process writes its histograms there and /metrics/ adds them up.
+# A process deletes its file when it exits, the totals then drop by its
+# counts (Prometheus' rate() takes that as a counter reset). A killed
+# worker leaves its file behind: empty the directory before the server
+# starts, e.g. rm -f $METRICS_MULTIPROCESS_DIR/metrics-*.json
+METRICS_ALLOWED_IPS = ('127.0.0.1',)
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+METRICS_MULTIPROCESS_DIR = None
+METRICS_FLUSH_INTERVAL = 1
+
+# logging settings. Handlers only put records on a queue (at most
+# LOG_QUEUE_SIZE, then they are dropped and counted), a thread per
+# process writes them to the LOG_FILES files or, with LOG_SERVER set to
+# the host:port of "manage.py log_server", sends them there so a single
+# process writes and rotates the files. log_server drops, with a warning,
+# records longer than LOG_SERVER_MAX_RECORD bytes and records it can't
+# read. LOG_FORMATTER 'json' writes one JSON object per line.
+LOG_FILES = {
+    'app': 'logs/app.log',
+    'request': 'logs/django_request.log',
+}
+LOG_FILE_MAX_BYTES = 1024 * 1024 * 5
+LOG_FILE_BACKUP_COUNT = 5
+LOG_FORMATTER = os.environ.get('LOG_FORMATTER', 'standard')
+LOG_QUEUE_SIZE = 10000
+LOG_SERVER = os.environ.get('LOG_SERVER')
+LOG_SERVER_MAX_RECORD = 1024 * 1024
 
-# logging settings
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': True,
@@ -138,24 +338,21 @@ LOGGING = {
             'format': '%(asctime)s [%(levelname)s] %(name)s: %(message)s',
             'datefmt': "%d %b %Y %H:%M:%S"
         },
+        'json': {
+            '()': 'user_account.logqueue.JsonFormatter',
+        },
     },
     'handlers': {
         'default': {
             'level': 'INFO',
-            'class': 'logging.handlers.RotatingFileHandler',
-            'filename': 'logs/app.log',
-            'maxBytes': 1024 * 1024 * 5,
-            'backupCount': 5,
-            'formatter': 'standard',
+            '()': 'user_account.logqueue.QueueHandler',
+            'log_file': 'app',
         },
 
         'request_handler': {
             'level': 'DEBUG',
-            'class': 'logging.handlers.RotatingFileHandler',
-            'filename': 'logs/django_request.log',
-            'maxBytes': 1024 * 1024 * 5,
-            'backupCount': 5,
-            'formatter': 'standard',
+            '()': 'user_account.logqueue.QueueHandler',
+            'log_file': 'request',
         },
     },
     'loggers': {
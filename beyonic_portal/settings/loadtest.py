@@ -0,0 +1,8 @@
+from .production import *
+
+# point the providers at the stand-ins started by manage.py loadtest_funnel
+EMAIL_HOST = '127.0.0.1'
+EMAIL_PORT = 2525
+EMAIL_USE_TLS = False
+EMAIL_HOST_PASSWORD = ''
+TWILIO_API_BASE = 'http://127.0.0.1:8025'
@@ -2,4 +2,5 @@ from .base import *
 
 DEBUG = True
 
-# EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
\ No newline at end of file
+# EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+# SMS_BACKEND = 'user_account.sms.backends.console.SMSBackend'
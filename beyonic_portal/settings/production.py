@@ -3,3 +3,16 @@ from .base import *
 DEBUG = False
 
 ALLOWED_HOSTS = ["*"]
+
+# keep each worker's (already configured) connection between requests
+DATABASES['default']['CONN_MAX_AGE'] = 60
+
+# parse each template once per worker; a deploy restarts the workers and
+# with them the cache
+TEMPLATES = [dict(TEMPLATES[0], APP_DIRS=False, OPTIONS=dict(
+    TEMPLATES[0]['OPTIONS'], loaders=[
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]))]
@@ -1,11 +1,28 @@
 from .base import *
 
-# Use nose to run all tests
+# only the tests need a secret key of their own
+SECRET_KEY = SECRET_KEY or 'beyonic-portal-tests'
+VERIFICATION_CODE_SECRET = SECRET_KEY
+
+# Use nose to run all tests, only loaded here so nose isn't imported by
+# every worker
+INSTALLED_APPS += ('django_nose',)
 TEST_RUNNER = 'django_nose.NoseTestSuiteRunner'
+# a fresh user_account.sms.outbox for every test
+NOSE_PLUGINS = ['user_account.tests.plugins.ResetSMSOutbox']
 
 # Tell nose to measure coverage on the user_account app
 NOSE_ARGS = [
     '--with-coverage',
     '--cover-package=user_account',
     '--verbosity=2',
-]
\ No newline at end of file
+]
+
+# {% static %} without a collectstatic manifest
+STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.StaticFilesStorage'
+
+# every test renders its pages, test_pagecache turns the cache on
+PAGE_CACHE_TIMEOUT = 0
+
+# keep sent sms in user_account.sms.outbox instead of calling Twilio
+SMS_BACKEND = 'user_account.sms.backends.locmem.SMSBackend'
@@ -5,6 +5,7 @@ from django.views.generic.base import RedirectView
 urlpatterns = patterns(
     '',
     url(r'^user/', include('user_account.urls')),
+    url(r'^metrics/$', 'user_account.metrics.metrics', name='metrics'),
     url(r'^$', RedirectView.as_view(
         url='/user/home/', permanent=False), name='index'),
 )
@@ -9,8 +9,13 @@ https://docs.djangoproject.com/en/1.8/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "beyonic_portal.settings")
 
 application = get_wsgi_application()
+
+if settings.WSGI_WARMUP:
+    from user_account.warmup import warm_up
+    warm_up(application)
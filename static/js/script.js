@@ -5,4 +5,28 @@ function autoCloseAlert(selector){
 }
 
 
-autoCloseAlert(".alert");
\ No newline at end of file
+autoCloseAlert(".alert");
+
+
+// tell the user whether the username is free while they type
+function checkUsernameAvailability(input, feedback){
+    var timer;
+    $(input).on('input', function(){
+        var username = $(this).val();
+        clearTimeout(timer);
+        if (!username) {
+            $(feedback).text('');
+            return;
+        }
+        timer = setTimeout(function(){
+            $.getJSON($(feedback).data('url'), {username: username})
+                .done(function(data){
+                    $(feedback).text(data.available ? 'Username is available' : data.message)
+                        .toggleClass('error', !data.available);
+                });
+        }, 300);
+    });
+}
+
+
+checkUsernameAvailability("#id_username", ".username-availability");
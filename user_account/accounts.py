@@ -0,0 +1,84 @@
+"""
+Creating an account: the user, its profile, the verification code and
+the notifications, written together or not at all.
+"""
+import datetime
+import logging
+
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.translation import ugettext_lazy as _
+
+from . import usernames, verification
+from .models import OutboundNotification, UserProfile
+
+
+logger = logging.getLogger(__name__)
+
+# days the activation link stays valid
+ACTIVATION_DAYS = 2
+
+
+class UsernameTaken(Exception):
+
+    ''' the username was registered by somebody else first '''
+
+
+class PhoneNumberTaken(Exception):
+
+    ''' the phone number already belongs to another account '''
+
+
+def build_user(username, email, password, first_name, last_name):
+    """ A new, not yet activated and not yet saved User """
+    user = User(username=username,
+                email=User.objects.normalize_email(email),
+                first_name=first_name.upper(), last_name=last_name.upper(),
+                is_active=False)
+    # hashing is slow, do it before taking any lock
+    user.set_password(password)
+    return user
+
+
+def save_registration(user, phone_number):
+    """
+    Insert the fully populated user and profile, issue the sms code and
+    queue the activation e-mail and the sms in one transaction. Returns
+    the profile, raises UsernameTaken or PhoneNumberTaken when the
+    username's or phone number's unique constraint rejects them.
+    """
+    try:
+        with transaction.atomic():
+            user.save(force_insert=True)
+            profile = UserProfile(
+                user=user, phone_number=phone_number,
+                key_expires=timezone.now() + datetime.timedelta(
+                    ACTIVATION_DAYS))
+            profile.save(force_insert=True)
+            # see VERIFICATION_CODE_STORE for how long the code stays valid
+            code = verification.get_store().issue(phone_number)
+            OutboundNotification.objects.bulk_create([
+                OutboundNotification(profile=profile,
+                                     channel=OutboundNotification.EMAIL),
+                OutboundNotification(profile=profile,
+                                     channel=OutboundNotification.SMS,
+                                     payload=str(code)),
+            ])
+    except IntegrityError:
+        # only look the name up on this rare path, never up front
+        if User.objects.filter(username=user.username).exists():
+            raise UsernameTaken(user.username)
+        if UserProfile.objects.filter(phone_number=phone_number).exists():
+            raise PhoneNumberTaken(phone_number)
+        raise
+    usernames.add(user.username)
+    logger.info(_('new user registered successfully. {0}').format(profile))
+    return profile
+
+
+def register(username, email, password, first_name, last_name,
+             phone_number):
+    """ Create an account from the registration form's data """
+    user = build_user(username, email, password, first_name, last_name)
+    return save_registration(user, phone_number)
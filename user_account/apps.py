@@ -0,0 +1,13 @@
+from django.apps import AppConfig
+
+
+class UserAccountConfig(AppConfig):
+
+    ''' connects user_account's signal receivers and system checks '''
+
+    name = 'user_account'
+
+    def ready(self):
+        # registered on import: the settings check and the sqlite
+        # connection settings applied to every new connection
+        from . import checks, sqlite  # noqa
@@ -0,0 +1,301 @@
+"""
+The static asset pipeline.
+
+STATIC_BUNDLES are built by BundleFinder from the files they list, one
+minified file per bundle, so runserver serves them like any other
+static file and collectstatic collects them. CompressedManifestStorage
+then gives every collected file a content hashed name, recorded in the
+manifest {% static %} reads, and writes .gz (and, with the brotli
+package installed, .br) siblings of the text files. With SERVE_STATIC,
+StaticFilesMiddleware serves STATIC_ROOT itself.
+"""
+import io
+import os
+import re
+import gzip
+import json
+import mimetypes
+import posixpath
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.exceptions import ImproperlyConfigured, MiddlewareNotUsed
+from django.core.files.storage import FileSystemStorage
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils.http import http_date, parse_http_date_safe
+
+
+CSS_URL = re.compile(r'''url\(\s*(['"]?)([^'")]+)\1\s*\)''')
+COMPRESSIBLE = ('.css', '.js', '.svg', '.eot', '.ttf', '.otf', '.ico',
+                '.json', '.map', '.txt', '.html', '.xml')
+# far-future caching for the content hashed names
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+
+def minify_css(css):
+    """ Drop comments, but /*! licences, and whitespace around punctuation """
+    css = re.sub(r'/\*(?!!).*?\*/', '', css, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};,>])\s*', r'\1', css)
+    css = re.sub(r'\*/\s+', '*/', css)
+    css = re.sub(r':\s+', ':', css)
+    return css.replace(';}', '}').strip()
+
+
+def minify_js(js):
+    """
+    Drop blank lines, indentation and whole line // comments. Lines are
+    kept apart, so automatic semicolon insertion still works.
+    """
+    lines = (line.strip() for line in js.splitlines())
+    return '\n'.join(line for line in lines
+                     if line and not line.startswith('//'))
+
+
+def rebase_urls(css, source, bundle):
+    """ Rewrite the relative url()s of source's css as seen from bundle """
+    def rebase(match):
+        quote, url = match.groups()
+        if url.startswith(('/', '#', 'data:')) or '://' in url:
+            return match.group(0)
+        target = posixpath.normpath(posixpath.join(
+            posixpath.dirname(source), url))
+        return 'url({0}{1}{0})'.format(quote, posixpath.relpath(
+            target, posixpath.dirname(bundle) or '.'))
+    return CSS_URL.sub(rebase, css)
+
+
+def build_bundle(name, sources):
+    """ The content of bundle name: sources, minified, in order """
+    parts = []
+    for source in sources:
+        path = finders.find(source)
+        if path is None:
+            raise ImproperlyConfigured(
+                'The static file {0} of bundle {1} does not exist.'.format(
+                    source, name))
+        with open(path, encoding='utf-8') as source_file:
+            content = source_file.read()
+        minified = '.min.' in posixpath.basename(source)
+        if name.endswith('.css'):
+            content = rebase_urls(content, source, name)
+            parts.append(content if minified else minify_css(content))
+        else:
+            parts.append(content if minified else minify_js(content))
+    # a file without a trailing semicolon must not run into the next
+    return ('\n' if name.endswith('.css') else ';\n').join(parts) + '\n'
+
+
+class BundleFinder(finders.BaseFinder):
+
+    ''' finds STATIC_BUNDLES, building them in STATIC_BUNDLE_ROOT '''
+
+    def __init__(self, app_names=None, *args, **kwargs):
+        super(BundleFinder, self).__init__(*args, **kwargs)
+        self.storage = FileSystemStorage(location=settings.STATIC_BUNDLE_ROOT)
+
+    def build(self, name):
+        content = build_bundle(name, settings.STATIC_BUNDLES[name]).encode(
+            'utf-8')
+        path = self.storage.path(name)
+        try:
+            with open(path, 'rb') as bundle:
+                if bundle.read() == content:
+                    # left alone, so its modification time means something
+                    return path
+        except FileNotFoundError:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as bundle:
+            bundle.write(content)
+        return path
+
+    def find(self, path, all=False):
+        if path not in settings.STATIC_BUNDLES:
+            return []
+        path = self.build(path)
+        return [path] if all else path
+
+    def list(self, ignore_patterns):
+        for name in sorted(settings.STATIC_BUNDLES):
+            self.build(name)
+            yield name, self.storage
+
+
+@receiver(setting_changed)
+def reset_finders(setting, **kwargs):
+    # the finders are cached, with the STATIC_BUNDLE_ROOT they started with
+    if setting.startswith('STATIC_BUNDLE'):
+        finders.get_finder.cache_clear()
+
+
+def compress(path):
+    """ Write the .gz and .br siblings of path, when they are smaller """
+    with open(path, 'rb') as original:
+        data = original.read()
+    buffer = io.BytesIO()
+    # no timestamp in the header, the same file compresses the same
+    with gzip.GzipFile(fileobj=buffer, mode='wb', compresslevel=9,
+                       mtime=0) as compressed:
+        compressed.write(data)
+    written = []
+    variants = [('.gz', buffer.getvalue())]
+    if brotli is not None:
+        variants.append(('.br', brotli.compress(data)))
+    for extension, content in variants:
+        if len(content) < len(data) * 0.95:
+            with open(path + extension, 'wb') as compressed:
+                compressed.write(content)
+            written.append(path + extension)
+    return written
+
+
+class CompressedManifestStorage(ManifestStaticFilesStorage):
+
+    '''
+    ManifestStaticFilesStorage, also writing compressed siblings of
+    the text files, under their original and their hashed names
+    '''
+
+    def post_process(self, paths, dry_run=False, **options):
+        names = []
+        for name, hashed_name, processed in super(
+                CompressedManifestStorage, self).post_process(
+                    paths, dry_run, **options):
+            if hashed_name and not isinstance(processed, Exception):
+                names.extend((name, hashed_name))
+            yield name, hashed_name, processed
+        if dry_run:
+            return
+        for name in names:
+            if name.endswith(COMPRESSIBLE):
+                compress(self.path(name))
+
+
+def accepted_encodings(header):
+    """ The content codings an Accept-Encoding header allows """
+    accepted = set()
+    for part in header.split(','):
+        coding, _, parameters = part.partition(';')
+        quality = re.search(r'q\s*=\s*([0-9.]+)', parameters)
+        if quality is None or float(quality.group(1)) > 0:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def not_modified(request, etag, last_modified):
+    """
+    Whether the client's copy, going by If-None-Match or else
+    If-Modified-Since, is the one tagged etag and modified at
+    last_modified (a timestamp, None to only go by the etag)
+    """
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match is not None:
+        return if_none_match.strip() == '*' or etag in (
+            tag.strip() for tag in if_none_match.split(','))
+    if last_modified is None:
+        return False
+    if_modified_since = parse_http_date_safe(
+        request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+    return if_modified_since is not None and \
+        int(last_modified) <= if_modified_since
+
+
+class StaticFile(object):
+
+    ''' a file of STATIC_ROOT and its compressed variants '''
+
+    def __init__(self, path, immutable):
+        self.path = path
+        self.immutable = immutable
+        stat = os.stat(path)
+        self.mtime = int(stat.st_mtime)
+        self.etag = '{0:x}-{1:x}'.format(self.mtime, stat.st_size)
+        self.content_type = mimetypes.guess_type(path)[0] or \
+            'application/octet-stream'
+        self.variants = [(coding, path + extension)
+                         for coding, extension in (('br', '.br'),
+                                                   ('gzip', '.gz'))
+                         if os.path.exists(path + extension)]
+
+    def choose(self, accept_encoding):
+        """ (content coding, path) of the best variant the client takes """
+        accepted = accepted_encodings(accept_encoding)
+        for coding, path in self.variants:
+            if coding in accepted:
+                return coding, path
+        return None, self.path
+
+    def response(self, request):
+        coding, path = self.choose(request.META.get('HTTP_ACCEPT_ENCODING',
+                                                    ''))
+        etag = '"{0}{1}"'.format(self.etag, '-' + coding if coding else '')
+        if not_modified(request, etag, self.mtime):
+            response = HttpResponseNotModified()
+        else:
+            response = FileResponse(open(path, 'rb'),
+                                    content_type=self.content_type)
+            response['Content-Length'] = os.path.getsize(path)
+            if coding:
+                response['Content-Encoding'] = coding
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(self.mtime)
+        response['Cache-Control'] = IMMUTABLE if self.immutable else \
+            'public, max-age={0}'.format(settings.STATIC_MAX_AGE)
+        if self.variants:
+            response['Vary'] = 'Accept-Encoding'
+        return response
+
+
+def index_static_root():
+    """ name: StaticFile for everything collectstatic wrote """
+    root = settings.STATIC_ROOT
+    try:
+        with open(os.path.join(root, 'staticfiles.json')) as manifest:
+            hashed = set(json.load(manifest)['paths'].values())
+    except (IOError, ValueError, KeyError):
+        hashed = set()
+    files = {}
+    for directory, _, filenames in os.walk(root):
+        for filename in filenames:
+            if filename.endswith(('.gz', '.br')):
+                continue
+            path = os.path.join(directory, filename)
+            name = os.path.relpath(path, root).replace(os.sep, '/')
+            files[name] = StaticFile(path, name in hashed)
+    return files
+
+
+class StaticFilesMiddleware(object):
+
+    '''
+    Serves STATIC_ROOT when SERVE_STATIC is set, for deployments
+    without a web server in front: the precompressed variant the client
+    accepts, immutable caching for hashed names. Keep it first in
+    MIDDLEWARE_CLASSES. The files are indexed once, collectstatic runs
+    before the workers start.
+    '''
+
+    def __init__(self):
+        if not settings.SERVE_STATIC:
+            raise MiddlewareNotUsed
+        self.files = None
+
+    def process_request(self, request):
+        if request.method not in ('GET', 'HEAD') or \
+                not request.path_info.startswith(settings.STATIC_URL):
+            return None
+        if self.files is None:
+            self.files = index_static_root()
+        static_file = self.files.get(
+            request.path_info[len(settings.STATIC_URL):])
+        if static_file is None:
+            return None
+        return static_file.response(request)
@@ -0,0 +1,120 @@
+"""
+Loads the signed in user together with their profile in one query
+and, when AUTH_USER_CACHE_TIMEOUT is set, keeps it in a cache for
+that many seconds per session. Also lets users sign in with their
+phone number.
+"""
+import uuid
+
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.core.cache import caches
+from django.utils.functional import SimpleLazyObject
+
+
+CACHE_PREFIX = 'user_account.auth:'
+
+
+class ProfileBackend(ModelBackend):
+
+    ''' ModelBackend, fetching the profile in the same query as the user '''
+
+    def get_user(self, user_id):
+        UserModel = auth.get_user_model()
+        try:
+            return UserModel._default_manager.select_related(
+                'my_profile').get(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+
+
+class PhoneNumberBackend(ProfileBackend):
+
+    ''' lets users sign in with their phone number instead of a username '''
+
+    def authenticate(self, username=None, password=None, **kwargs):
+        from . import phones
+        from .models import UserProfile
+        if not username:
+            return None
+        if username.isdigit():
+            # typed the way the sign-up form asks for it, without the +
+            username = '+' + username
+        phone_number = phones.normalize(username)
+        if phone_number is None:
+            return None
+        try:
+            # an indexed lookup on the unique phone_number column
+            user = UserProfile.objects.select_related('user').get(
+                phone_number=phone_number).user
+        except UserProfile.DoesNotExist:
+            # take as long as a wrong password would
+            auth.get_user_model()().set_password(password)
+            return None
+        if user.check_password(password):
+            return user
+        return None
+
+
+def _session_key(session_key):
+    return '{0}session:{1}'.format(CACHE_PREFIX, session_key)
+
+
+def _generation_key(user_pk):
+    return '{0}user:{1}'.format(CACHE_PREFIX, user_pk)
+
+
+def get_user(request):
+    """
+    auth.get_user, going through the cache first. A cached user is
+    only used while the user's generation, bumped by invalidate_user,
+    is the one it was cached under.
+    """
+    timeout = settings.AUTH_USER_CACHE_TIMEOUT
+    session_key = request.session.session_key
+    user_pk = request.session.get(auth.SESSION_KEY)
+    if not timeout or session_key is None or user_pk is None:
+        return auth.get_user(request)
+
+    cache = caches[settings.AUTH_USER_CACHE]
+    entry_key, generation_key = _session_key(session_key), \
+        _generation_key(user_pk)
+    cached = cache.get_many([entry_key, generation_key])
+    # read before loading the user, so a save in between is never missed
+    generation = cached.get(generation_key)
+    entry = cached.get(entry_key)
+    if entry is not None and entry[0] == (user_pk, generation):
+        return entry[1]
+
+    user = auth.get_user(request)
+    if user.is_authenticated():
+        cache.set(entry_key, ((user_pk, generation), user), timeout)
+    return user
+
+
+def invalidate_user(user_pk):
+    """ Drop every session's cached copy of the user """
+    timeout = settings.AUTH_USER_CACHE_TIMEOUT
+    if timeout:
+        caches[settings.AUTH_USER_CACHE].set(
+            _generation_key(user_pk), uuid.uuid4().hex, timeout)
+
+
+class ProfileAuthenticationMiddleware(AuthenticationMiddleware):
+
+    '''
+    AuthenticationMiddleware, setting request.user through get_user()
+    above. Use it with ProfileBackend so the profile comes along.
+    '''
+
+    def process_request(self, request):
+        super(ProfileAuthenticationMiddleware, self).process_request(request)
+        request.user = SimpleLazyObject(lambda: _get_cached_user(request))
+
+
+def _get_cached_user(request):
+    if not hasattr(request, '_cached_user'):
+        request._cached_user = get_user(request)
+    return request._cached_user
@@ -0,0 +1,54 @@
+"""
+The settings read from the environment, checked by Django's system
+checks (manage.py check, runserver, migrate) instead of failing the
+import of the settings module.
+"""
+from django.conf import settings
+from django.core import checks
+
+
+TWILIO_BACKEND = 'user_account.sms.backends.twilio.SMSBackend'
+BATCH_BACKEND = 'user_account.sms.backends.batch.SMSBackend'
+
+# (setting, what it is needed for)
+REQUIRED = (
+    ('ROOT_URL', 'the activation links'),
+    ('EMAIL_HOST_USER', 'the sender of the activation e-mails'),
+    ('CALLER_ID', 'the sender of the verification sms'),
+)
+TWILIO = (
+    ('TWILIO_ACCOUNT_SID', 'sending sms through Twilio'),
+    ('TWILIO_AUTH_TOKEN', 'sending sms through Twilio'),
+)
+
+
+def sends_through_twilio():
+    backend = settings.SMS_BACKEND
+    if backend == BATCH_BACKEND:
+        backend = settings.SMS_BATCH_BACKEND
+    return backend == TWILIO_BACKEND
+
+
+def missing(setting, purpose, id):
+    return checks.Error(
+        '{0} is not set, it is needed for {1}.'.format(setting, purpose),
+        hint='Set the {0} environment variable.'.format(setting),
+        id=id)
+
+
+@checks.register('user_account')
+def check_environment(app_configs, **kwargs):
+    errors = []
+    required = REQUIRED + (TWILIO if sends_through_twilio() else ())
+    for index, (setting, purpose) in enumerate(required):
+        if not getattr(settings, setting):
+            errors.append(missing(setting, purpose,
+                                  'user_account.E{0:03d}'.format(index + 1)))
+    if settings.EMAIL_BACKEND.endswith('smtp.EmailBackend') and \
+            settings.EMAIL_HOST_USER and not settings.EMAIL_HOST_PASSWORD:
+        errors.append(checks.Warning(
+            'EMAIL_HOST_PASSWORD is not set, the mail server is used '
+            'without logging in.',
+            hint='Set the EMAIL_HOST_PASSWORD environment variable.',
+            id='user_account.W001'))
+    return errors
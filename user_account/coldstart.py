@@ -0,0 +1,52 @@
+"""
+Times every module a new worker imports to load the WSGI application,
+like python -X importtime: run as
+
+    python -m user_account.coldstart [module]
+
+in a fresh interpreter, it prints one JSON list of
+[module, self seconds, cumulative seconds, importer] per import.
+Only the standard library is imported before the timing starts.
+"""
+import sys
+import json
+import time
+import importlib
+import importlib._bootstrap
+
+
+def time_imports(module):
+    """ Import module, timing the modules it pulls in """
+    records = []
+    stack = []
+    load = importlib._bootstrap._load_unlocked
+
+    def timed_load(spec):
+        stack.append([spec.name, 0.0])
+        start = time.perf_counter()
+        try:
+            return load(spec)
+        finally:
+            elapsed = time.perf_counter() - start
+            name, nested = stack.pop()
+            importer = stack[-1][0] if stack else None
+            if stack:
+                stack[-1][1] += elapsed
+            records.append([name, elapsed - nested, elapsed, importer])
+
+    # the import system looks this up on every import it runs
+    importlib._bootstrap._load_unlocked = timed_load
+    try:
+        importlib.import_module(module)
+    finally:
+        importlib._bootstrap._load_unlocked = load
+    return records
+
+
+def main(argv):
+    module = argv[1] if len(argv) > 1 else 'beyonic_portal.wsgi'
+    json.dump(time_imports(module), sys.stdout)
+
+
+if __name__ == '__main__':
+    main(sys.argv)
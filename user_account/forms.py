@@ -1,14 +1,15 @@
 import re
 
 from django import forms
-from django.core.exceptions import ObjectDoesNotExist
+from django.conf import settings
 from django.utils.translation import ugettext_lazy as _
-from django.contrib.auth import get_user_model
 
+from . import usernames
 from .models import UserProfile
 
 
-User = get_user_model()
+def taken_message(username):
+    return _('username {0} is already taken ').format(username)
 
 
 class RegistrationForm(forms.Form):
@@ -50,13 +51,11 @@ class RegistrationForm(forms.Form):
         if not re.search(r'^\w+$', username):
             raise forms.ValidationError(
                 _('Only alphanumeric characters and underscores allowed'))
-        try:
-            User.objects.get(username=username)
-        except ObjectDoesNotExist:
-            return username
-
-        raise forms.ValidationError(
-            _('username {0} is already taken ').format(username))
+        # no query by default: the insert is what catches a taken name,
+        # see accounts.UsernameTaken. The filter only rejects early.
+        if settings.USERNAME_FILTER and usernames.is_taken(username):
+            raise forms.ValidationError(taken_message(username))
+        return username
 
     class Meta:
         model = UserProfile
@@ -68,8 +67,8 @@ class LoginForm(forms.Form):
     ''' Login form for a registered user '''
 
     username = forms.CharField(widget=forms.TextInput(
-        attrs={'placeholder': _('User Name'), 'class': 'form-control',
-               'autofocus': 'true'}))
+        attrs={'placeholder': _('User Name or Phone Number'),
+               'class': 'form-control', 'autofocus': 'true'}))
     password = forms.CharField(widget=forms.PasswordInput(
         attrs={'placeholder': _('Password'), 'class': 'form-control'}))
 
@@ -0,0 +1,172 @@
+"""
+Sign-up funnel counts read back from the application log.
+
+Everything is a generator over lines, so a log file of any size is
+read in constant memory; only the counts per hour are kept. A saved
+Position lets the next run pick up where the last one stopped, even
+after the file was rotated.
+"""
+import os
+import re
+import gzip
+import json
+import datetime
+import collections
+
+
+# the message each step logs, see accounts.register, UserProfile.send_sms
+# and UserProfile.send_activation_link
+EVENTS = collections.OrderedDict((
+    ('registered', 'new user registered successfully'),
+    ('sms_sent', 'verification code sent to'),
+    ('sms_failed', 'An error occured while sending the verification code'),
+    ('email_sent', 'email sent successfully'),
+    ('email_failed', 'Could not send mail'),
+))
+
+# LOGGING's 'standard' format, then its 'json' one
+TEXT_LINE = re.compile(
+    r'^(?P<time>\d\d \w{3} \d{4} \d\d):\d\d:\d\d \[\w+\] [\w.]+: '
+    r'(?P<message>.*)$')
+TEXT_HOUR = '%d %b %Y %H'
+JSON_HOUR = '%Y-%m-%d %H'
+HOUR = '%Y-%m-%d %H:00'
+
+Position = collections.namedtuple('Position', 'inode offset mtime')
+
+
+def rotated_files(path):
+    """
+    path and its RotatingFileHandler backups, oldest first, as
+    (filename, stat) pairs. A backup may have been gzipped.
+    """
+    directory, name = os.path.split(path)
+    backups = []
+    for filename in os.listdir(directory or '.'):
+        match = re.match(re.escape(name) + r'\.(\d+)(\.gz)?$', filename)
+        if match:
+            backups.append((int(match.group(1)), filename))
+    names = [filename for _, filename in sorted(backups, reverse=True)]
+    if os.path.exists(path):
+        names.append(name)
+    for filename in names:
+        filename = os.path.join(directory, filename)
+        yield filename, os.stat(filename)
+
+
+def read_lines(filename, offset=0):
+    """
+    (line, offset after it) for every complete line of filename from
+    offset on. A line still being written is left for the next read.
+    """
+    if filename.endswith('.gz'):
+        log_file = gzip.open(filename, 'rb')
+    else:
+        log_file = open(filename, 'rb')
+    with log_file:
+        log_file.seek(offset)
+        for line in log_file:
+            if not line.endswith(b'\n'):
+                break
+            offset += len(line)
+            yield line.decode('utf-8', 'replace').rstrip('\r\n'), offset
+
+
+def new_lines(path, position=None):
+    """
+    (line, Position after it) for the lines of path and its backups
+    that come after position, all of them without one
+    """
+    files = list(rotated_files(path))
+    start, offset = 0, 0
+    if position is not None:
+        start = None
+        for index, (filename, stat) in enumerate(files):
+            if stat.st_ino == position.inode and \
+                    not filename.endswith('.gz') and \
+                    stat.st_size >= position.offset:
+                start, offset = index, position.offset
+                break
+        if start is None:
+            # rotated past the backups kept, or compressed: take the
+            # files written since
+            start = len(files)
+            for index, (filename, stat) in enumerate(files):
+                if stat.st_mtime > position.mtime:
+                    start = index
+                    break
+    for filename, stat in files[start:]:
+        for line, end in read_lines(filename, offset):
+            yield line, Position(stat.st_ino, end, stat.st_mtime)
+        offset = 0
+
+
+def parse(line):
+    """ (hour, message) of a log line, None for lines it can't read """
+    if line.startswith('{'):
+        try:
+            entry = json.loads(line)
+            return datetime.datetime.strptime(
+                entry['time'][:13], JSON_HOUR), entry['message']
+        except (ValueError, KeyError, TypeError):
+            return None
+    match = TEXT_LINE.match(line)
+    if match is None:
+        return None
+    try:
+        hour = datetime.datetime.strptime(match.group('time'), TEXT_HOUR)
+    except ValueError:
+        return None
+    return hour, match.group('message')
+
+
+def events(lines):
+    """ (hour, event) for the lines that record a funnel step """
+    for line in lines:
+        parsed = parse(line)
+        if parsed is None:
+            continue
+        hour, message = parsed
+        for event, prefix in EVENTS.items():
+            if message.startswith(prefix):
+                yield hour, event
+                break
+
+
+class Funnel(object):
+
+    ''' event counts per hour '''
+
+    def __init__(self, hours=None):
+        self.hours = collections.defaultdict(collections.Counter)
+        for hour, counts in (hours or {}).items():
+            self.hours[hour].update(counts)
+
+    def add(self, hour, event):
+        self.hours[hour.strftime(HOUR)][event] += 1
+
+    def update(self, events):
+        for hour, event in events:
+            self.add(hour, event)
+
+    def rows(self):
+        """ (hour, counts, sms failure rate, e-mail failure rate) """
+        totals = collections.Counter()
+        for hour in sorted(self.hours):
+            counts = self.hours[hour]
+            totals.update(counts)
+            yield (hour, counts) + failure_rates(counts)
+        yield ('total', totals) + failure_rates(totals)
+
+    def as_dict(self):
+        return {hour: dict(counts) for hour, counts in self.hours.items()}
+
+
+def failure_rate(sent, failed):
+    attempts = sent + failed
+    return failed / attempts if attempts else None
+
+
+def failure_rates(counts):
+    return (failure_rate(counts['sms_sent'], counts['sms_failed']),
+            failure_rate(counts['email_sent'], counts['email_failed']))
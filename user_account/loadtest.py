@@ -0,0 +1,226 @@
+"""
+Local stand-ins for the mail server and Twilio, and a scripted user
+walking the sign-up -> confirm -> verify -> login funnel over HTTP.
+Used by the loadtest_funnel management command.
+"""
+import re
+import json
+import math
+import time
+import email
+import smtpd
+import asyncore
+import threading
+import collections
+from http.cookiejar import CookieJar
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from socketserver import ThreadingMixIn
+from urllib import request as urllib_request
+from urllib.error import HTTPError
+from urllib.parse import urlencode, parse_qs
+
+
+ACTIVATION_LINK = re.compile(r'(/user/accounts/confirm/[-\w:]+/)')
+SMS_CODE = re.compile(r'code: (\d+)')
+CSRF_TOKEN = re.compile(r"name='csrfmiddlewaretoken' value='([^']+)'")
+
+STEPS = ('registration_form', 'registration', 'confirm',
+         'phone_verification_form', 'phone_verification', 'login',
+         'login_verification_form', 'login_verification', 'home')
+
+
+class Inbox(object):
+
+    ''' what the stand-ins captured, waited on by the journeys '''
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.items = collections.defaultdict(list)
+
+    def put(self, key, value):
+        with self.condition:
+            self.items[key].append(value)
+            self.condition.notify_all()
+
+    def wait(self, key, count=1, timeout=60):
+        """ Return the count-th item captured for key """
+        deadline = time.time() + timeout
+        with self.condition:
+            while len(self.items[key]) < count:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    raise LookupError('Nothing received for {0}'.format(key))
+                self.condition.wait(remaining)
+            return self.items[key][count - 1]
+
+
+class SmtpSink(smtpd.SMTPServer):
+
+    ''' accepts every e-mail and keeps the activation link per recipient '''
+
+    def __init__(self, address, inbox):
+        smtpd.SMTPServer.__init__(self, address, None)
+        self.inbox = inbox
+
+    def process_message(self, peer, mailfrom, rcpttos, data, **kwargs):
+        if isinstance(data, bytes):
+            message = email.message_from_bytes(data)
+        else:
+            message = email.message_from_string(data)
+        for part in message.walk():
+            if part.get_content_type() != 'text/plain':
+                continue
+            body = part.get_payload(decode=True).decode('utf-8')
+            match = ACTIVATION_LINK.search(body)
+            if match:
+                for recipient in rcpttos:
+                    self.inbox.put(recipient, match.group(1))
+
+
+class _TwilioHandler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        form = parse_qs(self.rfile.read(length).decode('utf-8'))
+        match = SMS_CODE.search(form.get('Body', [''])[0])
+        if match:
+            self.server.inbox.put(form['To'][0], match.group(1))
+        body = json.dumps({'sid': 'SM{0}'.format(time.time()),
+                           'status': 'queued'}).encode('utf-8')
+        self.send_response(201)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeTwilio(ThreadingMixIn, HTTPServer):
+
+    ''' answers the Messages API and keeps the sms code per phone number '''
+
+    daemon_threads = True
+
+    def __init__(self, address, inbox):
+        HTTPServer.__init__(self, address, _TwilioHandler)
+        self.inbox = inbox
+
+
+def start_stand_ins(smtp_port, twilio_port, host='127.0.0.1'):
+    """ Start both stand-ins in daemon threads, returns their inboxes """
+    mails, texts = Inbox(), Inbox()
+    SmtpSink((host, smtp_port), mails)
+    threading.Thread(target=asyncore.loop,
+                     kwargs={'timeout': 0.1}, daemon=True).start()
+    twilio = FakeTwilio((host, twilio_port), texts)
+    threading.Thread(target=twilio.serve_forever, daemon=True).start()
+    return mails, texts
+
+
+class _NoRedirect(urllib_request.HTTPRedirectHandler):
+
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class Journey(object):
+
+    ''' one user going through the whole funnel with its own cookies '''
+
+    def __init__(self, base_url, number, run_id, mails, texts, timeout=60):
+        self.base_url = base_url.rstrip('/')
+        self.username = 'load{0}_{1}'.format(run_id, number)
+        self.email = '{0}@example.com'.format(self.username)
+        self.phone_number = '2547{0:02d}{1:06d}'.format(run_id % 100, number)
+        self.password = 'secret123'
+        self.mails = mails
+        self.texts = texts
+        self.timeout = timeout
+        self.csrf_token = None
+        self.timings = {}
+        self.opener = urllib_request.build_opener(
+            urllib_request.HTTPCookieProcessor(CookieJar()), _NoRedirect)
+
+    def request(self, step, path, data=None, expect=(200,)):
+        """ Time one request, returns (status, location, body) """
+        if data is not None:
+            data = dict(data, csrfmiddlewaretoken=self.csrf_token)
+            data = urlencode(data).encode('utf-8')
+        url = path if path.startswith('http') else self.base_url + path
+        req = urllib_request.Request(url, data=data,
+                                     headers={'Referer': self.base_url})
+        start = time.time()
+        try:
+            response = self.opener.open(req, timeout=self.timeout)
+        except HTTPError as error:
+            response = error
+        body = response.read().decode('utf-8')
+        self.timings[step] = time.time() - start
+        if response.code not in expect:
+            raise AssertionError('{0} returned {1}'.format(
+                step, response.code))
+        match = CSRF_TOKEN.search(body)
+        if match:
+            self.csrf_token = match.group(1)
+        return response.code, response.headers.get('Location', ''), body
+
+    def run(self):
+        self.request('registration_form', '/user/sign-up/')
+        self.request('registration', '/user/sign-up/', {
+            'username': self.username,
+            'email': self.email,
+            'first_name': 'load',
+            'last_name': 'test',
+            'phone_number': self.phone_number,
+            'password1': self.password,
+            'password2': self.password,
+        }, expect=(302,))
+
+        link = self.mails.wait(self.email, timeout=self.timeout)
+        _, verification_url, _ = self.request('confirm', link, expect=(302,))
+        self.request('phone_verification_form', verification_url)
+        # confirm sends a new code, replacing the one sent at sign-up
+        code = self.texts.wait('+' + self.phone_number, count=2,
+                               timeout=self.timeout)
+        self.request('phone_verification', verification_url,
+                     {'code': code}, expect=(302,))
+
+        self.request('login', '/user/login/', {
+            'username': self.username,
+            'password': self.password,
+        }, expect=(302,))
+        # logging in rotates the csrf token, pick up the new one
+        self.request('login_verification_form', verification_url)
+        code = self.texts.wait('+' + self.phone_number, count=3,
+                               timeout=self.timeout)
+        self.request('login_verification', verification_url,
+                     {'code': code}, expect=(302,))
+        self.request('home', '/user/home/')
+        return self.timings
+
+
+def percentile(values, fraction):
+    """ Nearest-rank percentile of a non empty list """
+    ordered = sorted(values)
+    return ordered[max(0, int(math.ceil(fraction * len(ordered))) - 1)]
+
+
+def summarize(journeys, elapsed):
+    """ Throughput and latency percentiles per step, JSON friendly """
+    steps = collections.OrderedDict()
+    for step in STEPS:
+        values = [timings[step] for timings in journeys if step in timings]
+        if not values:
+            continue
+        steps[step] = {
+            'count': len(values),
+            'throughput': len(values) / elapsed,
+            'p50': percentile(values, .50),
+            'p95': percentile(values, .95),
+            'p99': percentile(values, .99),
+        }
+    return steps
@@ -0,0 +1,208 @@
+"""
+Logging that never touches the disk from a request thread.
+
+QueueHandler only puts records on an in-memory queue. One listener
+thread per process takes them off and hands them to the writer: the
+rotating files of LOG_FILES in this process or, with LOG_SERVER set,
+the log_server command, which then is the only process on the host
+writing, and rotating, those files.
+"""
+import os
+import json
+import queue
+import atexit
+import struct
+import logging
+import threading
+import logging.config
+import logging.handlers
+
+from django.conf import settings
+
+
+# the attributes every LogRecord has, anything else came in extra=
+RECORD_ATTRIBUTES = frozenset(logging.makeLogRecord({}).__dict__) | {
+    'message', 'asctime', 'log_file'}
+
+_lock = threading.Lock()
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+
+    ''' one JSON object per record, extra= values included '''
+
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record, self.datefmt),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'process': record.process,
+            'thread': record.threadName,
+        }
+        for name, value in record.__dict__.items():
+            if name not in RECORD_ATTRIBUTES and name not in entry:
+                entry[name] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str, sort_keys=True)
+
+
+def get_formatter():
+    """ The LOGGING formatter named by LOG_FORMATTER """
+    configurator = logging.config.DictConfigurator(settings.LOGGING)
+    return configurator.configure_formatter(
+        dict(settings.LOGGING['formatters'][settings.LOG_FORMATTER]))
+
+
+class FileWriter(object):
+
+    ''' writes records to the rotating file named by their log_file '''
+
+    def __init__(self):
+        formatter = get_formatter()
+        self.handlers = {}
+        for name, filename in settings.LOG_FILES.items():
+            handler = logging.handlers.RotatingFileHandler(
+                filename, maxBytes=settings.LOG_FILE_MAX_BYTES,
+                backupCount=settings.LOG_FILE_BACKUP_COUNT, delay=True)
+            handler.setFormatter(formatter)
+            self.handlers[name] = handler
+
+    def handle(self, record):
+        self.handlers[record.log_file].handle(record)
+
+    def close(self):
+        for handler in self.handlers.values():
+            handler.close()
+
+
+def encode(record):
+    """ A prepared record as sent to log_server """
+    data = json.dumps(record.__dict__, default=str).encode('utf-8')
+    return struct.pack('>L', len(data)) + data
+
+
+def decode(data):
+    return logging.makeLogRecord(json.loads(data.decode('utf-8')))
+
+
+class SocketWriter(logging.handlers.SocketHandler):
+
+    '''
+    sends records to log_server as length prefixed JSON; the server
+    never unpickles what it is sent
+    '''
+
+    def __init__(self, address):
+        host, port = address.rsplit(':', 1)
+        super(SocketWriter, self).__init__(host, int(port))
+
+    def makePickle(self, record):
+        return encode(record)
+
+
+def get_writer():
+    if settings.LOG_SERVER:
+        return SocketWriter(settings.LOG_SERVER)
+    return FileWriter()
+
+
+class Listener(object):
+
+    ''' the thread draining a process' queue into the writer '''
+
+    def __init__(self):
+        self.pid = os.getpid()
+        self.queue = queue.Queue(settings.LOG_QUEUE_SIZE)
+        self.dropped = 0
+        self.writer = get_writer()
+        self.thread = threading.Thread(target=self.run,
+                                       name='logqueue-listener')
+        self.thread.daemon = True
+        self.thread.start()
+
+    def put(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # never make a request wait for the disk
+            self.dropped += 1
+
+    def run(self):
+        while True:
+            record = self.queue.get()
+            if record is None:
+                break
+            self.write(record)
+            if self.dropped:
+                dropped, self.dropped = self.dropped, 0
+                self.write(logging.makeLogRecord({
+                    'name': __name__, 'levelno': logging.WARNING,
+                    'levelname': 'WARNING', 'log_file': record.log_file,
+                    'msg': '{0} log records dropped, the queue was '
+                           'full'.format(dropped)}))
+
+    def write(self, record):
+        try:
+            self.writer.handle(record)
+        except Exception:
+            logging.Handler().handleError(record)
+
+    def stop(self):
+        """ Write what is queued, then close the writer """
+        self.queue.put(None)
+        self.thread.join()
+        self.writer.close()
+
+
+def get_listener():
+    """ This process' listener, a new one after a fork """
+    global _listener
+    listener = _listener
+    if listener is None or listener.pid != os.getpid():
+        with _lock:
+            if _listener is listener:
+                _listener = Listener()
+            listener = _listener
+    return listener
+
+
+def stop():
+    global _listener
+    with _lock:
+        if _listener is not None and _listener.pid == os.getpid():
+            _listener.stop()
+        _listener = None
+
+
+atexit.register(stop)
+
+
+class QueueHandler(logging.handlers.QueueHandler):
+
+    ''' enqueues records for the LOG_FILES file named log_file '''
+
+    def __init__(self, log_file):
+        # the queue is the listener's, looked up per record
+        super(QueueHandler, self).__init__(None)
+        self.log_file = log_file
+
+    def prepare(self, record):
+        # render the message now, while its arguments are as logged,
+        # and leave the formatting to the writer
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(
+                record.exc_info)
+            record.exc_info = None
+        record.log_file = self.log_file
+        return record
+
+    def enqueue(self, record):
+        get_listener().put(record)
@@ -0,0 +1,94 @@
+import time
+import socket
+import smtplib
+import logging
+import threading
+
+from django.conf import settings
+from django.core import mail
+
+from . import metrics
+
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+def _is_stale(pooled):
+    """ Whether a pooled connection should be replaced by a new one """
+    now = time.time()
+    if pooled['backend'] != settings.EMAIL_BACKEND:
+        return True
+    if now - pooled['opened'] > settings.EMAIL_CONNECTION_MAX_AGE:
+        return True
+    smtp = getattr(pooled['connection'], 'connection', None)
+    if smtp is None or now - pooled['used'] < settings.EMAIL_CONNECTION_CHECK:
+        return False
+    # idle for a while, make sure the server has not hung up on us
+    try:
+        return smtp.noop()[0] != 250
+    except (smtplib.SMTPException, socket.error):
+        return True
+
+
+def close_connection():
+    """ Close the connection held by the current thread, if any """
+    pooled = getattr(_local, 'pooled', None)
+    _local.pooled = None
+    if pooled is not None:
+        try:
+            pooled['connection'].close()
+        except (smtplib.SMTPException, socket.error):
+            pass
+
+
+def get_connection():
+    """
+    Return the current thread's long lived, already authenticated
+    connection to the configured e-mail backend, opening a new one
+    the first time and whenever the previous one has gone stale.
+    """
+    pooled = getattr(_local, 'pooled', None)
+    if pooled is None or _is_stale(pooled):
+        close_connection()
+        connection = mail.get_connection(fail_silently=False)
+        connection.open()
+        now = time.time()
+        pooled = _local.pooled = {
+            'backend': settings.EMAIL_BACKEND,
+            'connection': connection,
+            'opened': now,
+            'used': now,
+        }
+    return pooled['connection']
+
+
+def send_messages(messages):
+    """
+    Send a list of EmailMessage over the pooled connection and return
+    the number sent. A connection dropped by the server is reopened
+    once, and the messages not sent yet are sent over the new one.
+    """
+    sent = 0
+    reconnected = False
+    with metrics.outbound('smtp'):
+        # one at a time, so a drop in the middle of a batch tells which
+        # messages already went out
+        index = 0
+        while index < len(messages):
+            try:
+                sent += get_connection().send_messages(
+                    [messages[index]]) or 0
+            except (smtplib.SMTPServerDisconnected, socket.error) as detail:
+                if reconnected:
+                    raise
+                reconnected = True
+                logger.info('Reconnecting to the mail server. {0}'.format(
+                    detail))
+                close_connection()
+                continue
+            index += 1
+    if _local.pooled is not None:
+        _local.pooled['used'] = time.time()
+    return sent
@@ -0,0 +1,69 @@
+import os
+import sys
+import json
+import statistics
+import subprocess
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from user_account import coldstart
+
+
+# where python -m finds user_account
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(
+    coldstart.__file__)))
+
+
+class Command(BaseCommand):
+    help = ("Starts fresh interpreters that load beyonic_portal.wsgi's "
+            "application, as a new worker does, and reports the import "
+            "time of the modules it pulls in (like python -X importtime) "
+            "over several runs.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5)
+        parser.add_argument('--top', type=int, default=25,
+                            help='Modules listed, by cumulative time.')
+        parser.add_argument('--module', default='beyonic_portal.wsgi',
+                            help='The module a worker imports.')
+
+    def handle(self, **options):
+        environ = dict(os.environ,
+                       DJANGO_SETTINGS_MODULE=settings.SETTINGS_MODULE)
+        totals = []
+        times = {}
+        for _ in range(options['runs']):
+            records = self.run(options['module'], environ)
+            totals.append(sum(cumulative for _, _, cumulative, importer
+                              in records if importer is None))
+            for name, own, cumulative, importer in records:
+                times.setdefault(name, []).append(
+                    (own, cumulative, importer))
+
+        self.stdout.write('{0}: {1:.1f} ms median over {2} runs, {3} '
+                          'modules imported'.format(
+                              options['module'],
+                              statistics.median(totals) * 1000,
+                              options['runs'], len(times)))
+        rows = sorted(
+            ((statistics.median(own for own, _, _ in samples),
+              statistics.median(cumulative for _, cumulative, _ in samples),
+              name, samples[0][2]) for name, samples in times.items()),
+            key=lambda row: row[1], reverse=True)
+        self.stdout.write('{0:>10} {1:>10}  module (imported by)'.format(
+            'self ms', 'cumul ms'))
+        for own, cumulative, name, importer in rows[:options['top']]:
+            self.stdout.write('{0:10.1f} {1:10.1f}  {2} ({3})'.format(
+                own * 1000, cumulative * 1000, name, importer or '-'))
+
+    def run(self, module, environ):
+        process = subprocess.Popen(
+            [sys.executable, '-m', 'user_account.coldstart', module],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=environ,
+            cwd=PROJECT_DIR)
+        out, err = process.communicate()
+        if process.returncode:
+            raise CommandError('Loading {0} failed:\n{1}'.format(
+                module, err.decode('utf-8', 'replace')))
+        return json.loads(out.decode('utf-8'))
@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+from phonenumber_field import phonenumber
+
+from user_account import phones
+
+
+def request(to_python, value):
+    """
+    The phone number work of a login request: the profile is loaded,
+    then the number is formatted for the code store, the sms and the log
+    """
+    number = to_python(value)
+    for _ in range(3):
+        str(number)
+
+
+class Command(BaseCommand):
+    help = ("Times parsing and formatting a profile's phone number the way "
+            "a login request does, with phonenumber_field as is and "
+            "through the user_account.phones caches.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=10000)
+        parser.add_argument('--numbers', type=int, default=100,
+                            help='Distinct phone numbers cycled through.')
+
+    def handle(self, **options):
+        values = ['+2547{0:08d}'.format(index)
+                  for index in range(options['numbers'])]
+        count = options['requests']
+        results = []
+        for name, to_python in (('phonenumber_field', phonenumber.to_python),
+                                ('user_account.phones', phones.to_python)):
+            start = time.time()
+            for index in range(count):
+                request(to_python, values[index % len(values)])
+            elapsed = time.time() - start
+            results.append(elapsed)
+            self.stdout.write('{0}: {1:.1f} us per request'.format(
+                name, elapsed / count * 1e6))
+        self.stdout.write('{0:.1f}x faster, cache: {1}'.format(
+            results[0] / results[1], phones.cache_info()['format']))
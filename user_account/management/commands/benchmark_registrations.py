@@ -0,0 +1,115 @@
+import time
+import multiprocessing
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections
+from django.test.utils import override_settings
+
+from user_account import accounts
+
+
+PREFIX = 'benchreg'
+
+# the rollback journal sqlite uses out of the box, then this project's
+# SQLITE_* settings
+MODES = (
+    ('rollback journal', {'SQLITE_JOURNAL_MODE': 'DELETE',
+                          'SQLITE_SYNCHRONOUS': 'FULL',
+                          'SQLITE_BUSY_TIMEOUT': None}),
+    ('configured', {}),
+)
+
+
+def register(username, phone_number, password):
+    """
+    What views.registration saves for a new account, without hashing a
+    password every time
+    """
+    user = User(username=username, email='{0}@example.com'.format(username),
+                first_name='BENCH', last_name='MARK', is_active=False,
+                password=password)
+    accounts.save_registration(user, phone_number)
+
+
+def _worker(mode, process, seconds, password, results):
+    # never share the parent's database connection with a child
+    connections.close_all()
+    registered = locked = 0
+    deadline = time.time() + seconds
+    while time.time() < deadline:
+        number = registered + locked
+        try:
+            register('{0}{1}_{2}_{3}'.format(PREFIX, mode, process, number),
+                     '+2547{0:02d}{1:06d}'.format(process, number), password)
+            registered += 1
+        except OperationalError as detail:
+            if 'locked' not in str(detail):
+                raise
+            locked += 1
+    results.put((registered, locked))
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = ("Registers accounts from several processes at once, first with "
+            "sqlite's default rollback journal and then with the "
+            "configured SQLITE_* settings, and reports the sustained "
+            "registrations per second. The accounts are deleted after.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=4)
+        parser.add_argument('--seconds', type=float, default=10,
+                            help='How long each mode runs.')
+
+    def handle(self, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('This benchmark is for sqlite databases.')
+        if connection.is_in_memory_db(connection.settings_dict['NAME']):
+            raise CommandError('An in-memory database cannot be shared by '
+                               'several processes.')
+
+        password = make_password('secret123')
+        for index, (name, overrides) in enumerate(MODES):
+            with override_settings(**overrides):
+                # switch the journal mode while nobody else is connected
+                connections.close_all()
+                with connection.cursor() as cursor:
+                    cursor.execute('PRAGMA journal_mode')
+                    journal_mode = cursor.fetchone()[0]
+                connections.close_all()
+                registered, locked = self.run(index, options, password)
+            User.objects.filter(
+                username__startswith='{0}{1}_'.format(PREFIX, index)).delete()
+
+            rate = registered / options['seconds']
+            self.stdout.write(
+                '{0} (journal_mode={1}, synchronous={2}): {3} registrations, '
+                '{4:.1f}/s, {5} failed with "database is locked"'.format(
+                    name, journal_mode,
+                    overrides.get('SQLITE_SYNCHRONOUS',
+                                  settings.SQLITE_SYNCHRONOUS),
+                    registered, rate, locked))
+
+    def run(self, mode, options, password):
+        results = multiprocessing.Queue()
+        workers = [multiprocessing.Process(
+            target=_worker,
+            args=(mode, process, options['seconds'], password, results))
+            for process in range(options['processes'])]
+        for worker in workers:
+            worker.start()
+        registered = locked = 0
+        try:
+            for _ in workers:
+                process_registered, process_locked = results.get(
+                    timeout=options['seconds'] + 600)
+                registered += process_registered
+                locked += process_locked
+        finally:
+            for worker in workers:
+                worker.join(1)
+                worker.terminate()
+        return registered, locked
@@ -0,0 +1,125 @@
+import re
+import collections
+
+from django.core.management.base import BaseCommand
+from django.core.urlresolvers import reverse
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from user_account.models import OutboundNotification, UserProfile
+
+
+ENGINES = (
+    'django.contrib.sessions.backends.db',
+    'user_account.sessions',
+    'django.contrib.sessions.backends.cached_db',
+    'django.contrib.sessions.backends.signed_cookies',
+)
+
+SESSION_WRITE = re.compile(
+    r'\b(INSERT INTO|UPDATE|DELETE FROM) "?django_session\b', re.IGNORECASE)
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _latest_code(username):
+    return OutboundNotification.objects.filter(
+        profile__user__username=username,
+        channel=OutboundNotification.SMS).latest('pk').payload
+
+
+def journey(client, number):
+    """
+    Walk one user through the funnel, yielding (step, request) pairs
+    for the caller to run in order.
+    """
+    username = 'bench_{0}'.format(number)
+    password = 'secret123'
+    yield 'registration_form', lambda: client.get(reverse('registration'))
+    yield 'registration', lambda: client.post(reverse('registration'), {
+        'username': username,
+        'email': '{0}@example.com'.format(username),
+        'first_name': 'bench',
+        'last_name': 'mark',
+        'phone_number': '2547{0:08d}'.format(number),
+        'password1': password,
+        'password2': password,
+    })
+
+    profile = UserProfile.objects.get(user__username=username)
+    verification_url = reverse('phone-verification',
+                               kwargs={'pk': profile.user_id})
+    yield 'confirm', lambda: client.get(reverse(
+        'confirm', kwargs={'activation_key': profile.activation_token()}))
+    yield 'phone_verification_form', lambda: client.get(verification_url)
+    yield 'phone_verification', lambda: client.post(
+        verification_url, {'code': _latest_code(username)})
+    yield 'login', lambda: client.post(reverse('user_login'), {
+        'username': username, 'password': password})
+    yield 'login_verification_form', lambda: client.get(verification_url)
+    yield 'login_verification', lambda: client.post(
+        verification_url, {'code': _latest_code(username)})
+    yield 'home', lambda: client.get(reverse('home'))
+    yield 'logout', lambda: client.get(reverse('user_logout'))
+
+
+class Command(BaseCommand):
+    help = ("Runs the sign-up, verification and login funnel in process "
+            "with each session engine and reports the writes to the "
+            "session table per step. Everything is rolled back.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10,
+                            help='Journeys run per engine.')
+        parser.add_argument('--engine', action='append', dest='engines',
+                            help='Session engine to compare, repeatable. '
+                                 'Defaults to the db, coalescing, cached_db '
+                                 'and signed cookie engines.')
+
+    def handle(self, **options):
+        engines = options['engines'] or ENGINES
+        users = options['users']
+        writes = collections.OrderedDict()
+        for engine in engines:
+            writes[engine] = self.measure(engine, users)
+
+        steps = list(writes[engines[0]])
+        width = max(len(step) for step in steps + ['total'])
+        self.stdout.write('session writes per journey, {0} journeys'.format(
+            users))
+        for index, engine in enumerate(engines):
+            self.stdout.write('  [{0}] {1}'.format(index, engine))
+        self.stdout.write(' '.join(
+            ['step'.ljust(width)] +
+            ['[{0}]'.format(index).rjust(6) for index in range(len(engines))]))
+        for step in steps + ['total']:
+            row = []
+            for engine in engines:
+                if step == 'total':
+                    count = sum(writes[engine].values())
+                else:
+                    count = writes[engine][step]
+                row.append('{0:6.1f}'.format(count / users))
+            self.stdout.write(' '.join([step.ljust(width)] + row))
+
+    def measure(self, engine, users):
+        writes = collections.OrderedDict()
+        try:
+            with override_settings(SESSION_ENGINE=engine,
+                                   ALLOWED_HOSTS=['*']), \
+                    transaction.atomic():
+                for number in range(users):
+                    client = Client()
+                    for step, request in journey(client, number):
+                        with CaptureQueriesContext(connection) as queries:
+                            request()
+                        writes[step] = writes.get(step, 0) + sum(
+                            1 for query in queries.captured_queries
+                            if SESSION_WRITE.search(query['sql']))
+                raise _Rollback
+        except _Rollback:
+            pass
+        return writes
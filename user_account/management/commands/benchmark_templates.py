@@ -0,0 +1,88 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+from django.test import RequestFactory
+from django.test.utils import override_settings
+from django.utils import translation
+
+from user_account import templatecache
+from user_account.forms import LoginForm, RegistrationForm
+
+
+PAGES = (
+    ('user_account/home.html', '/user/home/',
+     lambda: {'page_title': 'Beyonic Portal'}),
+    ('user_account/login.html', '/user/login/',
+     lambda: {'form': LoginForm()}),
+    ('user_account/register.html', '/user/sign-up/',
+     lambda: {'form': RegistrationForm(), 'page_title': 'Sign Up'}),
+)
+
+CACHED_LOADERS = [
+    ('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]),
+]
+NO_FRAGMENTS = {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}
+
+
+def templates(loaders=None):
+    options = dict(settings.TEMPLATES[0]['OPTIONS'])
+    options.pop('loaders', None)
+    if loaders:
+        options['loaders'] = loaders
+    return [dict(settings.TEMPLATES[0], APP_DIRS=not loaders,
+                 OPTIONS=options)]
+
+
+def caches(fragments):
+    caches = dict(settings.CACHES)
+    if not fragments:
+        caches['template_fragments'] = NO_FRAGMENTS
+    return caches
+
+
+MODES = (
+    ('parsed per render', templates(), False),
+    ('cached loader', templates(CACHED_LOADERS), False),
+    ('cached loader and fragments', templates(CACHED_LOADERS), True),
+)
+
+
+class Command(BaseCommand):
+    help = ("Renders home.html, login.html and register.html for an "
+            "anonymous visitor the way their views do: parsed on every "
+            "render, through the cached loader, and through the cached "
+            "loader with base.html's fragments cached.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--renders', type=int, default=1000)
+
+    def handle(self, **options):
+        factory = RequestFactory()
+        count = options['renders']
+        for name, template_settings, fragments in MODES:
+            # commands run without a language, views with LANGUAGE_CODE
+            with override_settings(TEMPLATES=template_settings,
+                                   CACHES=caches(fragments)), \
+                    translation.override(settings.LANGUAGE_CODE):
+                templatecache.reset()
+                results = []
+                for template_name, path, context in PAGES:
+                    request = factory.get(path)
+                    request.user = AnonymousUser()
+                    # the first render fills the caches
+                    render_to_string(template_name, context(),
+                                         request=request)
+                    start = time.time()
+                    for _ in range(count):
+                        render_to_string(template_name, context(),
+                                         request=request)
+                    results.append('{0} {1:.0f} us'.format(
+                        template_name.split('/')[-1],
+                        (time.time() - start) / count * 1e6))
+            self.stdout.write('{0}: {1}'.format(name, ', '.join(results)))
@@ -0,0 +1,56 @@
+import os
+import sys
+import json
+import statistics
+import subprocess
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from user_account.management.commands.benchmark_cold_start import \
+    PROJECT_DIR
+
+
+PATHS = ('/user/login/', '/user/sign-up/', '/user/login/',
+         '/user/sign-up/')
+
+
+class Command(BaseCommand):
+    help = ("Times the first requests of fresh worker processes, as "
+            "started and with user_account.warmup run first, against the "
+            "steady state. Each mode starts --runs new interpreters.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5)
+        parser.add_argument('--steady', type=int, default=20,
+                            help='Requests timed after the first ones.')
+
+    def handle(self, **options):
+        environ = dict(os.environ, WSGI_WARMUP='',
+                       DJANGO_SETTINGS_MODULE=settings.SETTINGS_MODULE)
+        paths = list(PATHS) + list(PATHS[:2]) * options['steady']
+        for name, args in (('as started', []), ('warmed up', ['--warm-up'])):
+            runs = [self.run(args + paths, environ)
+                    for _ in range(options['runs'])]
+            first = [statistics.median(run['requests'][index] for run in runs)
+                     for index in range(len(PATHS))]
+            steady = statistics.median(
+                time for run in runs for time in run['requests'][len(PATHS):])
+            self.stdout.write(
+                '{0}: warm-up {1:.1f} ms, first requests {2} ms, steady '
+                'state {3:.1f} ms'.format(
+                    name,
+                    statistics.median(run['warm_up'] for run in runs) * 1000,
+                    ' / '.join('{0:.1f}'.format(time * 1000)
+                               for time in first), steady * 1000))
+
+    def run(self, args, environ):
+        process = subprocess.Popen(
+            [sys.executable, '-m', 'user_account.warmup'] + args,
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=environ,
+            cwd=PROJECT_DIR)
+        out, err = process.communicate()
+        if process.returncode:
+            raise CommandError('The worker failed:\n{0}'.format(
+                err.decode('utf-8', 'replace')))
+        return json.loads(out.decode('utf-8'))
@@ -0,0 +1,90 @@
+import time
+import multiprocessing
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from user_account import verification
+
+
+def _phone_number(process, index):
+    return '+254{0:03d}{1:06d}'.format(process, index)
+
+
+def _worker(process, codes, inbox, results):
+    # never share the parent's database connection with a child
+    connections.close_all()
+    store = verification.get_store()
+    start = time.time()
+    issued = [store.issue(_phone_number(process, index))
+              for index in range(codes)]
+    results.put((process, issued, time.time() - start))
+
+    # once every process has issued its codes, the parent hands over
+    # a neighbour's codes to be verified from this process
+    neighbour, neighbour_codes = inbox.get()
+    start = time.time()
+    failed = sum(
+        1 for index, code in enumerate(neighbour_codes)
+        if not store.verify(_phone_number(neighbour, index), code))
+    results.put((process, failed, time.time() - start))
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = ("Checks that verification codes issued by one worker process "
+            "verify in the others, using the configured "
+            "VERIFICATION_CODE_STORE, and reports its throughput.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=4)
+        parser.add_argument('--codes', type=int, default=500,
+                            help='Codes issued by each process.')
+
+    def handle(self, **options):
+        processes = options['processes']
+        codes = options['codes']
+        if processes < 2:
+            raise CommandError('At least two processes are needed.')
+
+        connections.close_all()
+        results = multiprocessing.Queue()
+        inboxes = [multiprocessing.Queue() for _ in range(processes)]
+        workers = [multiprocessing.Process(
+            target=_worker, args=(i, codes, inboxes[i], results))
+            for i in range(processes)]
+        for worker in workers:
+            worker.start()
+
+        try:
+            issued, issue_times = {}, []
+            for _ in range(processes):
+                process, process_codes, elapsed = results.get(timeout=600)
+                issued[process] = process_codes
+                issue_times.append(elapsed)
+            for process, inbox in enumerate(inboxes):
+                neighbour = (process + 1) % processes
+                inbox.put((neighbour, issued[neighbour]))
+
+            failed, verify_times = 0, []
+            for _ in range(processes):
+                process, process_failed, elapsed = results.get(timeout=600)
+                failed += process_failed
+                verify_times.append(elapsed)
+        finally:
+            for worker in workers:
+                worker.terminate()
+
+        total = processes * codes
+        issue_time = max(issue_times)
+        verify_time = max(verify_times)
+        self.stdout.write('store: {0}'.format(
+            verification.get_store().__class__.__name__))
+        self.stdout.write('issued: {0} in {1:.2f}s ({2:.0f}/s)'.format(
+            total, issue_time, total / issue_time))
+        self.stdout.write('verified: {0} in {1:.2f}s ({2:.0f}/s)'.format(
+            total, verify_time, total / verify_time))
+        if failed:
+            raise CommandError(
+                '{0} code(s) did not verify in another process'.format(failed))
+        self.stdout.write('all codes verified across processes')
@@ -0,0 +1,99 @@
+import json
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from user_account import loadtest, outbox
+
+
+class Command(BaseCommand):
+    help = ("Drives concurrent users through sign-up, confirm, phone "
+            "verification, login and home against a running server, with "
+            "local stand-ins for the mail server and Twilio. Start the "
+            "server (and the outbox worker, unless --with-outbox-worker is "
+            "given) with --settings=beyonic_portal.settings.loadtest.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000')
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument('--concurrency', type=int, default=10)
+        parser.add_argument('--smtp-port', type=int, default=2525)
+        parser.add_argument('--twilio-port', type=int, default=8025)
+        parser.add_argument('--timeout', type=float, default=60,
+                            help='Seconds to wait for a request, e-mail '
+                                 'or sms.')
+        parser.add_argument(
+            '--with-outbox-worker', action='store_true', default=False,
+            help='Deliver the outbox from this process.')
+        parser.add_argument('--output',
+                            help='Write the results to this JSON file.')
+        parser.add_argument('--baseline',
+                            help='Compare with the results of a previous '
+                                 'run saved with --output.')
+
+    def handle(self, **options):
+        mails, texts = loadtest.start_stand_ins(options['smtp_port'],
+                                                options['twilio_port'])
+        stop = threading.Event()
+        if options['with_outbox_worker']:
+            threading.Thread(target=self.deliver, args=(stop,),
+                             daemon=True).start()
+
+        run_id = random.randint(0, 10**6)
+        journeys = [loadtest.Journey(options['url'], number, run_id, mails,
+                                     texts, timeout=options['timeout'])
+                    for number in range(options['users'])]
+        start = time.time()
+        with ThreadPoolExecutor(options['concurrency']) as executor:
+            futures = [executor.submit(journey.run) for journey in journeys]
+        elapsed = time.time() - start
+        stop.set()
+
+        failures = [str(future.exception()) for future in futures
+                    if future.exception() is not None]
+        completed = [future.result() for future in futures
+                     if future.exception() is None]
+        results = {
+            'users': options['users'],
+            'concurrency': options['concurrency'],
+            'elapsed': elapsed,
+            'completed': len(completed),
+            'failed': len(failures),
+            'journeys_per_second': len(completed) / elapsed,
+            'steps': loadtest.summarize(completed, elapsed),
+        }
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline']) as baseline_file:
+                baseline = json.load(baseline_file)
+        self.report(results, baseline)
+        for failure in sorted(set(failures)):
+            self.stderr.write('failed: {0}'.format(failure))
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(results, output, indent=2)
+
+    def deliver(self, stop):
+        while not stop.is_set():
+            if not outbox.drain(threads=4):
+                time.sleep(0.05)
+
+    def report(self, results, baseline=None):
+        self.stdout.write(
+            '{completed}/{users} journeys in {elapsed:.1f}s '
+            '({journeys_per_second:.1f}/s), {failed} failed'.format(**results))
+        self.stdout.write('{0:<26}{1:>8}{2:>10}{3:>10}{4:>10}{5:>10}'.format(
+            'step', 'count', 'req/s', 'p50 ms', 'p95 ms', 'p99 ms'))
+        for step, stats in results['steps'].items():
+            line = '{0:<26}{1:>8}{2:>10.1f}{3:>10.1f}{4:>10.1f}{5:>10.1f}'
+            line = line.format(step, stats['count'], stats['throughput'],
+                               stats['p50'] * 1000, stats['p95'] * 1000,
+                               stats['p99'] * 1000)
+            previous = (baseline or {}).get('steps', {}).get(step)
+            if previous:
+                line += '  p95 {0:+.0%}'.format(
+                    stats['p95'] / previous['p95'] - 1)
+            self.stdout.write(line)
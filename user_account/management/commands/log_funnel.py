@@ -0,0 +1,69 @@
+import os
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from user_account import funnel
+
+
+COLUMNS = ('hour', 'registered', 'sms sent', 'sms failed', 'sms fail %',
+           'email sent', 'email failed', 'email fail %')
+
+
+def percent(rate):
+    return '-' if rate is None else '{0:.1f}'.format(rate * 100)
+
+
+class Command(BaseCommand):
+    help = ("Counts registrations, verification sms and activation e-mails "
+            "per hour from the application log and its rotated (or "
+            "gzipped) backups, with the sms and e-mail failure rates. With "
+            "--state the counts and the position reached are saved, and the "
+            "next run only reads what was logged since.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default=settings.LOG_FILES['app'],
+                            help='The log file, its backups are read too.')
+        parser.add_argument('--state',
+                            help='JSON file to resume from and save to.')
+
+    def handle(self, **options):
+        state = self.load(options['state'])
+        position = state['position'] and funnel.Position(*state['position'])
+        counts = funnel.Funnel(state['hours'])
+
+        def lines():
+            # remember how far the lines taken went
+            nonlocal position
+            for line, position in funnel.new_lines(options['path'],
+                                                   position):
+                yield line
+
+        counts.update(funnel.events(lines()))
+        if options['state']:
+            self.save(options['state'], {'position': position,
+                                         'hours': counts.as_dict()})
+
+        widths = [16] + [len(column) for column in COLUMNS[1:]]
+        self.stdout.write('  '.join(column.rjust(width) for column, width
+                                    in zip(COLUMNS, widths)))
+        for hour, row, sms_rate, email_rate in counts.rows():
+            values = (hour, row['registered'], row['sms_sent'],
+                      row['sms_failed'], percent(sms_rate),
+                      row['email_sent'], row['email_failed'],
+                      percent(email_rate))
+            self.stdout.write('  '.join(str(value).rjust(width) for
+                                        value, width in zip(values, widths)))
+
+    def load(self, filename):
+        if filename and os.path.exists(filename):
+            with open(filename) as state_file:
+                return json.load(state_file)
+        return {'position': None, 'hours': {}}
+
+    def save(self, filename, state):
+        # never leave a half written state behind
+        with open(filename + '.tmp', 'w') as state_file:
+            json.dump(state, state_file)
+        os.replace(filename + '.tmp', filename)
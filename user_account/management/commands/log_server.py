@@ -0,0 +1,84 @@
+import sys
+import struct
+import socketserver
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from user_account import logqueue
+
+
+class RecordHandler(socketserver.StreamRequestHandler):
+
+    ''' reads the records one web process sends until it disconnects '''
+
+    def handle(self):
+        while True:
+            header = self.rfile.read(4)
+            if len(header) < 4:
+                break
+            length = struct.unpack('>L', header)[0]
+            if length > settings.LOG_SERVER_MAX_RECORD:
+                self.server.warn(
+                    'Dropped a log record of {0} bytes from {1}, more than '
+                    'LOG_SERVER_MAX_RECORD'.format(length,
+                                                   self.client_address[0]))
+                if not self.skip(length):
+                    break
+                continue
+            data = self.rfile.read(length)
+            try:
+                self.server.writer.handle(logqueue.decode(data))
+            except (ValueError, KeyError, AttributeError) as detail:
+                # not JSON, or without a log_file of LOG_FILES
+                self.server.warn('Dropped a bad log record from {0}: '
+                                 '{1!r}'.format(self.client_address[0],
+                                                detail))
+
+    def skip(self, length):
+        """ Read past length bytes, False if the connection ends first """
+        while length:
+            chunk = self.rfile.read(min(length, 65536))
+            if not chunk:
+                return False
+            length -= len(chunk)
+        return True
+
+
+class Server(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def warn(self, message):
+        # not logged: with LOG_SERVER set, that would be sent back here
+        sys.stderr.write(message + '\n')
+
+
+class Command(BaseCommand):
+    help = ("Receives the log records of every web process on this host and "
+            "writes them to the LOG_FILES files, so one process owns the "
+            "files and their rotation. Point the web processes at it with "
+            "LOG_SERVER.")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--address', default=settings.LOG_SERVER or '127.0.0.1:9020',
+            help='host:port to listen on, LOG_SERVER by default.')
+
+    def handle(self, **options):
+        host, port = options['address'].rsplit(':', 1)
+        try:
+            server = Server((host, int(port)), RecordHandler)
+        except OSError as detail:
+            raise CommandError('Cannot listen on {0}: {1}'.format(
+                options['address'], detail))
+        server.writer = logqueue.FileWriter()
+        self.stdout.write('Writing log records received on {0}'.format(
+            options['address']))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            server.writer.close()
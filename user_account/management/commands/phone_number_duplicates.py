@@ -0,0 +1,36 @@
+import collections
+
+from django.core.management.base import BaseCommand
+
+from user_account import phones
+from user_account.models import UserProfile
+
+
+class Command(BaseCommand):
+    help = ("Lists the phone numbers shared by several profiles, comparing "
+            "their E.164 forms so differently written copies of a number "
+            "are caught too.")
+
+    def handle(self, **options):
+        profiles = collections.defaultdict(list)
+        rows = UserProfile.objects.order_by('pk').values_list(
+            'pk', 'phone_number', 'user__username', 'user__is_active',
+            'user__last_login')
+        for row in rows.iterator():
+            phone_number = row[1]
+            profiles[phones.normalize(phone_number) or phone_number].append(
+                row)
+
+        duplicates = collections.OrderedDict(sorted(
+            (number, rows) for number, rows in profiles.items()
+            if len(rows) > 1))
+        for number, rows in duplicates.items():
+            self.stdout.write(number)
+            for pk, stored, username, is_active, last_login in rows:
+                self.stdout.write(
+                    '  profile {0}: {1} stored as {2}, {3}, last login '
+                    '{4}'.format(pk, username, stored,
+                                 'active' if is_active else 'inactive',
+                                 last_login or 'never'))
+        self.stdout.write('{0} duplicate phone number(s)'.format(
+            len(duplicates)))
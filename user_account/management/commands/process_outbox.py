@@ -0,0 +1,54 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from user_account import metrics, outbox
+
+
+class Command(BaseCommand):
+    help = ("Delivers the activation e-mails and verification sms queued "
+            "by the views. Runs until interrupted unless --once is given.")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threads', type=int, default=settings.OUTBOX_WORKER_THREADS,
+            help='Number of concurrent delivery threads.')
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Number of notifications fetched per query.')
+        parser.add_argument(
+            '--interval', type=float, default=settings.OUTBOX_POLL_INTERVAL,
+            help='Seconds to wait between polls of an empty outbox.')
+        parser.add_argument(
+            '--once', action='store_true', default=False,
+            help='Drain the outbox once and exit.')
+
+    def handle(self, **options):
+        executor = None
+        if options['threads'] > 1:
+            executor = ThreadPoolExecutor(options['threads'])
+        try:
+            self.poll(executor, **options)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+    def poll(self, executor, **options):
+        while True:
+            requeued = outbox.requeue_stale()
+            if requeued:
+                self.stderr.write(
+                    'Requeued {0} stale notification(s)'.format(requeued))
+            delivered = outbox.drain(threads=options['threads'],
+                                     batch_size=options['batch_size'],
+                                     executor=executor)
+            if settings.METRICS_MULTIPROCESS_DIR:
+                metrics.flush()
+            if options['verbosity'] > 1 or options['once']:
+                self.stdout.write(
+                    'Delivered {0} notification(s)'.format(delivered))
+            if options['once']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,64 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from user_account.models import UserProfile
+
+
+class Command(BaseCommand):
+    help = ("Deletes the accounts whose activation link expired before "
+            "they were ever activated, a short transaction per batch.")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Accounts deleted per transaction.')
+        parser.add_argument(
+            '--sleep', type=float, default=0.1,
+            help='Seconds to pause between batches.')
+        parser.add_argument(
+            '--dry-run', action='store_true', default=False,
+            help='Only report how many accounts would be deleted.')
+
+    def handle(self, **options):
+        expired = UserProfile.objects.filter(
+            key_expires__lt=timezone.now(),
+            user__is_active=False,
+            user__last_login__isnull=True,
+        )
+        if options['dry_run']:
+            self.stdout.write(
+                '{0} expired registration(s) would be deleted'.format(
+                    expired.count()))
+            return
+
+        User = get_user_model()
+        deleted = 0
+        last_pk = 0
+        while True:
+            # walk the profiles by primary key so every batch is a cheap
+            # range scan and a short transaction
+            with transaction.atomic():
+                batch = list(expired.filter(pk__gt=last_pk).order_by('pk')
+                             .values_list('pk', 'user_id')
+                             [:options['batch_size']])
+                if not batch:
+                    break
+                last_pk = batch[-1][0]
+                user_ids = [user_id for _, user_id in batch]
+                # locked, so the ones counted are the ones deleted: an
+                # account activated since the batch was read is kept
+                user_ids = list(User.objects.select_for_update().filter(
+                    pk__in=user_ids, is_active=False).values_list(
+                        'pk', flat=True))
+                # deleting the users cascades to their profiles
+                User.objects.filter(pk__in=user_ids).delete()
+            deleted += len(user_ids)
+            if options['verbosity'] > 1:
+                self.stdout.write('Deleted {0} so far'.format(deleted))
+            time.sleep(options['sleep'])
+        self.stdout.write(
+            'Deleted {0} expired registration(s)'.format(deleted))
@@ -0,0 +1,67 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from user_account import mailer
+from user_account.models import UserProfile
+
+
+class Command(BaseCommand):
+    help = ("Re-sends the activation e-mail to every profile whose account "
+            "has not been activated yet, in batches over one connection.")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=200,
+            help='Number of e-mails handed to the mail server at once.')
+        parser.add_argument(
+            '--include-expired', action='store_true', default=False,
+            help='Also mail profiles whose activation key has expired, '
+                 'giving them a fresh 48 hours.')
+        parser.add_argument(
+            '--dry-run', action='store_true', default=False,
+            help='Only report how many e-mails would be sent.')
+
+    def handle(self, **options):
+        self.verbosity = options['verbosity']
+        now = timezone.now()
+        profiles = UserProfile.objects.filter(
+            user__is_active=False).select_related('user').order_by('pk')
+        if not options['include_expired']:
+            profiles = profiles.filter(key_expires__gt=now)
+
+        if options['dry_run']:
+            self.stdout.write(
+                '{0} activation e-mail(s) would be sent'.format(
+                    profiles.count()))
+            return
+
+        key_expires = now + datetime.timedelta(2)
+        sent = 0
+        batch = []
+        for profile in profiles.iterator():
+            batch.append(profile)
+            if len(batch) >= options['batch_size']:
+                sent += self.send_batch(batch, now, key_expires)
+                batch = []
+        if batch:
+            sent += self.send_batch(batch, now, key_expires)
+        mailer.close_connection()
+        self.stdout.write('Sent {0} activation e-mail(s)'.format(sent))
+
+    def send_batch(self, profiles, now, key_expires):
+        expired = [profile for profile in profiles
+                   if profile.key_expires <= now]
+        if expired:
+            UserProfile.objects.filter(
+                pk__in=[profile.pk for profile in expired]).update(
+                    key_expires=key_expires)
+            # the activation token signs key_expires
+            for profile in expired:
+                profile.key_expires = key_expires
+        messages = [profile.activation_message() for profile in profiles]
+        sent = mailer.send_messages(messages) or 0
+        if self.verbosity > 1:
+            self.stdout.write('Sent a batch of {0}'.format(sent))
+        return sent
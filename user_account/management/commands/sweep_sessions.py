@@ -0,0 +1,63 @@
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.sessions.backends import db
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = ("Deletes expired sessions a small batch at a time, so the "
+            "session table is never locked for long. Runs until "
+            "interrupted unless --once is given.")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Sessions deleted per transaction.')
+        parser.add_argument(
+            '--sleep', type=float, default=0.1,
+            help='Seconds to pause between batches.')
+        parser.add_argument(
+            '--interval', type=float, default=settings.SESSION_SWEEP_INTERVAL,
+            help='Seconds to wait between sweeps.')
+        parser.add_argument(
+            '--once', action='store_true', default=False,
+            help='Sweep once and exit.')
+
+    def handle(self, **options):
+        engine = import_module(settings.SESSION_ENGINE)
+        while True:
+            if issubclass(engine.SessionStore, db.SessionStore):
+                deleted = self.sweep(options['batch_size'], options['sleep'])
+            else:
+                # cache and cookie sessions expire on their own
+                engine.SessionStore.clear_expired()
+                deleted = 0
+            if options['verbosity'] > 1 or options['once']:
+                self.stdout.write(
+                    'Deleted {0} expired session(s)'.format(deleted))
+            if options['once']:
+                break
+            time.sleep(options['interval'])
+
+    def sweep(self, batch_size, sleep):
+        now = timezone.now()
+        deleted = 0
+        while True:
+            # expire_date is indexed, each batch is a short range scan
+            with transaction.atomic():
+                keys = list(Session.objects.filter(expire_date__lt=now)
+                            .values_list('session_key', flat=True)
+                            [:batch_size])
+                if not keys:
+                    break
+                Session.objects.filter(session_key__in=keys).delete()
+            deleted += len(keys)
+            if len(keys) < batch_size:
+                break
+            time.sleep(sleep)
+        return deleted
@@ -0,0 +1,356 @@
+import os
+import uuid
+import atexit
+import hmac
+import json
+import time
+import bisect
+import logging
+import tempfile
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+from django.template.backends.django import DjangoTemplates
+
+
+logger = logging.getLogger(__name__)
+
+TIME_BUCKETS = (.005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+
+HELP = {
+    'beyonic_request_seconds': 'Wall time spent serving a request.',
+    'beyonic_request_db_queries': 'Database queries run per request.',
+    'beyonic_request_db_seconds': 'Time spent in database queries per '
+                                  'request.',
+    'beyonic_request_template_seconds': 'Time spent rendering templates per '
+                                        'request.',
+    'beyonic_request_outbound_seconds': 'Time spent calling the mail server '
+                                        'and Twilio per request.',
+    'beyonic_outbound_seconds': 'Duration of calls to the mail server and '
+                                'Twilio.',
+    'beyonic_page_cache_seconds': 'Time to answer a request for a page '
+                                  'cached for signed out visitors, by '
+                                  'result.',
+}
+
+_lock = threading.Lock()
+_histograms = {}
+_local = threading.local()
+_last_flush = [0]
+# the file this process writes in multi-process mode, named when first
+# written by it
+_own_file = {'pid': None, 'name': None, 'path': None}
+
+
+class RequestStats(object):
+
+    ''' what the current request has spent its time on so far '''
+
+    def __init__(self):
+        self.start = time.time()
+        self.view = None
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.outbound_time = 0.0
+
+
+def observe(name, labels, value, buckets=TIME_BUCKETS):
+    """ Add value to the histogram name{labels} """
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = {
+                'buckets': list(buckets),
+                'counts': [0] * (len(buckets) + 1),
+                'sum': 0.0,
+            }
+        histogram['counts'][bisect.bisect_left(buckets, value)] += 1
+        histogram['sum'] += value
+
+
+def current():
+    """ The RequestStats of the request being served by this thread """
+    return getattr(_local, 'stats', None)
+
+
+@contextmanager
+def outbound(provider):
+    """ Time a call to an outside provider (smtp, twilio) """
+    start = time.time()
+    try:
+        yield
+    finally:
+        elapsed = time.time() - start
+        observe('beyonic_outbound_seconds', {'provider': provider}, elapsed)
+        stats = current()
+        if stats is not None:
+            stats.outbound_time += elapsed
+
+
+class _TimedCursor(object):
+
+    ''' forwards to the real cursor, adding query time to the request '''
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+
+    def __getattr__(self, attr):
+        return getattr(self.cursor, attr)
+
+    def __iter__(self):
+        return iter(self.cursor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return self.cursor.__exit__(*exc_info)
+
+    def _timed(self, method, *args):
+        start = time.time()
+        try:
+            return method(*args)
+        finally:
+            stats = current()
+            if stats is not None:
+                stats.db_queries += 1
+                stats.db_time += time.time() - start
+
+    def execute(self, sql, params=None):
+        return self._timed(self.cursor.execute, sql, params)
+
+    def executemany(self, sql, param_list):
+        return self._timed(self.cursor.executemany, sql, param_list)
+
+
+def _instrument(connection):
+    if getattr(connection, '_metrics_cursor', False):
+        return
+    make_cursor = connection.cursor
+
+    def cursor():
+        return _TimedCursor(make_cursor())
+    connection.cursor = cursor
+    connection._metrics_cursor = True
+
+
+class TimedTemplate(object):
+
+    ''' wraps a backend template, adding render time to the request '''
+
+    def __init__(self, template):
+        self.template = template
+
+    @property
+    def origin(self):
+        return self.template.origin
+
+    def render(self, context=None, request=None):
+        start = time.time()
+        try:
+            return self.template.render(context, request)
+        finally:
+            stats = current()
+            if stats is not None:
+                stats.template_time += time.time() - start
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+
+    ''' the django template backend, timing every top level render '''
+
+    def from_string(self, template_code):
+        return TimedTemplate(
+            super(InstrumentedDjangoTemplates, self).from_string(
+                template_code))
+
+    def get_template(self, *args, **kwargs):
+        return TimedTemplate(
+            super(InstrumentedDjangoTemplates, self).get_template(
+                *args, **kwargs))
+
+
+class MetricsMiddleware(object):
+
+    '''
+    Records, per view, the wall time of each request and the time it
+    spent in the database, in templates and in outbound calls.
+    Keep it first in MIDDLEWARE_CLASSES after StaticFilesMiddleware, the
+    static files that one serves aren't timed.
+    '''
+
+    def process_request(self, request):
+        _local.stats = RequestStats()
+        for connection in connections.all():
+            _instrument(connection)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        stats = current()
+        if stats is not None:
+            stats.view = '{0}.{1}'.format(view_func.__module__,
+                                          view_func.__name__)
+
+    def process_response(self, request, response):
+        stats = current()
+        _local.stats = None
+        if stats is None or stats.view is None:
+            return response
+        labels = {'view': stats.view}
+        observe('beyonic_request_seconds', labels, time.time() - stats.start)
+        observe('beyonic_request_db_queries', labels, stats.db_queries,
+                COUNT_BUCKETS)
+        observe('beyonic_request_db_seconds', labels, stats.db_time)
+        observe('beyonic_request_template_seconds', labels,
+                stats.template_time)
+        observe('beyonic_request_outbound_seconds', labels,
+                stats.outbound_time)
+        if settings.METRICS_MULTIPROCESS_DIR:
+            flush()
+        return response
+
+
+def snapshot():
+    with _lock:
+        return [{'name': name, 'labels': labels,
+                 'buckets': histogram['buckets'],
+                 'counts': list(histogram['counts']),
+                 'sum': histogram['sum']}
+                for (name, labels), histogram in _histograms.items()]
+
+
+def flush(force=False):
+    """
+    Write this process' histograms to METRICS_MULTIPROCESS_DIR, at most
+    every METRICS_FLUSH_INTERVAL seconds. The file is replaced
+    atomically so a reader never sees it half written.
+    """
+    now = time.time()
+    if not force and now - _last_flush[0] < settings.METRICS_FLUSH_INTERVAL:
+        return
+    _last_flush[0] = now
+    directory = settings.METRICS_MULTIPROCESS_DIR
+    if _own_file['pid'] != os.getpid():
+        # a new worker may get the pid of one that is gone: a name of its
+        # own so it doesn't replace that one's file
+        _own_file['pid'] = os.getpid()
+        _own_file['name'] = 'metrics-{0}-{1}.json'.format(
+            os.getpid(), uuid.uuid4().hex[:12])
+    path = os.path.join(directory, _own_file['name'])
+    try:
+        handle, temp_path = tempfile.mkstemp(dir=directory)
+        with os.fdopen(handle, 'w') as temp_file:
+            json.dump(snapshot(), temp_file)
+        os.rename(temp_path, path)
+        _own_file['path'] = path
+    except (IOError, OSError) as detail:
+        logger.error('Could not write metrics to {0}. {1}'.format(
+            path, detail))
+
+
+@atexit.register
+def remove_own_file():
+    """
+    Delete the file this process wrote, when it exits, so collect()
+    stops adding up the histograms of a worker that is gone
+    """
+    # forked workers inherit the handler, and the parent's state
+    if _own_file['pid'] != os.getpid() or _own_file['path'] is None:
+        return
+    try:
+        os.remove(_own_file['path'])
+    except OSError:
+        pass
+    _own_file['path'] = None
+
+
+def collect():
+    """
+    Histograms of this process or, in multi-process mode, the sum of
+    those written by every process.
+    """
+    directory = settings.METRICS_MULTIPROCESS_DIR
+    if not directory:
+        return snapshot()
+    flush(force=True)
+    merged = {}
+    for filename in os.listdir(directory):
+        if not (filename.startswith('metrics-') and
+                filename.endswith('.json')):
+            continue
+        try:
+            with open(os.path.join(directory, filename)) as metrics_file:
+                histograms = json.load(metrics_file)
+        except (IOError, OSError, ValueError):
+            continue
+        for histogram in histograms:
+            histogram['labels'] = tuple(
+                tuple(label) for label in histogram['labels'])
+            key = (histogram['name'], histogram['labels'])
+            total = merged.get(key)
+            if total is None:
+                merged[key] = histogram
+            else:
+                total['counts'] = [a + b for a, b in zip(
+                    total['counts'], histogram['counts'])]
+                total['sum'] += histogram['sum']
+    return list(merged.values())
+
+
+def _format_labels(labels, **extra):
+    labels = list(labels) + sorted(extra.items())
+    return '{' + ','.join('{0}="{1}"'.format(
+        name, str(value).replace('\\', '\\\\').replace('"', '\\"'))
+        for name, value in labels) + '}'
+
+
+def render_text(histograms):
+    """ Format histograms in the Prometheus text exposition format """
+    lines = []
+    seen = set()
+    for histogram in sorted(histograms,
+                            key=lambda h: (h['name'], h['labels'])):
+        name = histogram['name']
+        if name not in seen:
+            seen.add(name)
+            lines.append('# HELP {0} {1}'.format(name, HELP.get(name, '')))
+            lines.append('# TYPE {0} histogram'.format(name))
+        cumulative = 0
+        bounds = list(histogram['buckets']) + ['+Inf']
+        for bound, count in zip(bounds, histogram['counts']):
+            cumulative += count
+            lines.append('{0}_bucket{1} {2}'.format(
+                name, _format_labels(histogram['labels'], le=bound),
+                cumulative))
+        lines.append('{0}_sum{1} {2}'.format(
+            name, _format_labels(histogram['labels']), histogram['sum']))
+        lines.append('{0}_count{1} {2}'.format(
+            name, _format_labels(histogram['labels']), cumulative))
+    return '\n'.join(lines) + '\n'
+
+
+def allowed(request):
+    """
+    Whether request may read the metrics: with METRICS_TOKEN set, when
+    it carries the token as a bearer token, otherwise when it comes
+    from one of METRICS_ALLOWED_IPS
+    """
+    if settings.METRICS_TOKEN:
+        authorization = request.META.get('HTTP_AUTHORIZATION', '')
+        return hmac.compare_digest(
+            authorization.encode('utf-8'),
+            'Bearer {0}'.format(settings.METRICS_TOKEN).encode('utf-8'))
+    return request.META.get('REMOTE_ADDR') in settings.METRICS_ALLOWED_IPS
+
+
+def metrics(request):
+    """ Prometheus scrape endpoint """
+    if not allowed(request):
+        return HttpResponseForbidden()
+    return HttpResponse(render_text(collect()),
+                        content_type='text/plain; version=0.0.4')
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_account', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboundNotification',
+            fields=[
+                ('id', models.AutoField(primary_key=True, auto_created=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('modified_at', models.DateTimeField(auto_now=True)),
+                ('channel', models.CharField(max_length=10, choices=[('email', 'Activation email'), ('sms', 'Verification sms')])),
+                ('payload', models.CharField(max_length=255, blank=True)),
+                ('status', models.CharField(max_length=10, db_index=True, default='pending', choices=[('pending', 'Pending'), ('sending', 'Sending'), ('sent', 'Sent'), ('failed', 'Failed')])),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('profile', models.ForeignKey(related_name='notifications', to='user_account.UserProfile')),
+            ],
+            options={
+                'db_table': 'outbound_notification',
+                'ordering': ('created',),
+                'verbose_name': 'outbound notification',
+                'verbose_name_plural': 'outbound notifications',
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+import user_account.phones
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_account', '0005_key_expires_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='userprofile',
+            name='phone_number',
+            field=user_account.phones.PhoneNumberField(max_length=128),
+        ),
+    ]
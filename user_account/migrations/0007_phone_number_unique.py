@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+import user_account.phones
+
+
+def check_duplicates(apps, schema_editor):
+    UserProfile = apps.get_model('user_account', 'UserProfile')
+    duplicates = UserProfile.objects.values('phone_number').annotate(
+        profiles=models.Count('id')).filter(profiles__gt=1).count()
+    if duplicates:
+        raise RuntimeError(
+            '{0} phone number(s) belong to more than one profile, list '
+            'them with "manage.py phone_number_duplicates" and resolve '
+            'them before migrating'.format(duplicates))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_account', '0006_cached_phone_number_field'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicates, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='userprofile',
+            name='phone_number',
+            field=user_account.phones.PhoneNumberField(max_length=128,
+                                                       unique=True),
+        ),
+    ]
@@ -1,14 +1,15 @@
 import logging
 
 from django.db import models
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 from django.conf import settings
+from django.contrib.auth.models import User
 from django.utils.translation import ugettext_lazy as _
-from django.core.mail import send_mail
-from django.core.cache import cache
+from django.core.mail import EmailMultiAlternatives
 
-from phonenumber_field.modelfields import PhoneNumberField
-import twilio
-from twilio.rest import TwilioRestClient
+from . import auth, mailer, sms, tokens, verification
+from .phones import PhoneNumberField
 
 
 logger = logging.getLogger(__name__)
@@ -36,9 +37,12 @@ class UserProfile(TimeStampedModel):
         on_delete=models.CASCADE,
         related_name='my_profile'
     )
-    phone_number = PhoneNumberField()
-    activation_key = models.CharField(max_length=40)
-    key_expires = models.DateTimeField()
+    # E.164, one account per number: it keys the sms codes
+    phone_number = PhoneNumberField(unique=True)
+    # legacy activation keys, new links carry a signed token instead
+    activation_key = models.CharField(max_length=40, blank=True,
+                                      db_index=True)
+    key_expires = models.DateTimeField(db_index=True)
 
     def __str__(self):
         profile = []
@@ -47,37 +51,46 @@ class UserProfile(TimeStampedModel):
         profile.append(str(self.phone_number))
         return ' - '.join(profile)
 
+    def queue_sms(self, code):
+        ''' hand the verification code over to the outbox worker '''
+        return OutboundNotification.objects.create(
+            profile=self, channel=OutboundNotification.SMS, payload=str(code))
+
+    def queue_activation_link(self):
+        ''' hand the activation e-mail over to the outbox worker '''
+        return OutboundNotification.objects.create(
+            profile=self, channel=OutboundNotification.EMAIL)
+
     def send_sms(self, code):
         try:
-            account_sid = settings.TWILIO_ACCOUNT_SID
-            auth_token = settings.TWILIO_AUTH_TOKEN
-            twilio_phone_number = settings.CALLER_ID
             phone_number = str(self.phone_number)
-
-            client = TwilioRestClient(account_sid, auth_token)
             body = ('Enter the code: {0} on the'
                     'verification form to verify'
                     ' your phone number').format(code)
-            client.messages.create(body=body,
-                                   to=phone_number,
-                                   from_=twilio_phone_number)
+            sms.send_sms(body, [phone_number], settings.CALLER_ID)
             logger.info(
                 _('verification code sent to {0} ').format(phone_number))
-        except twilio.TwilioRestException as e:
+            return True
+        except Exception as e:
             error_msg = _('An error occured while sending'
                           ' the verification code: {0}').format(e)
             logger.error(error_msg)
+            return False
 
     def verify_code(self, code):
         """ Verify a code is correct """
-        return str(code) == str(cache.get(str(self.phone_number)))
+        return verification.get_store().verify(str(self.phone_number), code)
 
-    def send_activation_link(self):
+    def activation_token(self):
+        return tokens.make_activation_token(self.user_id, self.key_expires)
+
+    def activation_message(self):
+        ''' build the account activation e-mail for this profile '''
         root_url = settings.ROOT_URL
         from_mail = settings.EMAIL_HOST_USER
         email_subject = 'Beyonic Portal account confirmation'
         link = "{0}/user/accounts/confirm/{1}/".format(
-            root_url, self.activation_key)
+            root_url, self.activation_token())
 
         # for content-type = text/html
         html_msg = ''' <html><body><div>Hello {0},
@@ -108,19 +121,111 @@ class UserProfile(TimeStampedModel):
          \n\nThank you'''.format(self.user.get_full_name(),
                                  link, str(self.phone_number))
 
+        message = EmailMultiAlternatives(email_subject,
+                                         email_body,
+                                         from_mail,
+                                         [self.user.email])
+        message.attach_alternative(html_msg, 'text/html')
+        return message
+
+    def send_activation_link(self):
         try:
-            send_mail(email_subject,
-                      email_body,
-                      from_mail,
-                      [self.user.email],
-                      html_message=html_msg,
-                      fail_silently=False)
+            mailer.send_messages([self.activation_message()])
             logger.info(
                 _('email sent successfully to {0}').format(self.user.email))
+            return True
         except Exception as detail:
             logger.error(_('Could not send mail. {0}').format(detail))
+            return False
 
     class Meta:
         db_table = 'userprofile'
         verbose_name = _('user profile')
         verbose_name_plural = _('user profiles')
+
+
+class OutboundNotificationQuerySet(models.QuerySet):
+
+    def pending(self):
+        return self.filter(status=OutboundNotification.PENDING)
+
+
+class OutboundNotification(TimeStampedModel):
+
+    '''
+    An activation e-mail or verification sms waiting to be
+    delivered by the outbox worker (see the process_outbox command)
+    '''
+    EMAIL = 'email'
+    SMS = 'sms'
+    CHANNEL_CHOICES = (
+        (EMAIL, _('Activation email')),
+        (SMS, _('Verification sms')),
+    )
+
+    PENDING = 'pending'
+    SENDING = 'sending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, _('Pending')),
+        (SENDING, _('Sending')),
+        (SENT, _('Sent')),
+        (FAILED, _('Failed')),
+    )
+
+    profile = models.ForeignKey(
+        UserProfile,
+        on_delete=models.CASCADE,
+        related_name='notifications'
+    )
+    channel = models.CharField(max_length=10, choices=CHANNEL_CHOICES)
+    payload = models.CharField(max_length=255, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES,
+                              default=PENDING, db_index=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+
+    objects = OutboundNotificationQuerySet.as_manager()
+
+    def __str__(self):
+        return '{0} to {1} ({2})'.format(
+            self.channel, self.profile_id, self.status)
+
+    def deliver(self):
+        ''' send the notification, returns True when it went through '''
+        if self.channel == self.EMAIL:
+            return self.profile.send_activation_link()
+        return self.profile.send_sms(self.payload)
+
+    class Meta:
+        db_table = 'outbound_notification'
+        ordering = ('created',)
+        verbose_name = _('outbound notification')
+        verbose_name_plural = _('outbound notifications')
+
+
+class VerificationCode(models.Model):
+
+    ''' a pending sms code, used by verification.DatabaseCodeStore '''
+
+    key = models.CharField(max_length=64, unique=True)
+    code = models.CharField(max_length=12)
+    expires = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return self.key
+
+    class Meta:
+        db_table = 'verification_code'
+        verbose_name = _('verification code')
+        verbose_name_plural = _('verification codes')
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    auth.invalidate_user(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=UserProfile)
+def invalidate_cached_profile(sender, instance, **kwargs):
+    auth.invalidate_user(instance.user_id)
@@ -0,0 +1,115 @@
+import logging
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+from django.utils.translation import ugettext_lazy as _
+
+from .models import OutboundNotification
+
+
+logger = logging.getLogger(__name__)
+
+
+def claim(pk):
+    """
+    Move a pending notification to the sending state.
+
+    The conditional UPDATE is what keeps two workers (threads or
+    processes) from delivering the same notification twice.
+    """
+    claimed = OutboundNotification.objects.pending().filter(pk=pk).update(
+        status=OutboundNotification.SENDING, modified_at=timezone.now())
+    return claimed == 1
+
+
+def deliver(pk):
+    """ Claim and deliver a single notification """
+    if not claim(pk):
+        return False
+    notification = OutboundNotification.objects.select_related(
+        'profile__user').get(pk=pk)
+    notification.attempts += 1
+    try:
+        delivered = notification.deliver()
+    except Exception as detail:
+        logger.error(
+            _('Could not deliver notification {0}. {1}').format(
+                notification.pk, detail))
+        delivered = False
+
+    if delivered:
+        notification.status = OutboundNotification.SENT
+        # the verification code is no longer needed once it has been sent
+        notification.payload = ''
+    elif notification.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+        notification.status = OutboundNotification.FAILED
+        logger.error(
+            _('Giving up on notification {0} after {1} attempts').format(
+                notification.pk, notification.attempts))
+    else:
+        notification.status = OutboundNotification.PENDING
+    notification.save(
+        update_fields=['status', 'payload', 'attempts', 'modified_at'])
+    return delivered
+
+
+def _deliver_in_thread(pk):
+    try:
+        return deliver(pk)
+    finally:
+        close_old_connections()
+
+
+def requeue_stale(older_than=None):
+    """
+    Put back notifications left in the sending state by a worker
+    that died mid-delivery.
+    """
+    if older_than is None:
+        older_than = datetime.timedelta(
+            seconds=settings.OUTBOX_STALE_AFTER)
+    return OutboundNotification.objects.filter(
+        status=OutboundNotification.SENDING,
+        modified_at__lt=timezone.now() - older_than,
+    ).update(status=OutboundNotification.PENDING)
+
+
+def drain(threads=None, batch_size=100, executor=None):
+    """
+    Deliver pending notifications until the outbox is empty.
+
+    With more than one thread the deliveries of a batch run
+    concurrently, otherwise they run in the calling thread. Pass a
+    long lived executor to keep the delivery threads, and the mail
+    connections they hold, across calls.
+    Returns the number of notifications delivered.
+    """
+    if threads is None:
+        threads = settings.OUTBOX_WORKER_THREADS
+    delivered = 0
+    last_pk = 0
+    own_executor = executor is None and threads > 1
+    if own_executor:
+        executor = ThreadPoolExecutor(threads)
+    try:
+        while True:
+            # walk forward by primary key so that failed attempts, which go
+            # back to pending, are retried on the next run instead of now
+            batch = list(OutboundNotification.objects.pending()
+                         .filter(pk__gt=last_pk).order_by('pk')
+                         .values_list('pk', flat=True)[:batch_size])
+            if not batch:
+                break
+            last_pk = batch[-1]
+            if executor is None:
+                results = [deliver(pk) for pk in batch]
+            else:
+                results = executor.map(_deliver_in_thread, batch)
+            delivered += sum(1 for result in results if result)
+    finally:
+        if own_executor:
+            executor.shutdown()
+    return delivered
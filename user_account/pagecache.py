@@ -0,0 +1,129 @@
+"""
+Rendered pages for signed out visitors. The pages decorated with
+cache_anonymous are the same for each of them but for the CSRF token,
+so the body is cached once per page, language, day and template
+release, with a placeholder where the token was, and every visitor
+gets their own token put back in when it is served. The responses
+carry an ETag, and a Last-Modified when there is no token in them, a
+returning browser with a copy that is still good gets a 304.
+"""
+import time
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.contrib import messages
+from django.core.cache import caches
+from django.http import HttpResponse, HttpResponseNotModified
+from django.middleware.csrf import get_token
+from django.utils import timezone, translation
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+from . import metrics, templatecache
+from .assets import not_modified
+
+# where the visitor's csrf token goes
+PLACEHOLDER = b'{-csrf-token-}'
+
+
+def make_key(view_name, request):
+    """ The cache key of the page request asks view_name for """
+    # login.html shows today's date
+    today = timezone.localtime(timezone.now()).date() if settings.USE_TZ \
+        else timezone.now().date()
+    return 'pagecache:{0}:{1}:{2}:{3}:{4}'.format(
+        view_name, request.path, translation.get_language(),
+        today.isoformat(), templatecache.release())
+
+
+def cacheable(request):
+    """ Whether the page request gets is the one every visitor gets """
+    return (settings.PAGE_CACHE_TIMEOUT and
+            request.method in ('GET', 'HEAD') and
+            not request.user.is_authenticated() and
+            # messages are shown once, on the page they were added for
+            not len(messages.get_messages(request)))
+
+
+def make_entry(request, response):
+    """ What is cached of response, or None if it can't be """
+    if response.status_code != 200 or response.streaming or \
+            response.cookies or not response['Content-Type'].startswith(
+                'text/html'):
+        return None
+    content = response.content
+    token = request.META.get('CSRF_COOKIE')
+    if token:
+        content = content.replace(token.encode('ascii'), PLACEHOLDER)
+    return {
+        'content': content,
+        'content_type': response['Content-Type'],
+        'etag': hashlib.sha1(content).hexdigest()[:16],
+        'modified': int(time.time()),
+    }
+
+
+def serve(request, entry):
+    """ The response to request from a cached entry """
+    content = entry['content']
+    etag = entry['etag']
+    modified = entry['modified']
+    if PLACEHOLDER in content:
+        # also has the csrf middleware set the cookie of a new token
+        token = get_token(request)
+        content = content.replace(PLACEHOLDER, token.encode('ascii'))
+        # a copy with another token would fail the form's post. Only
+        # the etag tells them apart, so no Last-Modified
+        etag = hashlib.sha1('{0}:{1}'.format(etag, token).encode(
+            'ascii')).hexdigest()[:16]
+        modified = None
+    etag = '"{0}"'.format(etag)
+    if not_modified(request, etag, modified):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(content, content_type=entry['content_type'])
+    response['ETag'] = etag
+    if modified is not None:
+        response['Last-Modified'] = http_date(modified)
+    # each visitor has their own token: browsers only, and revalidated
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ('Cookie',))
+    return response
+
+
+def cache_anonymous(view):
+    """
+    Serve view's pages to signed out visitors from PAGE_CACHE for
+    PAGE_CACHE_TIMEOUT seconds. view mustn't depend on the query string.
+    Timed, per view and result (hit, miss, bypass, not_modified), in
+    beyonic_page_cache_seconds.
+    """
+    view_name = '{0}.{1}'.format(view.__module__, view.__name__)
+
+    @wraps(view)
+    def cached_view(request, *args, **kwargs):
+        start = time.time()
+        if not cacheable(request):
+            response = view(request, *args, **kwargs)
+            result = 'bypass'
+        else:
+            cache = caches[settings.PAGE_CACHE]
+            key = make_key(view_name, request)
+            entry = cache.get(key)
+            result = 'hit'
+            if entry is None:
+                response = view(request, *args, **kwargs)
+                entry = make_entry(request, response)
+                result = 'miss'
+                if entry is not None:
+                    cache.set(key, entry, settings.PAGE_CACHE_TIMEOUT)
+            if entry is not None:
+                response = serve(request, entry)
+                if response.status_code == 304:
+                    result = 'not_modified'
+        metrics.observe('beyonic_page_cache_seconds',
+                        {'view': view_name, 'result': result},
+                        time.time() - start)
+        return response
+    return cached_view
@@ -0,0 +1,121 @@
+"""
+Phone numbers parsed, validated and formatted once per distinct value.
+
+phonenumber_field parses the stored number every time a UserProfile is
+loaded and validates it against the metadata every time it is turned
+into a string. The results only depend on the number, so they are kept
+in bounded LRU caches of PHONE_NUMBER_CACHE_SIZE entries each.
+"""
+from functools import lru_cache
+
+import phonenumbers
+from django.conf import settings
+from django.core import validators
+from phonenumber_field import modelfields, phonenumber
+from phonenumbers.phonenumberutil import NumberParseException
+
+
+_FIELDS = ('country_code', 'national_number', 'extension',
+           'italian_leading_zero', 'number_of_leading_zeros', 'raw_input',
+           'country_code_source', 'preferred_domestic_carrier_code')
+
+
+def _key(number):
+    return tuple(getattr(number, field) for field in _FIELDS)
+
+
+@lru_cache(maxsize=settings.PHONE_NUMBER_CACHE_SIZE)
+def _parse(value, region):
+    try:
+        return _key(phonenumbers.parse(value, region, keep_raw_input=True))
+    except NumberParseException:
+        return None
+
+
+@lru_cache(maxsize=settings.PHONE_NUMBER_CACHE_SIZE)
+def _is_valid(key):
+    return phonenumbers.is_valid_number(
+        phonenumbers.PhoneNumber(**dict(zip(_FIELDS, key))))
+
+
+@lru_cache(maxsize=settings.PHONE_NUMBER_CACHE_SIZE)
+def _format(key, format):
+    number = phonenumbers.PhoneNumber(**dict(zip(_FIELDS, key)))
+    if _is_valid(key):
+        return phonenumbers.format_number(number, format)
+    return number.raw_input
+
+
+def default_region():
+    return getattr(settings, 'PHONENUMBER_DEFAULT_REGION', None)
+
+
+class PhoneNumber(phonenumber.PhoneNumber):
+
+    ''' phonenumber_field's PhoneNumber, validating and formatting once '''
+
+    def is_valid(self):
+        return _is_valid(_key(self))
+
+    def format_as(self, format):
+        return _format(_key(self), format)
+
+
+def to_python(value):
+    """ phonenumber_field's to_python, parsing each string once """
+    if value in validators.EMPTY_VALUES:
+        return None
+    if isinstance(value, PhoneNumber):
+        return value
+    if isinstance(value, str):
+        key = _parse(value, default_region())
+        if key is None:
+            # not a phone number, kept as typed like phonenumber_field does
+            return PhoneNumber(raw_input=value)
+        return PhoneNumber(**dict(zip(_FIELDS, key)))
+    if isinstance(value, phonenumbers.PhoneNumber):
+        number = PhoneNumber()
+        number.merge_from(value)
+        return number
+    return None
+
+
+def normalize(value, region=None):
+    """ The E.164 form of value, None when it is not a valid number """
+    key = _parse(value, region or default_region())
+    if key is None or not _is_valid(key):
+        return None
+    return _format(key, phonenumbers.PhoneNumberFormat.E164)
+
+
+def normalize_many(values, region=None):
+    """
+    Normalize a list of numbers in one call, e.g. for imports. Returns
+    the E.164 forms in the same order, None for the invalid ones.
+    """
+    region = region or default_region()
+    return [normalize(value, region) for value in values]
+
+
+def cache_info():
+    return {'parse': _parse.cache_info(), 'is_valid': _is_valid.cache_info(),
+            'format': _format.cache_info()}
+
+
+class PhoneNumberDescriptor(modelfields.PhoneNumberDescriptor):
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.field.name] = to_python(value)
+
+
+class PhoneNumberField(modelfields.PhoneNumberField):
+
+    ''' phonenumber_field's model field, going through the caches above '''
+
+    attr_class = PhoneNumber
+    descriptor_class = PhoneNumberDescriptor
+
+    def get_prep_value(self, value):
+        if value is None or value == '':
+            return super(PhoneNumberField, self).get_prep_value(value)
+        return to_python(value).as_e164
@@ -0,0 +1,93 @@
+"""
+Database session engine that coalesces writes. Select it with
+SESSION_ENGINE = 'user_account.sessions'.
+
+Compared to django.contrib.sessions.backends.db it
+  * never writes an empty session, a new session is INSERTed with its
+    data the first time it is saved,
+  * only deletes the old row on login when there is one,
+  * skips saving a session whose data has not changed and whose expiry
+    would move by less than SESSION_SAVE_INTERVAL seconds.
+"""
+import datetime
+
+from django.conf import settings
+from django.contrib.sessions.backends import db
+from django.contrib.sessions.backends.base import CreateError
+from django.contrib.sessions.models import Session
+from django.db import IntegrityError, router, transaction
+from django.utils import timezone
+
+
+class SessionStore(db.SessionStore):
+
+    def __init__(self, session_key=None):
+        super(SessionStore, self).__init__(session_key)
+        # (encoded data, expire_date) as last read from or written to the
+        # database. The encoded form, so changes made in place to nested
+        # values still count as changes.
+        self._stored = None
+
+    def load(self):
+        try:
+            session = Session.objects.get(session_key=self.session_key,
+                                          expire_date__gt=timezone.now())
+        except Session.DoesNotExist:
+            # a new key is only made up if something is saved
+            self._session_key = None
+            return {}
+        data = self.decode(session.session_data)
+        self._stored = (self.encode(data), session.expire_date)
+        return data
+
+    def create(self):
+        self._session_key = None
+        self._session_cache = {}
+        self._stored = None
+        self.modified = True
+
+    def cycle_key(self):
+        data = self._get_session()
+        key, stored = self.session_key, self._stored
+        self.create()
+        self._session_cache = data
+        if stored is not None:
+            self.delete(key)
+
+    def _is_unchanged(self, session_data, expire_date):
+        if self._stored is None:
+            return False
+        stored_data, stored_expiry = self._stored
+        interval = datetime.timedelta(seconds=settings.SESSION_SAVE_INTERVAL)
+        return session_data == stored_data and \
+            expire_date - stored_expiry < interval
+
+    def save(self, must_create=False):
+        session_data = self.encode(self._get_session(no_load=must_create))
+        expire_date = self.get_expiry_date()
+        if not must_create and self._is_unchanged(session_data, expire_date):
+            return
+        insert = must_create or self._stored is None
+        using = router.db_for_write(Session)
+        while True:
+            session = Session(session_key=self._get_or_create_session_key(),
+                              session_data=session_data,
+                              expire_date=expire_date)
+            try:
+                with transaction.atomic(using=using):
+                    session.save(force_insert=insert, using=using)
+            except IntegrityError:
+                if must_create:
+                    raise CreateError
+                if not insert:
+                    raise
+                # somebody else got this key first, pick another one
+                self._session_key = None
+                continue
+            break
+        self._stored = (session_data, expire_date)
+
+    def delete(self, session_key=None):
+        super(SessionStore, self).delete(session_key)
+        if session_key is None or session_key == self.session_key:
+            self._stored = None
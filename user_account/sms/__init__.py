@@ -0,0 +1,45 @@
+"""
+Tools for sending sms, modelled on django.core.mail: the backend named
+by SMS_BACKEND does the sending and callers can hand it many messages
+at once through send_messages().
+"""
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class SMSMessage(object):
+
+    ''' a text message to one or more phone numbers '''
+
+    def __init__(self, body, to, from_=None):
+        self.body = body
+        self.to = list(to)
+        self.from_ = from_ or settings.CALLER_ID
+
+    def __repr__(self):
+        return '<SMSMessage to {0}>'.format(', '.join(self.to))
+
+
+def get_connection(backend=None, fail_silently=False, **kwargs):
+    """
+    Load an sms backend and return an instance of it, settings.SMS_BACKEND
+    unless backend is given.
+    """
+    klass = import_string(backend or settings.SMS_BACKEND)
+    return klass(fail_silently=fail_silently, **kwargs)
+
+
+def send_sms(body, to, from_=None, fail_silently=False, connection=None):
+    """ Send one message to the phone numbers in to """
+    connection = connection or get_connection(fail_silently=fail_silently)
+    return connection.send_messages([SMSMessage(body, to, from_)])
+
+
+def send_mass_sms(datatuple, fail_silently=False, connection=None):
+    """
+    Send each (body, to, from_) of datatuple over one connection,
+    returns the number of messages sent.
+    """
+    connection = connection or get_connection(fail_silently=fail_silently)
+    return connection.send_messages(
+        [SMSMessage(body, to, from_) for body, to, from_ in datatuple])
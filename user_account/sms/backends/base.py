@@ -0,0 +1,28 @@
+class BaseSMSBackend(object):
+
+    '''
+    Base class for sms backends, subclasses must at least override
+    send_messages(). Like the e-mail backends, they can be used as a
+    context manager to open() and close() a connection.
+    '''
+
+    def __init__(self, fail_silently=False, **kwargs):
+        self.fail_silently = fail_silently
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def send_messages(self, messages):
+        """ Send a list of SMSMessage, returns how many were sent """
+        raise NotImplementedError(
+            'subclasses of BaseSMSBackend must override send_messages()')
@@ -0,0 +1,54 @@
+"""
+Sms backend that hands messages to SMS_BATCH_BACKEND in chunks of
+SMS_BATCH_SIZE, at most SMS_BATCH_CONCURRENCY chunks at a time.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+from ... import sms
+from .base import BaseSMSBackend
+
+
+class SMSBackend(BaseSMSBackend):
+
+    def __init__(self, batch_backend=None, batch_size=None, concurrency=None,
+                 **kwargs):
+        super(SMSBackend, self).__init__(**kwargs)
+        self.batch_backend = batch_backend or settings.SMS_BATCH_BACKEND
+        self.batch_size = batch_size or settings.SMS_BATCH_SIZE
+        self.concurrency = concurrency or settings.SMS_BATCH_CONCURRENCY
+        self.pending = []
+        self._lock = threading.Lock()
+
+    def _send_chunk(self, chunk):
+        connection = sms.get_connection(self.batch_backend,
+                                        fail_silently=self.fail_silently)
+        with connection:
+            return connection.send_messages(chunk) or 0
+
+    def send_messages(self, messages):
+        chunks = [messages[i:i + self.batch_size]
+                  for i in range(0, len(messages), self.batch_size)]
+        if len(chunks) <= 1:
+            return sum(self._send_chunk(chunk) for chunk in chunks)
+        workers = min(self.concurrency, len(chunks))
+        with ThreadPoolExecutor(workers) as executor:
+            return sum(executor.map(self._send_chunk, chunks))
+
+    def add(self, message):
+        """ Coalesce a message, sent with the others on flush() """
+        with self._lock:
+            self.pending.append(message)
+            full = len(self.pending) >= self.batch_size * self.concurrency
+        if full:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            messages, self.pending = self.pending, []
+        return self.send_messages(messages) if messages else 0
+
+    def close(self):
+        self.flush()
@@ -0,0 +1,29 @@
+"""Sms backend that writes messages to the console instead of sending."""
+import sys
+import threading
+
+from .base import BaseSMSBackend
+
+
+class SMSBackend(BaseSMSBackend):
+
+    def __init__(self, *args, **kwargs):
+        self.stream = kwargs.pop('stream', sys.stdout)
+        self._lock = threading.RLock()
+        super(SMSBackend, self).__init__(*args, **kwargs)
+
+    def write_message(self, message):
+        self.stream.write('From: {0}\nTo: {1}\n\n{2}\n{3}\n'.format(
+            message.from_, ', '.join(message.to), message.body, '-' * 79))
+
+    def send_messages(self, messages):
+        if not messages:
+            return 0
+        with self._lock:
+            stream_created = self.open()
+            for message in messages:
+                self.write_message(message)
+            self.stream.flush()
+            if stream_created:
+                self.close()
+        return len(messages)
@@ -0,0 +1,47 @@
+"""Sms backend that appends messages to a file in SMS_FILE_PATH."""
+import os
+import datetime
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from .console import SMSBackend as ConsoleSMSBackend
+
+
+class SMSBackend(ConsoleSMSBackend):
+
+    def __init__(self, *args, **kwargs):
+        self._fname = None
+        self.file_path = kwargs.pop('file_path', settings.SMS_FILE_PATH)
+        if not self.file_path:
+            raise ImproperlyConfigured('SMS_FILE_PATH is not set')
+        self.file_path = os.path.abspath(self.file_path)
+        if not os.path.isdir(self.file_path):
+            try:
+                os.makedirs(self.file_path)
+            except OSError as err:
+                raise ImproperlyConfigured(
+                    'Could not create directory for saving sms: {0} '
+                    '({1})'.format(self.file_path, err))
+        kwargs['stream'] = None
+        super(SMSBackend, self).__init__(*args, **kwargs)
+
+    def _get_filename(self):
+        if self._fname is None:
+            timestamp = datetime.datetime.now().strftime('%Y%m%d-%H%M%S')
+            self._fname = os.path.join(self.file_path, '{0}-{1}.log'.format(
+                timestamp, abs(id(self))))
+        return self._fname
+
+    def open(self):
+        if self.stream is None:
+            self.stream = open(self._get_filename(), 'a')
+            return True
+        return False
+
+    def close(self):
+        try:
+            if self.stream is not None:
+                self.stream.close()
+        finally:
+            self.stream = None
@@ -0,0 +1,18 @@
+"""
+Sms backend that keeps messages in memory, in user_account.sms.outbox,
+for the tests.
+"""
+from ... import sms
+from .base import BaseSMSBackend
+
+
+class SMSBackend(BaseSMSBackend):
+
+    def __init__(self, *args, **kwargs):
+        super(SMSBackend, self).__init__(*args, **kwargs)
+        if not hasattr(sms, 'outbox'):
+            sms.outbox = []
+
+    def send_messages(self, messages):
+        sms.outbox.extend(messages)
+        return len(messages)
@@ -0,0 +1,31 @@
+"""Sms backend that sends through the Twilio REST API."""
+import logging
+
+from ... import twilio_client
+from .base import BaseSMSBackend
+
+
+logger = logging.getLogger(__name__)
+
+
+class SMSBackend(BaseSMSBackend):
+
+    def __init__(self, account_sid=None, auth_token=None, **kwargs):
+        super(SMSBackend, self).__init__(**kwargs)
+        self.client = twilio_client.get_client(account_sid, auth_token)
+
+    def send_messages(self, messages):
+        sent = 0
+        for message in messages:
+            try:
+                for to in message.to:
+                    self.client.send_message(body=message.body, to=to,
+                                             from_=message.from_)
+            except Exception as detail:
+                if not self.fail_silently:
+                    raise
+                logger.error('Could not send {0}. {1}'.format(
+                    message, detail))
+                continue
+            sent += 1
+        return sent
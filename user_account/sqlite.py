@@ -0,0 +1,39 @@
+"""
+Tunes every new sqlite connection for concurrent writers, following
+the SQLITE_* settings.
+"""
+import logging
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+logger = logging.getLogger(__name__)
+
+
+def pragmas():
+    """ The PRAGMA statements the SQLITE_* settings ask for """
+    statements = []
+    if settings.SQLITE_JOURNAL_MODE:
+        statements.append(
+            'PRAGMA journal_mode={0}'.format(settings.SQLITE_JOURNAL_MODE))
+    if settings.SQLITE_SYNCHRONOUS:
+        statements.append(
+            'PRAGMA synchronous={0}'.format(settings.SQLITE_SYNCHRONOUS))
+    if settings.SQLITE_BUSY_TIMEOUT is not None:
+        statements.append('PRAGMA busy_timeout={0:d}'.format(
+            int(settings.SQLITE_BUSY_TIMEOUT * 1000)))
+    return statements
+
+
+@receiver(connection_created)
+def configure_connection(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    statements = pragmas()
+    for statement in statements:
+        # straight on the sqlite3 connection, these are not app queries
+        connection.connection.execute(statement)
+    logger.debug('sqlite connection configured: {0}'.format(
+        '; '.join(statements)))
@@ -0,0 +1,73 @@
+"""
+Keys for the template_fragments cache the {% cache %} tags of base.html
+use. Every key carries a digest of the template sources and of the
+static files manifest, so a deploy that changes a template, or a static
+file and with it the hashed url {% static %} gives it, starts from
+fresh fragments even when the cache is shared by several hosts or
+outlives the workers.
+"""
+import os
+import hashlib
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.template import engines
+from django.template.utils import get_app_template_dirs
+
+
+def template_files():
+    """ Every template file of the configured engines, sorted """
+    directories = list(get_app_template_dirs('templates'))
+    for engine in engines.all():
+        directories.extend(getattr(engine, 'dirs', ()))
+    for directory in sorted(set(directories)):
+        for root, _, filenames in os.walk(directory):
+            for filename in sorted(filenames):
+                path = os.path.join(root, filename)
+                yield os.path.relpath(path, directory), path
+
+
+def _digest():
+    digest = hashlib.sha1()
+    for name, path in template_files():
+        digest.update(name.encode('utf-8'))
+        with open(path, 'rb') as template:
+            digest.update(template.read())
+    # the hashed names collectstatic gave the static files
+    manifest_name = getattr(staticfiles_storage, 'manifest_name', None)
+    if manifest_name and staticfiles_storage.exists(manifest_name):
+        with staticfiles_storage.open(manifest_name) as manifest:
+            digest.update(manifest.read())
+    return digest.hexdigest()[:12]
+
+
+@lru_cache(maxsize=1)
+def _release():
+    return _digest()
+
+
+def release():
+    """
+    The digest of the templates and static manifest: read once per
+    process, on every call with DEBUG so edited templates are picked up
+    by runserver
+    """
+    if settings.DEBUG:
+        return _digest()
+    return _release()
+
+
+def make_key(key, key_prefix, version):
+    """ The KEY_FUNCTION of the template_fragments cache """
+    return ':'.join([key_prefix, release(), str(version), key])
+
+
+def reset():
+    """ Forget the compiled templates and the digest of this process """
+    _release.cache_clear()
+    for engine in engines.all():
+        for loader in getattr(getattr(engine, 'engine', None),
+                              'template_loaders', ()):
+            if hasattr(loader, 'reset'):
+                loader.reset()
@@ -1,4 +1,26 @@
 from user_account.tests.unit.test_models import *
 from user_account.tests.unit.test_forms import *
 from user_account.tests.unit.test_views import *
+from user_account.tests.unit.test_outbox import *
+from user_account.tests.unit.test_mailer import *
+from user_account.tests.unit.test_twilio_client import *
+from user_account.tests.unit.test_verification import *
+from user_account.tests.unit.test_purge import *
+from user_account.tests.unit.test_metrics import *
+from user_account.tests.unit.test_loadtest import *
+from user_account.tests.unit.test_sms import *
+from user_account.tests.unit.test_auth import *
+from user_account.tests.unit.test_sessions import *
+from user_account.tests.unit.test_sqlite import *
+from user_account.tests.unit.test_accounts import *
+from user_account.tests.unit.test_usernames import *
+from user_account.tests.unit.test_phones import *
+from user_account.tests.unit.test_phone_login import *
+from user_account.tests.unit.test_logqueue import *
+from user_account.tests.unit.test_funnel import *
+from user_account.tests.unit.test_coldstart import *
+from user_account.tests.unit.test_warmup import *
+from user_account.tests.unit.test_templatecache import *
+from user_account.tests.unit.test_assets import *
+from user_account.tests.unit.test_pagecache import *
 from user_account.tests.functional.functional_tests import *
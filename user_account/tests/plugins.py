@@ -0,0 +1,16 @@
+from django_nose.plugin import AlwaysOnPlugin
+
+from user_account import sms
+
+
+class ResetSMSOutbox(AlwaysOnPlugin):
+
+    '''
+    empties user_account.sms.outbox before every test, as Django does
+    mail.outbox, so no test sees the messages of another
+    '''
+
+    name = 'reset-sms-outbox'
+
+    def beforeTest(self, test):
+        sms.outbox = []
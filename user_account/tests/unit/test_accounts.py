@@ -0,0 +1,69 @@
+from unittest import mock
+
+from django.test import TestCase, Client, override_settings
+from django.contrib.auth.models import User
+from django.core.urlresolvers import reverse
+from django.db import DatabaseError
+
+from user_account import accounts, verification
+from user_account.models import OutboundNotification, UserProfile
+from ..testing_utilities import set_up_form_values
+
+
+class RegisterTests(TestCase):
+
+    ''' Tests for accounts.register '''
+
+    def register(self):
+        return accounts.register('newuser', 'new@gmail.com', 'secret123',
+                                 'first', 'last', '+254720230439')
+
+    def test_register_creates_inactive_account(self):
+        ''' Test the user, profile, code and notifications are created '''
+        profile = self.register()
+        user = User.objects.get(username='newuser')
+        self.assertEqual(profile.user_id, user.pk)
+        self.assertFalse(user.is_active)
+        self.assertEqual(user.get_full_name(), 'FIRST LAST')
+        self.assertTrue(user.check_password('secret123'))
+        sms = OutboundNotification.objects.get(
+            profile=profile, channel=OutboundNotification.SMS)
+        self.assertTrue(verification.get_store().verify('+254720230439',
+                                                        sms.payload))
+        self.assertTrue(OutboundNotification.objects.filter(
+            profile=profile, channel=OutboundNotification.EMAIL).exists())
+
+    def test_email_domain_is_lowercased(self):
+        ''' Test the address is normalized as create_user does '''
+        user = accounts.build_user('newuser', 'New@GMail.COM', 'secret123',
+                                   'first', 'last')
+        self.assertEqual(user.email, 'New@gmail.com')
+
+    @override_settings(
+        VERIFICATION_CODE_STORE='user_account.verification.CacheCodeStore')
+    def test_registration_query_budget(self):
+        ''' Test an account is saved with three inserts '''
+        user = accounts.build_user('newuser', 'new@gmail.com', 'secret123',
+                                   'first', 'last')
+        # the savepoint, user, profile, both notifications and the release
+        with self.assertNumQueries(5):
+            accounts.save_registration(user, '+254720230439')
+
+    def test_failed_registration_leaves_nothing_behind(self):
+        ''' Test a failing insert rolls the whole account back '''
+        with mock.patch.object(OutboundNotification.objects, 'bulk_create',
+                               side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                self.register()
+        self.assertFalse(User.objects.filter(username='newuser').exists())
+        self.assertEqual(UserProfile.objects.count(), 0)
+
+    def test_registration_view_uses_register(self):
+        ''' Test a valid registration form creates the account '''
+        entries = set_up_form_values()
+        entries['password2'] = entries['password1'] = 'secret123'
+        response = Client().post(reverse('registration'), entries)
+        user = User.objects.get(username=entries['username'])
+        self.assertRedirects(response, reverse('success',
+                                               kwargs={'pk': user.pk}))
+        self.assertEqual(str(user.my_profile.phone_number), '+254720230439')
@@ -0,0 +1,227 @@
+import os
+import gzip
+import json
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.exceptions import ImproperlyConfigured, MiddlewareNotUsed
+from django.core.management import call_command
+from django.test import TestCase, Client, RequestFactory, override_settings
+from django.utils.http import http_date
+
+from user_account import assets
+
+STORAGE = 'user_account.assets.CompressedManifestStorage'
+FONT = 'bootstrap/fonts/glyphicons-halflings-regular.woff'
+
+
+class MinifyTests(TestCase):
+
+    ''' Tests for the css and js minifiers '''
+
+    def test_minify_css(self):
+        ''' Test comments and spacing go, licences stay '''
+        css = ('/*! licence */\n/* a comment */\n'
+               '.a > .b,\n.c {\n    color: red;\n    margin: 0 auto;\n}\n')
+        self.assertEqual(assets.minify_css(css),
+                         '/*! licence */.a>.b,.c{color:red;margin:0 auto}')
+
+    def test_minify_js(self):
+        ''' Test lines are stripped but kept apart '''
+        js = ('// a comment\nfunction f(a){\n\n    return a\n}\n'
+              '    var b = "http://example.com" // trailing\n')
+        self.assertEqual(assets.minify_js(js),
+                         'function f(a){\nreturn a\n}\n'
+                         'var b = "http://example.com" // trailing')
+
+    def test_rebase_urls(self):
+        ''' Test relative urls point at the same files from the bundle '''
+        css = ('a{background:url(../fonts/a.woff?v=1)}'
+               "b{background:url('img/b.png')}"
+               'c{background:url(data:image/png;base64,AA==)}'
+               'd{background:url(/static/d.png)}')
+        self.assertEqual(
+            assets.rebase_urls(css, 'font-awesome/css/fa.css', 'css/site.css'),
+            'a{background:url(../font-awesome/fonts/a.woff?v=1)}'
+            "b{background:url('../font-awesome/css/img/b.png')}"
+            'c{background:url(data:image/png;base64,AA==)}'
+            'd{background:url(/static/d.png)}')
+
+
+class BundleTests(TestCase):
+
+    ''' Tests for the bundles of STATIC_BUNDLES '''
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.settings = override_settings(STATIC_BUNDLE_ROOT=self.root)
+        self.settings.enable()
+
+    def tearDown(self):
+        self.settings.disable()
+        shutil.rmtree(self.root)
+
+    def test_site_bundles(self):
+        ''' Test the bundles are found, with every source in order '''
+        with open(finders.find('css/site.css'), encoding='utf-8') as bundle:
+            css = bundle.read()
+        self.assertTrue(css.startswith('/*!\n * Bootstrap'))
+        self.assertIn('../bootstrap/fonts/glyphicons-halflings-regular',
+                      css)
+        self.assertIn('../font-awesome/fonts/fontawesome-webfont', css)
+        self.assertIn('.errorlist li{float:right;color:red}', css)
+        with open(finders.find('js/site.js'), encoding='utf-8') as bundle:
+            js = bundle.read()
+        self.assertLess(js.index('jQuery v1.11.3'), js.index('Bootstrap'))
+        self.assertLess(js.index('Bootstrap'), js.index('autoCloseAlert'))
+
+    def test_unchanged_bundle_is_not_rewritten(self):
+        ''' Test the modification time is kept while the sources are '''
+        path = finders.find('js/site.js')
+        os.utime(path, (0, 0))
+        finders.find('js/site.js')
+        self.assertEqual(os.stat(path).st_mtime, 0)
+
+    def test_missing_source(self):
+        ''' Test a bundle of a file that doesn't exist is an error '''
+        with override_settings(STATIC_BUNDLES={'js/x.js': ('js/none.js',)}):
+            with self.assertRaises(ImproperlyConfigured):
+                finders.find('js/x.js')
+
+
+class CollectStaticTests(TestCase):
+
+    ''' Tests for collectstatic with CompressedManifestStorage '''
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.settings = override_settings(
+            STATIC_ROOT=os.path.join(self.root, 'served'),
+            STATIC_BUNDLE_ROOT=os.path.join(self.root, 'bundles'),
+            STATICFILES_STORAGE=STORAGE)
+        self.settings.enable()
+        call_command('collectstatic', interactive=False, verbosity=0)
+        self.served = settings.STATIC_ROOT
+        with open(os.path.join(self.served, 'staticfiles.json')) as manifest:
+            self.paths = json.load(manifest)['paths']
+
+    def tearDown(self):
+        self.settings.disable()
+        shutil.rmtree(self.root)
+
+    def test_hashed_names(self):
+        ''' Test the bundles get hashed names, with hashed font urls '''
+        hashed = self.paths['css/site.css']
+        self.assertRegex(hashed, r'^css/site\.[0-9a-f]{12}\.css$')
+        with open(os.path.join(self.served, hashed), encoding='utf-8') as css:
+            content = css.read()
+        self.assertIn('../' + self.paths[FONT], content)
+
+    def test_compressed_siblings(self):
+        ''' Test text files get a .gz of the same content, fonts don't '''
+        path = os.path.join(self.served, self.paths['js/site.js'])
+        with open(path, 'rb') as original, gzip.open(path + '.gz') as gz:
+            self.assertEqual(gz.read(), original.read())
+        self.assertTrue(os.path.exists(
+            os.path.join(self.served, 'js/site.js.gz')))
+        self.assertFalse(os.path.exists(os.path.join(
+            self.served, FONT + '.gz')))
+
+
+class StaticFilesMiddlewareTests(TestCase):
+
+    ''' Tests for serving STATIC_ROOT from the workers '''
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.write('css/site.0123456789ab.css', b'a{color:red}' * 100)
+        self.write('css/site.css', b'a{color:red}' * 100)
+        assets.compress(os.path.join(self.root, 'css/site.0123456789ab.css'))
+        self.write('staticfiles.json', json.dumps(
+            {'paths': {'css/site.css': 'css/site.0123456789ab.css'}}).encode())
+        self.settings = override_settings(STATIC_ROOT=self.root,
+                                          SERVE_STATIC=True)
+        self.settings.enable()
+        self.middleware = assets.StaticFilesMiddleware()
+        self.factory = RequestFactory()
+
+    def tearDown(self):
+        self.settings.disable()
+        shutil.rmtree(self.root)
+
+    def write(self, name, content):
+        path = os.path.join(self.root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as static_file:
+            static_file.write(content)
+
+    def get(self, path, **headers):
+        return self.middleware.process_request(
+            self.factory.get(path, **headers))
+
+    def test_not_used_by_default(self):
+        ''' Test the middleware is off without SERVE_STATIC '''
+        with override_settings(SERVE_STATIC=False):
+            with self.assertRaises(MiddlewareNotUsed):
+                assets.StaticFilesMiddleware()
+
+    def test_gzip_for_clients_that_accept_it(self):
+        ''' Test the .gz is sent with its encoding and immutable caching '''
+        response = self.get('/static/css/site.0123456789ab.css',
+                            HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertIn('immutable', response['Cache-Control'])
+        body = b''.join(response.streaming_content)
+        self.assertEqual(int(response['Content-Length']), len(body))
+        self.assertEqual(gzip.decompress(body), b'a{color:red}' * 100)
+
+    def test_identity_otherwise(self):
+        ''' Test gzip;q=0 or no header gets the file itself '''
+        for accept in ('gzip;q=0', ''):
+            response = self.get('/static/css/site.0123456789ab.css',
+                                HTTP_ACCEPT_ENCODING=accept)
+            self.assertFalse(response.has_header('Content-Encoding'))
+            self.assertEqual(b''.join(response.streaming_content),
+                             b'a{color:red}' * 100)
+
+    def test_unhashed_names_are_not_immutable(self):
+        ''' Test a name that can change content is cached STATIC_MAX_AGE '''
+        response = self.get('/static/css/site.css')
+        self.assertEqual(response['Cache-Control'], 'public, max-age={0}'
+                         .format(settings.STATIC_MAX_AGE))
+
+    def test_not_modified(self):
+        ''' Test revalidation by ETag and by date gets a 304 '''
+        response = self.get('/static/css/site.0123456789ab.css',
+                            HTTP_ACCEPT_ENCODING='gzip')
+        etag = response['ETag']
+        self.assertTrue(etag.endswith('-gzip"'))
+        response = self.get('/static/css/site.0123456789ab.css',
+                            HTTP_ACCEPT_ENCODING='gzip',
+                            HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        # the plain file has another tag
+        response = self.get('/static/css/site.0123456789ab.css',
+                            HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        response = self.get('/static/css/site.css',
+                            HTTP_IF_MODIFIED_SINCE=http_date())
+        self.assertEqual(response.status_code, 304)
+
+    def test_other_requests_pass_through(self):
+        ''' Test unknown files, other paths and POSTs reach the views '''
+        self.assertIsNone(self.get('/static/css/none.css'))
+        self.assertIsNone(self.get('/user/login/'))
+        self.assertIsNone(self.middleware.process_request(
+            self.factory.post('/static/css/site.css')))
+
+    def test_served_before_the_views(self):
+        ''' Test the middleware answers a request through the stack '''
+        response = Client().get('/static/css/site.css')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content),
+                         b'a{color:red}' * 100)
@@ -0,0 +1,81 @@
+from django.test import TestCase, Client, override_settings
+from django.core.cache import caches
+from django.core.urlresolvers import reverse
+from django.contrib.auth.models import User
+
+from user_account.auth import ProfileBackend
+from ..testing_utilities import populate_test_db, delete_test_data, \
+    login_client_user
+
+
+class ProfileBackendTests(TestCase):
+
+    ''' Tests for the ProfileBackend '''
+
+    def setUp(self):
+        populate_test_db()
+        self.user = User.objects.get(username='test098$')
+
+    def test_get_user_loads_profile_in_one_query(self):
+        ''' Test the user, its profile and their str come from one query '''
+        with self.assertNumQueries(1):
+            user = ProfileBackend().get_user(self.user.pk)
+            self.assertEqual(str(user.my_profile.phone_number), '+2541234567')
+            str(user.my_profile)
+
+    def test_get_user_unknown_pk(self):
+        ''' Test get_user returns None for a missing user '''
+        self.assertIsNone(ProfileBackend().get_user(0))
+
+    def tearDown(self):
+        delete_test_data()
+
+
+class ProfileAuthenticationMiddlewareTests(TestCase):
+
+    ''' Tests for request.user set by ProfileAuthenticationMiddleware '''
+
+    def setUp(self):
+        caches['default'].clear()
+        populate_test_db()
+        self.client = Client()
+        self.home_url = reverse('home')
+        login_client_user(self)
+
+    def test_home_loads_user_and_profile_together(self):
+        ''' Test home needs one query for the session and one for the user '''
+        with self.assertNumQueries(2):
+            response = self.client.get(self.home_url)
+        self.assertContains(response, 'Fstname')
+
+    @override_settings(AUTH_USER_CACHE_TIMEOUT=30)
+    def test_cached_user_skips_the_user_query(self):
+        ''' Test a cached user is served without querying the database '''
+        self.client.get(self.home_url)
+        with self.assertNumQueries(1):
+            response = self.client.get(self.home_url)
+        self.assertContains(response, 'Fstname')
+
+    @override_settings(AUTH_USER_CACHE_TIMEOUT=30)
+    def test_saving_the_user_invalidates_the_cache(self):
+        ''' Test a saved user is loaded again on the next request '''
+        self.client.get(self.home_url)
+        user = User.objects.get(username='test098$')
+        user.first_name = 'changed'
+        user.save()
+        with self.assertNumQueries(2):
+            response = self.client.get(self.home_url)
+        self.assertContains(response, 'Changed')
+
+    @override_settings(AUTH_USER_CACHE_TIMEOUT=30)
+    def test_saving_the_profile_invalidates_the_cache(self):
+        ''' Test a saved profile is loaded again on the next request '''
+        self.client.get(self.home_url)
+        profile = User.objects.get(username='test098$').my_profile
+        profile.phone_number = '+2547654321'
+        profile.save()
+        with self.assertNumQueries(2):
+            self.client.get(self.home_url)
+
+    def tearDown(self):
+        delete_test_data()
@@ -0,0 +1,76 @@
+import sys
+
+from django.core import checks
+from django.test import TestCase, override_settings
+
+from user_account import coldstart
+from user_account.checks import check_environment
+from user_account.management.commands import benchmark_cold_start
+
+
+class ColdStartTests(TestCase):
+
+    ''' Tests for what a new worker imports '''
+
+    def test_time_imports(self):
+        ''' Test each module imported is timed with its importer '''
+        self.addCleanup(sys.modules.pop, 'xml.dom.minidom', None)
+        sys.modules.pop('xml.dom.minidom', None)
+        records = coldstart.time_imports('xml.dom.minidom')
+        names = {name: importer for name, _, _, importer in records}
+        self.assertIsNone(names['xml.dom.minidom'])
+        for name, own, cumulative, importer in records:
+            self.assertLessEqual(own, cumulative)
+
+    def test_worker_does_not_import_providers_or_test_tools(self):
+        ''' Test loading the application leaves twilio and nose alone '''
+        records = benchmark_cold_start.Command().run(
+            'beyonic_portal.wsgi',
+            {'DJANGO_SETTINGS_MODULE': 'beyonic_portal.settings.production',
+             'SECRET_KEY': 'cold-start'})
+        names = {name.split('.')[0] for name, _, _, _ in records}
+        self.assertIn('user_account', names)
+        for heavy in ('twilio', 'httplib2', 'socks', 'nose', 'django_nose'):
+            self.assertNotIn(heavy, names)
+        self.assertNotIn('django.test',
+                         {name for name, _, _, _ in records})
+
+
+class EnvironmentCheckTests(TestCase):
+
+    ''' Tests for the settings read from the environment '''
+
+    @override_settings(ROOT_URL='http://example.com',
+                       EMAIL_HOST_USER='portal@example.com',
+                       EMAIL_HOST_PASSWORD='secret', CALLER_ID='+1',
+                       TWILIO_ACCOUNT_SID='AC1', TWILIO_AUTH_TOKEN='token',
+                       SMS_BACKEND='user_account.sms.backends.twilio.'
+                                   'SMSBackend')
+    def test_complete_environment(self):
+        ''' Test nothing is reported when every variable is set '''
+        self.assertEqual(check_environment(None), [])
+
+    @override_settings(ROOT_URL='', CALLER_ID='+1',
+                       EMAIL_HOST_USER='portal@example.com',
+                       TWILIO_ACCOUNT_SID='', TWILIO_AUTH_TOKEN='',
+                       SMS_BACKEND='user_account.sms.backends.twilio.'
+                                   'SMSBackend')
+    def test_missing_variables_are_errors(self):
+        ''' Test each missing variable is one error naming it '''
+        errors = [error for error in check_environment(None)
+                  if error.level == checks.ERROR]
+        self.assertEqual([error.id for error in errors],
+                         ['user_account.E001', 'user_account.E004',
+                          'user_account.E005'])
+        self.assertIn('ROOT_URL', errors[0].msg)
+
+    @override_settings(ROOT_URL='http://example.com', CALLER_ID='+1',
+                       EMAIL_HOST_USER='portal@example.com',
+                       TWILIO_ACCOUNT_SID='', TWILIO_AUTH_TOKEN='',
+                       SMS_BACKEND='user_account.sms.backends.console.'
+                                   'SMSBackend')
+    def test_twilio_only_needed_when_sending_through_it(self):
+        ''' Test the Twilio credentials are optional for other backends '''
+        self.assertEqual(
+            [error for error in check_environment(None)
+             if error.level == checks.ERROR], [])
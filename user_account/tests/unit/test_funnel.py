@@ -0,0 +1,101 @@
+import os
+import gzip
+import json
+import shutil
+import tempfile
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils.six import StringIO
+
+from user_account import funnel
+
+
+REGISTERED = ('18 Oct 2026 {0}:10:09 [INFO] user_account.accounts: new user '
+              'registered successfully. A B - a@gmail.com - +254720230439\n')
+SMS_SENT = ('18 Oct 2026 {0}:11:00 [INFO] user_account.models: '
+            'verification code sent to +254720230439 \n')
+SMS_FAILED = ('18 Oct 2026 {0}:11:00 [ERROR] user_account.models: An error '
+              'occured while sending the verification code: timeout\n')
+EMAIL_SENT = ('18 Oct 2026 {0}:12:00 [INFO] user_account.models: email sent '
+              'successfully to a@gmail.com\n')
+EMAIL_FAILED = ('18 Oct 2026 {0}:12:00 [ERROR] user_account.models: Could '
+                'not send mail. refused\n')
+
+
+class FunnelTests(TestCase):
+
+    ''' Tests for the log_funnel command and user_account.funnel '''
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, 'app.log')
+        self.state = os.path.join(self.directory, 'state.json')
+
+    def write(self, filename, *lines, mode='a'):
+        with open(os.path.join(self.directory, filename), mode) as log_file:
+            log_file.write(''.join(lines))
+
+    def run_command(self, *args):
+        out = StringIO()
+        call_command('log_funnel', '--path', self.path, *args, stdout=out)
+        return [line.split() for line in out.getvalue().splitlines()[1:]]
+
+    def test_counts_per_hour_across_rotated_files(self):
+        ''' Test backups, gzipped ones included, are counted in order '''
+        with gzip.open(self.path + '.2.gz', 'wt') as log_file:
+            log_file.write(REGISTERED.format('09') + SMS_FAILED.format('09'))
+        self.write('app.log.1', SMS_SENT.format('09'), EMAIL_SENT.format('10'))
+        self.write('app.log', REGISTERED.format('10'),
+                   'a line from some other logger\n',
+                   EMAIL_FAILED.format('10'))
+        rows = self.run_command()
+        self.assertEqual(rows, [
+            ['2026-10-18', '09:00', '1', '1', '1', '50.0', '0', '0', '-'],
+            ['2026-10-18', '10:00', '1', '0', '0', '-', '1', '1', '50.0'],
+            ['total', '2', '1', '1', '50.0', '1', '1', '50.0'],
+        ])
+
+    def test_json_lines(self):
+        ''' Test lines written by the json formatter are read too '''
+        self.write('app.log', json.dumps({
+            'time': '2026-10-18 09:10:09,120', 'level': 'INFO',
+            'logger': 'user_account.accounts',
+            'message': 'new user registered successfully. A B'}) + '\n')
+        self.assertEqual(self.run_command()[-1][:2], ['total', '1'])
+
+    def test_resumes_from_saved_position(self):
+        ''' Test a second run only counts what was logged since '''
+        self.write('app.log', REGISTERED.format('09'))
+        self.run_command('--state', self.state)
+        self.write('app.log', REGISTERED.format('09'), SMS_SENT.format('09'))
+        rows = self.run_command('--state', self.state)
+        self.assertEqual(rows[-1][:3], ['total', '2', '1'])
+
+    def test_resumes_after_rotation(self):
+        ''' Test the rest of a file rotated since the last run is read '''
+        self.write('app.log', REGISTERED.format('09'))
+        self.run_command('--state', self.state)
+        self.write('app.log', REGISTERED.format('09'))
+        os.rename(self.path, self.path + '.1')
+        self.write('app.log', REGISTERED.format('10'))
+        rows = self.run_command('--state', self.state)
+        self.assertEqual(rows[-1][:2], ['total', '3'])
+
+    def test_line_being_written_is_left_for_later(self):
+        ''' Test an unterminated last line is read by the next run '''
+        self.write('app.log', REGISTERED.format('09'),
+                   REGISTERED.format('09').rstrip('\n'))
+        rows = self.run_command('--state', self.state)
+        self.assertEqual(rows[-1][:2], ['total', '1'])
+        self.write('app.log', '\n')
+        rows = self.run_command('--state', self.state)
+        self.assertEqual(rows[-1][:2], ['total', '2'])
+
+    def test_events_is_a_generator(self):
+        ''' Test lines are consumed one at a time '''
+        lines = iter([REGISTERED.format('09'), SMS_SENT.format('09')])
+        events = funnel.events(lines)
+        self.assertEqual(next(events)[1], 'registered')
+        self.assertEqual(next(lines), SMS_SENT.format('09'))
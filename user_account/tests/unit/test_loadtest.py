@@ -0,0 +1,112 @@
+import time
+import threading
+
+from django.core import mail
+from django.test import TestCase, LiveServerTestCase
+
+from user_account import loadtest, outbox, sms, twilio_client
+from user_account.models import UserProfile
+from ..testing_utilities import populate_test_db, delete_test_data
+
+
+class LoadTestTests(TestCase):
+
+    ''' Tests for the load test stand-ins and reporting '''
+
+    def test_percentile(self):
+        ''' Test nearest rank percentiles '''
+        values = list(range(1, 101))
+        self.assertEqual(loadtest.percentile(values, .50), 50)
+        self.assertEqual(loadtest.percentile(values, .99), 99)
+        self.assertEqual(loadtest.percentile([7], .95), 7)
+
+    def test_summarize(self):
+        ''' Test steps are summarized in funnel order '''
+        journeys = [{'home': .2, 'registration': .1}, {'home': .4}]
+        steps = loadtest.summarize(journeys, elapsed=2)
+        self.assertEqual(list(steps), ['registration', 'home'])
+        self.assertEqual(steps['home']['count'], 2)
+        self.assertEqual(steps['home']['throughput'], 1)
+
+    def test_fake_twilio_captures_code(self):
+        ''' Test the Twilio stand-in keeps the code sent to a number '''
+        texts = loadtest.Inbox()
+        server = loadtest.FakeTwilio(('127.0.0.1', 0), texts)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            base = 'http://127.0.0.1:{0}'.format(server.server_address[1])
+            client = twilio_client.TwilioClient('AC1', 'token', base=base)
+            client.send_message(to='+2541234567', from_='+1',
+                                body='Enter the code: 12345 on the form')
+            self.assertEqual(texts.wait('+2541234567', timeout=5), '12345')
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+class SmtpSinkTests(TestCase):
+
+    ''' Tests for the mail server stand-in '''
+
+    def setUp(self):
+        populate_test_db()
+        self.user_profile = UserProfile.objects.get(
+            activation_key='f6115c62e890btest2')
+
+    def test_sink_captures_activation_link(self):
+        ''' Test the sink keeps the activation link per recipient '''
+        mails = loadtest.Inbox()
+        sink = loadtest.SmtpSink(('127.0.0.1', 0), mails)
+        try:
+            message = self.user_profile.activation_message()
+            sink.process_message(('127.0.0.1', 0), message.from_email,
+                                 message.recipients(),
+                                 message.message().as_bytes())
+        finally:
+            sink.close()
+        link = mails.wait('test@gmail.com', timeout=1)
+        self.assertEqual(link, '/user/accounts/confirm/{0}/'.format(
+            self.user_profile.activation_token()))
+
+    def tearDown(self):
+        delete_test_data()
+
+
+class JourneyTests(LiveServerTestCase):
+
+    ''' Tests for a scripted user going through the whole funnel '''
+
+    def deliver(self, mails, texts):
+        """ Drain the outbox, passing what it sent on to the inboxes """
+        outbox.drain(threads=1)
+        while mail.outbox:
+            message = mail.outbox.pop(0)
+            link = loadtest.ACTIVATION_LINK.search(message.body)
+            for recipient in message.to:
+                mails.put(recipient, link.group(1))
+        while sms.outbox:
+            message = sms.outbox.pop(0)
+            code = loadtest.SMS_CODE.search(message.body)
+            for recipient in message.to:
+                texts.put(recipient, code.group(1))
+
+    def test_journey_completes(self):
+        ''' Test one user gets from sign-up to home '''
+        mails, texts = loadtest.Inbox(), loadtest.Inbox()
+        journey = loadtest.Journey(self.live_server_url, 1, 1, mails, texts,
+                                   timeout=10)
+        results = {}
+
+        def run():
+            try:
+                results['timings'] = journey.run()
+            except Exception as error:
+                results['error'] = error
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        # the outbox is delivered from here, the thread with the database
+        while thread.is_alive():
+            self.deliver(mails, texts)
+            time.sleep(0.05)
+        self.assertNotIn('error', results)
+        self.assertEqual(sorted(results['timings']), sorted(loadtest.STEPS))
@@ -0,0 +1,174 @@
+import os
+import json
+import time
+import shutil
+import socket
+import struct
+import logging
+import tempfile
+import threading
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from user_account import logqueue
+from user_account.management.commands import log_server
+
+
+class BlockedWriter(object):
+
+    ''' a writer stuck on a slow disk until released '''
+
+    def __init__(self):
+        self.released = threading.Event()
+        self.records = []
+
+    def handle(self, record):
+        self.released.wait(5)
+        self.records.append(record)
+
+    def close(self):
+        pass
+
+
+class LogQueueTests(TestCase):
+
+    ''' Tests for logging through user_account.logqueue '''
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.files = {
+            'app': os.path.join(self.directory, 'app.log'),
+            'request': os.path.join(self.directory, 'request.log')}
+        # the next record starts a listener with these settings
+        logqueue.stop()
+        self.addCleanup(logqueue.stop)
+        self.logger = logging.getLogger('user_account.tests.logqueue')
+        # only through the handler under test, not the root logger's too
+        self.logger.propagate = False
+        self.addCleanup(setattr, self.logger, 'propagate', True)
+        self.handler = logqueue.QueueHandler('app')
+        self.logger.addHandler(self.handler)
+        self.addCleanup(self.logger.removeHandler, self.handler)
+
+    def read(self, name):
+        with open(self.files[name]) as log_file:
+            return log_file.read()
+
+    def wait_for(self, name, text):
+        # log_server writes from its own threads
+        deadline = time.time() + 5
+        while time.time() < deadline:
+            if os.path.exists(self.files[name]) and text in self.read(name):
+                return
+            time.sleep(0.01)
+        self.fail('{0!r} not written to {1}'.format(text, name))
+
+    def test_records_reach_the_file(self):
+        ''' Test a record is written by the listener thread '''
+        with self.settings(LOG_FILES=self.files):
+            self.logger.warning('registered %s', 'someone')
+            logqueue.stop()
+        self.assertIn('[WARNING] user_account.tests.logqueue: registered '
+                      'someone', self.read('app'))
+
+    def test_logging_does_not_wait_for_the_writer(self):
+        ''' Test records are queued while the writer is blocked '''
+        writer = BlockedWriter()
+        with mock.patch.object(logqueue, 'get_writer', return_value=writer):
+            for index in range(3):
+                self.logger.warning('record %d', index)
+            self.assertEqual(writer.records, [])
+            writer.released.set()
+            logqueue.stop()
+        self.assertEqual([record.getMessage() for record in writer.records],
+                         ['record 0', 'record 1', 'record 2'])
+
+    @override_settings(LOG_QUEUE_SIZE=1)
+    def test_full_queue_drops_and_counts(self):
+        ''' Test records past LOG_QUEUE_SIZE are dropped and reported '''
+        writer = BlockedWriter()
+        with mock.patch.object(logqueue, 'get_writer', return_value=writer):
+            for index in range(10):
+                self.logger.warning('record %d', index)
+            writer.released.set()
+            logqueue.stop()
+        messages = [record.getMessage() for record in writer.records]
+        self.assertLess(len(messages), 10)
+        self.assertRegex(messages[-1], r'^\d+ log records dropped')
+
+    def test_exception_is_rendered_when_logged(self):
+        ''' Test the traceback travels with the record as text '''
+        with self.settings(LOG_FILES=self.files):
+            try:
+                1 / 0
+            except ZeroDivisionError:
+                self.logger.exception('failed')
+            logqueue.stop()
+        self.assertIn('ZeroDivisionError', self.read('app'))
+
+    def test_json_formatter(self):
+        ''' Test LOG_FORMATTER json writes one object per line '''
+        with self.settings(LOG_FILES=self.files, LOG_FORMATTER='json'):
+            self.logger.warning('status %s', 404, extra={'status_code': 404})
+            logqueue.stop()
+        entry = json.loads(self.read('app'))
+        self.assertEqual(entry['message'], 'status 404')
+        self.assertEqual(entry['level'], 'WARNING')
+        self.assertEqual(entry['logger'], 'user_account.tests.logqueue')
+        self.assertEqual(entry['status_code'], 404)
+
+    def test_log_server_writes_for_the_web_processes(self):
+        ''' Test records sent to log_server land in its files '''
+        with self.settings(LOG_FILES=self.files):
+            server = log_server.Server(('127.0.0.1', 0),
+                                       log_server.RecordHandler)
+            server.writer = logqueue.FileWriter()
+            thread = threading.Thread(target=server.serve_forever)
+            thread.start()
+            try:
+                address = '127.0.0.1:{0}'.format(server.server_address[1])
+                with self.settings(LOG_SERVER=address):
+                    self.logger.warning('sent %s', 'over')
+                    logqueue.QueueHandler('request').handle(
+                        logging.makeLogRecord({'msg': 'a request'}))
+                    logqueue.stop()
+                self.wait_for('app', 'sent over')
+                self.wait_for('request', 'a request')
+            finally:
+                server.shutdown()
+                server.server_close()
+                thread.join()
+                server.writer.close()
+
+    @override_settings(LOG_SERVER_MAX_RECORD=1000)
+    def test_log_server_drops_bad_records(self):
+        ''' Test oversized, unreadable and unknown file records are skipped '''
+        with self.settings(LOG_FILES=self.files):
+            server = log_server.Server(('127.0.0.1', 0),
+                                       log_server.RecordHandler)
+            server.writer = logqueue.FileWriter()
+            warnings = []
+            server.warn = warnings.append
+            thread = threading.Thread(target=server.serve_forever)
+            thread.start()
+            try:
+                unknown = logging.makeLogRecord({'msg': 'x', 'log_file': 'x'})
+                good = logging.makeLogRecord({'msg': 'still written',
+                                              'log_file': 'app'})
+                data = b''.join((
+                    struct.pack('>L', 5000) + b' ' * 5000,
+                    struct.pack('>L', 8) + b'not json',
+                    logqueue.encode(unknown),
+                    logqueue.encode(good)))
+                with socket.create_connection(server.server_address) as sock:
+                    sock.sendall(data)
+                self.wait_for('app', 'still written')
+            finally:
+                server.shutdown()
+                server.server_close()
+                thread.join()
+                server.writer.close()
+        self.assertEqual(len(warnings), 3)
+        self.assertIn('5000 bytes', warnings[0])
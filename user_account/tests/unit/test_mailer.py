@@ -0,0 +1,92 @@
+import re
+import smtplib
+import datetime
+from io import StringIO
+from unittest import mock
+
+from django.test import TestCase, Client
+from django.core import mail
+from django.core.mail.backends import locmem
+from django.core.management import call_command
+from django.utils import timezone
+
+from user_account import mailer
+from user_account.models import UserProfile
+from ..testing_utilities import populate_test_db, delete_test_data
+
+
+class MailerTests(TestCase):
+
+    ''' Tests for the pooled mail connection '''
+
+    def setUp(self):
+        populate_test_db()
+        self.user_profile = UserProfile.objects.get(
+            activation_key='f6115c62e890btest2')
+        self.user_profile.user.is_active = False
+        self.user_profile.user.save()
+
+    def test_connection_is_reused(self):
+        ''' Test consecutive sends share one connection '''
+        connection = mailer.get_connection()
+        self.user_profile.send_activation_link()
+        self.user_profile.send_activation_link()
+        self.assertIs(mailer.get_connection(), connection)
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_old_connection_is_replaced(self):
+        ''' Test a connection past its maximum age is reopened '''
+        connection = mailer.get_connection()
+        with self.settings(EMAIL_CONNECTION_MAX_AGE=-1):
+            self.assertIsNot(mailer.get_connection(), connection)
+
+    def test_dropped_connection_resends_only_the_rest(self):
+        ''' Test messages sent before a drop are not sent again '''
+        messages = [self.user_profile.activation_message() for _ in range(3)]
+        calls = []
+
+        def send_messages(batch):
+            calls.append(batch[0])
+            if len(calls) == 2:
+                raise smtplib.SMTPServerDisconnected('gone')
+            return len(batch)
+        with mock.patch.object(locmem.EmailBackend, 'send_messages',
+                               side_effect=send_messages):
+            self.assertEqual(mailer.send_messages(messages), 3)
+        self.assertEqual(calls, [messages[0], messages[1], messages[1],
+                                 messages[2]])
+
+    def test_resend_activation_links(self):
+        ''' Test pending profiles get their activation link again '''
+        out = StringIO()
+        call_command('resend_activation_links', stdout=out)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn('Sent 1 activation', out.getvalue())
+
+    def test_resend_skips_expired_keys_unless_asked(self):
+        ''' Test expired profiles are only mailed with --include-expired '''
+        self.user_profile.key_expires = timezone.now() - datetime.timedelta(1)
+        self.user_profile.save()
+        call_command('resend_activation_links', stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 0)
+        call_command('resend_activation_links', include_expired=True,
+                     stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 1)
+        user_profile = UserProfile.objects.get(pk=self.user_profile.pk)
+        self.assertGreater(user_profile.key_expires, timezone.now())
+
+    def test_resent_expired_link_confirms(self):
+        ''' Test the link mailed to an expired profile activates it '''
+        self.user_profile.key_expires = timezone.now() - datetime.timedelta(1)
+        self.user_profile.save()
+        call_command('resend_activation_links', include_expired=True,
+                     stdout=StringIO())
+        path = re.search(r'/user/accounts/confirm/[-\w:]+/',
+                         mail.outbox[0].body).group(0)
+        response = Client().get(path)
+        self.assertRedirects(response, '/user/phone-verification/{0}/'.format(
+            self.user_profile.user_id))
+
+    def tearDown(self):
+        mailer.close_connection()
+        delete_test_data()
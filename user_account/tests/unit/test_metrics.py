@@ -0,0 +1,116 @@
+import os
+import json
+import shutil
+import tempfile
+
+from django.test import TestCase, Client
+from django.core.urlresolvers import reverse
+
+from user_account import metrics
+from ..testing_utilities import (populate_test_db,
+                                 delete_test_data,
+                                 set_up_login_form_values)
+
+
+def _count(text, name, view):
+    prefix = '{0}_count{{view="{1}"}} '.format(name, view)
+    for line in text.splitlines():
+        if line.startswith(prefix):
+            return int(line[len(prefix):])
+    return 0
+
+
+class MetricsTests(TestCase):
+
+    ''' Tests for the request instrumentation and the metrics endpoint '''
+
+    def setUp(self):
+        populate_test_db()
+        self.client = Client(enforce_csrf_checks=False)
+        self.metrics_url = reverse('metrics')
+
+    def test_requests_are_recorded_per_view(self):
+        ''' Test each request adds to its view's histograms '''
+        view = 'user_account.views.LoginRequest'
+        before = self.client.get(self.metrics_url).content.decode('utf-8')
+        self.client.post(reverse('user_login'), set_up_login_form_values())
+        text = self.client.get(self.metrics_url).content.decode('utf-8')
+        self.assertEqual(_count(text, 'beyonic_request_seconds', view),
+                         _count(before, 'beyonic_request_seconds', view) + 1)
+        self.assertIn('# TYPE beyonic_request_db_queries histogram', text)
+
+    def test_request_stats_capture_queries_and_templates(self):
+        ''' Test database and template time land in the request stats '''
+        seen = []
+        process_response = metrics.MetricsMiddleware.process_response
+
+        def record(middleware, request, response):
+            seen.append(metrics.current())
+            return process_response(middleware, request, response)
+        entries = set_up_login_form_values()
+        entries['password'] = 'wrong'
+        metrics.MetricsMiddleware.process_response = record
+        try:
+            self.client.post(reverse('user_login'), entries)
+        finally:
+            metrics.MetricsMiddleware.process_response = process_response
+        stats = seen[0]
+        self.assertGreater(stats.db_queries, 0)
+        self.assertGreater(stats.template_time, 0)
+
+    def test_metrics_restricted_to_allowed_ips(self):
+        ''' Test the endpoint refuses addresses not allowed '''
+        response = self.client.get(self.metrics_url, REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(response.status_code, 403)
+
+    def test_metrics_token_replaces_the_addresses(self):
+        ''' Test with METRICS_TOKEN only the bearer of the token gets in '''
+        with self.settings(METRICS_TOKEN='scrape-secret'):
+            response = self.client.get(self.metrics_url)
+            self.assertEqual(response.status_code, 403)
+            response = self.client.get(
+                self.metrics_url, REMOTE_ADDR='10.0.0.1',
+                HTTP_AUTHORIZATION='Bearer scrape-secret')
+            self.assertEqual(response.status_code, 200)
+            response = self.client.get(
+                self.metrics_url, HTTP_AUTHORIZATION='Bearer wrong')
+            self.assertEqual(response.status_code, 403)
+
+    def test_multiprocess_mode_adds_up_processes(self):
+        ''' Test histograms written by other processes are summed '''
+        directory = tempfile.mkdtemp()
+        try:
+            other = [{'name': 'beyonic_request_seconds',
+                      'labels': [['view', 'other.view']],
+                      'buckets': list(metrics.TIME_BUCKETS),
+                      'counts': [2] + [0] * len(metrics.TIME_BUCKETS),
+                      'sum': 0.002}]
+            for pid in (1, 2):
+                path = os.path.join(directory, 'metrics-{0}.json'.format(pid))
+                with open(path, 'w') as metrics_file:
+                    json.dump(other, metrics_file)
+            with self.settings(METRICS_MULTIPROCESS_DIR=directory):
+                text = self.client.get(
+                    self.metrics_url).content.decode('utf-8')
+            self.assertEqual(
+                _count(text, 'beyonic_request_seconds', 'other.view'), 4)
+        finally:
+            shutil.rmtree(directory)
+
+    def test_multiprocess_file_is_removed_at_exit(self):
+        ''' Test a process' file is its own and goes when it exits '''
+        directory = tempfile.mkdtemp()
+        try:
+            with self.settings(METRICS_MULTIPROCESS_DIR=directory):
+                metrics.flush(force=True)
+                written = os.listdir(directory)
+                self.assertEqual(len(written), 1)
+                self.assertRegex(written[0], r'^metrics-{0}-[0-9a-f]+\.json$'
+                                 .format(os.getpid()))
+                metrics.remove_own_file()
+                self.assertEqual(os.listdir(directory), [])
+        finally:
+            shutil.rmtree(directory)
+
+    def tearDown(self):
+        delete_test_data()
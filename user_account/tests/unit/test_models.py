@@ -54,7 +54,7 @@ class UserProfileTests(TestCase):
         self.assertEqual(msg.recipients(), ['test@gmail.com'])
         self.assertEqual(msg.subject, 'Beyonic Portal account confirmation')
         url = "{0}/user/accounts/confirm/{1}/".format(
-            root_url, self.user_profile.activation_key)
+            root_url, self.user_profile.activation_token())
         self.assertIn(url, msg.body)
         self.assertIn('Below is your account activation link', msg.body)
 
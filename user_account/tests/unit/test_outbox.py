@@ -0,0 +1,75 @@
+from io import StringIO
+from unittest import mock
+
+from django.test import TestCase, Client
+from django.core import mail
+from django.core.urlresolvers import reverse
+from django.core.management import call_command
+
+from user_account import outbox
+from user_account.models import UserProfile, OutboundNotification
+from ..testing_utilities import (populate_test_db,
+                                 delete_test_data,
+                                 set_up_form_values)
+
+
+class OutboxTests(TestCase):
+
+    ''' Tests for the outbound notification queue '''
+
+    def setUp(self):
+        populate_test_db()
+        self.user_profile = UserProfile.objects.get(
+            activation_key='f6115c62e890btest2')
+
+    def test_registration_only_enqueues(self):
+        ''' Test registration queues the mail and sms instead of sending '''
+        client = Client(enforce_csrf_checks=False)
+        client.post(reverse('registration'), set_up_form_values())
+        self.assertEqual(len(mail.outbox), 0)
+        channels = sorted(OutboundNotification.objects.pending()
+                          .values_list('channel', flat=True))
+        self.assertEqual(channels, ['email', 'sms'])
+
+    def test_drain_delivers_activation_link(self):
+        ''' Test draining the outbox sends the activation mail '''
+        notification = self.user_profile.queue_activation_link()
+        self.assertEqual(outbox.drain(threads=1), 1)
+        self.assertEqual(len(mail.outbox), 1)
+        notification = OutboundNotification.objects.get(pk=notification.pk)
+        self.assertEqual(notification.status, OutboundNotification.SENT)
+        self.assertEqual(notification.attempts, 1)
+
+    @mock.patch.object(UserProfile, 'send_sms', return_value=True)
+    def test_drain_delivers_sms_code(self, send_sms):
+        ''' Test draining the outbox sends the queued code '''
+        notification = self.user_profile.queue_sms(12345)
+        outbox.drain(threads=1)
+        send_sms.assert_called_once_with('12345')
+        notification = OutboundNotification.objects.get(pk=notification.pk)
+        self.assertEqual(notification.payload, '')
+
+    @mock.patch.object(UserProfile, 'send_sms', return_value=False)
+    def test_failed_delivery_is_retried_then_abandoned(self, send_sms):
+        ''' Test a failing notification is retried up to the limit '''
+        notification = self.user_profile.queue_sms(12345)
+        with self.settings(OUTBOX_MAX_ATTEMPTS=2):
+            outbox.drain(threads=1)
+            notification = OutboundNotification.objects.get(
+                pk=notification.pk)
+            self.assertEqual(notification.status,
+                             OutboundNotification.PENDING)
+            call_command('process_outbox', once=True, threads=1,
+                         stdout=StringIO())
+        notification = OutboundNotification.objects.get(pk=notification.pk)
+        self.assertEqual(notification.status, OutboundNotification.FAILED)
+        self.assertEqual(send_sms.call_count, 2)
+
+    def test_claim_is_exclusive(self):
+        ''' Test a notification can only be claimed once '''
+        notification = self.user_profile.queue_activation_link()
+        self.assertTrue(outbox.claim(notification.pk))
+        self.assertFalse(outbox.claim(notification.pk))
+
+    def tearDown(self):
+        delete_test_data()
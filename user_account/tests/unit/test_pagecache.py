@@ -0,0 +1,109 @@
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.messages.storage import default_storage
+from django.core.cache import caches
+from django.test import TestCase, Client, RequestFactory, override_settings
+from django.utils.http import http_date
+
+from user_account import metrics, pagecache
+from ..testing_utilities import populate_test_db, delete_test_data, \
+    login_client_user, set_up_login_form_values
+
+
+def page_cache_count(view, result):
+    """ Requests to view counted with result so far """
+    labels = (('result', result), ('view', 'user_account.views.' + view))
+    return sum(sum(histogram['counts']) for histogram in metrics.snapshot()
+               if histogram['name'] == 'beyonic_page_cache_seconds' and
+               tuple(histogram['labels']) == labels)
+
+
+@override_settings(PAGE_CACHE_TIMEOUT=300)
+class PageCacheTests(TestCase):
+
+    ''' Tests for the pages cached for signed out visitors '''
+
+    def setUp(self):
+        populate_test_db()
+        caches[settings.PAGE_CACHE].clear()
+        self.client = Client(enforce_csrf_checks=True)
+
+    def tearDown(self):
+        delete_test_data()
+
+    def test_second_visit_is_served_from_the_cache(self):
+        ''' Test the page is rendered once and counted as a hit after '''
+        hits = page_cache_count('registration', 'hit')
+        response = self.client.get('/user/sign-up/')
+        self.assertTemplateUsed(response, 'user_account/register.html')
+        response = self.client.get('/user/sign-up/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.templates, [])
+        self.assertContains(response, 'csrfmiddlewaretoken')
+        self.assertEqual(page_cache_count('registration', 'hit'), hits + 1)
+
+    def test_every_visitor_gets_their_own_token(self):
+        ''' Test a cached form posts with the token of its visitor '''
+        self.client.get('/user/login/')
+        other = Client(enforce_csrf_checks=True)
+        response = other.get('/user/login/')
+        self.assertEqual(response.templates, [])
+        token = other.cookies[settings.CSRF_COOKIE_NAME].value
+        self.assertNotEqual(
+            token, self.client.cookies[settings.CSRF_COOKIE_NAME].value)
+        self.assertContains(response, token)
+        self.assertNotContains(response, pagecache.PLACEHOLDER.decode())
+        form = dict(set_up_login_form_values(), password='wrong',
+                    csrfmiddlewaretoken=token)
+        response = other.post('/user/login/', form)
+        self.assertEqual(response.status_code, 200)
+
+    def test_not_modified(self):
+        ''' Test a browser's copy is revalidated, but not another's '''
+        response = self.client.get('/user/login/')
+        etag = response['ETag']
+        self.assertIn('no-cache', response['Cache-Control'])
+        response = self.client.get('/user/login/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        # with the token of another visitor
+        response = Client().get('/user/login/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get('/user/home/',
+                                   HTTP_IF_MODIFIED_SINCE=http_date())
+        self.assertEqual(response.status_code, 304)
+
+    def test_pages_with_a_token_go_by_the_etag_only(self):
+        ''' Test a page with a form isn't revalidated by date alone '''
+        response = self.client.get('/user/login/')
+        self.assertFalse(response.has_header('Last-Modified'))
+        response = self.client.get('/user/login/',
+                                   HTTP_IF_MODIFIED_SINCE=http_date())
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(self.client.get('/user/home/').has_header(
+            'Last-Modified'))
+
+    def test_signed_in_users_are_not_cached(self):
+        ''' Test the home page of a signed in user is rendered for them '''
+        self.client.get('/user/home/')
+        login_client_user(self)
+        response = self.client.get('/user/home/')
+        self.assertTemplateUsed(response, 'user_account/home.html')
+        self.assertContains(response, 'Logout')
+
+    def test_pending_messages_are_not_cached(self):
+        ''' Test a request with a message to show is rendered '''
+        request = RequestFactory().get('/user/home/')
+        request.user = AnonymousUser()
+        request._messages = default_storage(request)
+        self.assertTrue(pagecache.cacheable(request))
+        messages.info(request, 'Welcome')
+        self.assertFalse(pagecache.cacheable(request))
+
+    def test_turned_off(self):
+        ''' Test a PAGE_CACHE_TIMEOUT of 0 renders every time '''
+        with override_settings(PAGE_CACHE_TIMEOUT=0):
+            self.client.get('/user/home/')
+            response = self.client.get('/user/home/')
+        self.assertTemplateUsed(response, 'user_account/home.html')
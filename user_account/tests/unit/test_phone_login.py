@@ -0,0 +1,113 @@
+from django.test import TestCase, Client
+from django.contrib.auth import authenticate
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.urlresolvers import reverse
+from django.db import connection
+from django.utils.six import StringIO
+
+from user_account import accounts
+from user_account.models import UserProfile
+from ..testing_utilities import set_up_form_values
+
+
+class PhoneNumberLoginTests(TestCase):
+
+    ''' Tests for signing in with the phone number '''
+
+    def setUp(self):
+        self.profile = accounts.register('phoneuser', 'phone@gmail.com',
+                                         'secret123', 'first', 'last',
+                                         '+254720230439')
+        self.profile.user.is_active = True
+        self.profile.user.save()
+
+    def test_authenticate_with_phone_number(self):
+        ''' Test the E.164 number authenticates the account '''
+        user = authenticate(username='+254720230439', password='secret123')
+        self.assertEqual(user, self.profile.user)
+
+    def test_authenticate_without_plus(self):
+        ''' Test the number typed as the sign-up form asks for it '''
+        user = authenticate(username='254720230439', password='secret123')
+        self.assertEqual(user, self.profile.user)
+
+    def test_wrong_password(self):
+        ''' Test a wrong password is refused '''
+        self.assertIsNone(authenticate(username='+254720230439',
+                                       password='wrong'))
+
+    def test_unknown_number(self):
+        ''' Test a number without an account is refused '''
+        self.assertIsNone(authenticate(username='+254720230440',
+                                       password='secret123'))
+
+    def test_login_view_accepts_phone_number(self):
+        ''' Test the login form signs in with the phone number '''
+        client = Client()
+        response = client.post(reverse('user_login'), {
+            'username': '254720230439', 'password': 'secret123'})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(int(client.session['_auth_user_id']),
+                         self.profile.user.pk)
+
+
+class PhoneNumberUniquenessTests(TestCase):
+
+    ''' Tests for one account per phone number '''
+
+    def setUp(self):
+        accounts.register('first', 'first@gmail.com', 'secret123',
+                          'first', 'last', '+254720230439')
+
+    def test_save_registration_raises_phone_number_taken(self):
+        ''' Test a duplicate number is reported as PhoneNumberTaken '''
+        with self.assertRaises(accounts.PhoneNumberTaken):
+            accounts.register('second', 'second@gmail.com', 'secret123',
+                              'first', 'last', '+254720230439')
+        self.assertFalse(User.objects.filter(username='second').exists())
+
+    def test_view_maps_phone_number_taken_to_form_error(self):
+        ''' Test a registered number is a form error, not a server error '''
+        entries = set_up_form_values()
+        entries['password1'] = entries['password2'] = 'secret123'
+        response = Client().post(reverse('registration'), entries)
+        self.assertEqual(response.status_code, 200)
+        self.assertFormError(response, 'form', 'phone_number',
+                             'phone number +254720230439 is already '
+                             'registered')
+
+
+class PhoneNumberDuplicatesCommandTests(TestCase):
+
+    ''' Tests for the phone_number_duplicates command '''
+
+    def test_no_duplicates(self):
+        ''' Test the report on a database without duplicates '''
+        accounts.register('first', 'first@gmail.com', 'secret123',
+                          'first', 'last', '+254720230439')
+        out = StringIO()
+        call_command('phone_number_duplicates', stdout=out)
+        self.assertEqual(out.getvalue(), '0 duplicate phone number(s)\n')
+
+    def test_lists_differently_written_duplicates(self):
+        ''' Test numbers stored before normalization are compared E.164 '''
+        profile = accounts.register('first', 'first@gmail.com', 'secret123',
+                                    'first', 'last', '+254720230439')
+        other = accounts.register('second', 'second@gmail.com', 'secret123',
+                                  'first', 'last', '+254720230440')
+        # a copy written the way older rows may have been saved, past
+        # the field's normalization
+        with connection.cursor() as cursor:
+            cursor.execute('UPDATE {0} SET phone_number = %s '
+                           'WHERE id = %s'.format(
+                               UserProfile._meta.db_table),
+                           ['+254 720 230439', other.pk])
+        out = StringIO()
+        call_command('phone_number_duplicates', stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(lines[0], '+254720230439')
+        self.assertIn('profile {0}: first'.format(profile.pk), lines[1])
+        self.assertIn('profile {0}: second'.format(other.pk), lines[2])
+        self.assertIn('stored as +254 720 230439, inactive', lines[2])
+        self.assertEqual(lines[-1], '1 duplicate phone number(s)')
@@ -0,0 +1,64 @@
+from django.test import TestCase
+from phonenumber_field import phonenumber
+
+from user_account import phones
+from user_account.models import UserProfile
+from ..testing_utilities import populate_test_db, delete_test_data
+
+
+class PhonesTests(TestCase):
+
+    ''' Tests for the cached phone number helpers '''
+
+    def test_to_python_matches_phonenumber_field(self):
+        ''' Test the cached numbers format like phonenumber_field's '''
+        for value in ('+254720230439', '+14155552671', 'not a number'):
+            cached = phones.to_python(value)
+            stock = phonenumber.to_python(value)
+            self.assertEqual(str(cached), str(stock))
+            self.assertEqual(cached.is_valid(), stock.is_valid())
+            self.assertEqual(cached.as_international, stock.as_international)
+
+    def test_each_value_is_parsed_once(self):
+        ''' Test parsing the same string again is a cache hit '''
+        phones.to_python('+254720230440')
+        hits = phones.cache_info()['parse'].hits
+        phones.to_python('+254720230440')
+        self.assertEqual(phones.cache_info()['parse'].hits, hits + 1)
+
+    def test_numbers_are_independent_objects(self):
+        ''' Test a cached value never hands out a shared object '''
+        first = phones.to_python('+254720230439')
+        second = phones.to_python('+254720230439')
+        self.assertIsNot(first, second)
+        first.national_number = 720230440
+        self.assertEqual(str(second), '+254720230439')
+        self.assertEqual(str(first), '+254720230440')
+
+    def test_normalize_many(self):
+        ''' Test a list is normalized to E.164 with None for bad entries '''
+        self.assertEqual(
+            phones.normalize_many(['+254 720 230439', 'garbage', '+1'],
+                                  region='KE'),
+            ['+254720230439', None, None])
+        self.assertEqual(phones.normalize('0720230439', region='KE'),
+                         '+254720230439')
+
+
+class PhoneNumberFieldTests(TestCase):
+
+    ''' Tests for UserProfile.phone_number with the cached field '''
+
+    def setUp(self):
+        populate_test_db()
+
+    def test_loaded_profile_uses_cached_numbers(self):
+        ''' Test a loaded profile's number is a cached PhoneNumber '''
+        profile = UserProfile.objects.get(activation_key='f6115c62e890btest2')
+        self.assertIsInstance(profile.phone_number, phones.PhoneNumber)
+        self.assertEqual(str(profile.phone_number), '+2541234567')
+        self.assertEqual(UserProfile.objects.filter(
+            phone_number='+2541234567').count(), 1)
+
+    def tearDown(self):
+        delete_test_data()
@@ -0,0 +1,49 @@
+import datetime
+from io import StringIO
+
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.utils import timezone
+
+from user_account.models import UserProfile
+
+
+def create_registration(username, expires_in, is_active=False):
+    user = User.objects.create_user(username=username,
+                                    email='test@gmail.com',
+                                    password='secret123')
+    user.is_active = is_active
+    user.save()
+    UserProfile.objects.create(
+        user=user,
+        key_expires=timezone.now() + datetime.timedelta(expires_in),
+        phone_number='+2547{0:08d}'.format(user.pk))
+
+
+class PurgeExpiredRegistrationsTests(TestCase):
+
+    ''' Tests for the purge_expired_registrations command '''
+
+    def setUp(self):
+        for index in range(3):
+            create_registration('expired{0}'.format(index), -1)
+        create_registration('pending', 1)
+        create_registration('active', -1, is_active=True)
+
+    def test_dry_run_only_counts(self):
+        ''' Test a dry run reports without deleting '''
+        out = StringIO()
+        call_command('purge_expired_registrations', dry_run=True, stdout=out)
+        self.assertIn('3 expired registration(s)', out.getvalue())
+        self.assertEqual(User.objects.count(), 5)
+
+    def test_purge_in_batches(self):
+        ''' Test expired, never activated accounts are deleted '''
+        out = StringIO()
+        call_command('purge_expired_registrations', batch_size=2, sleep=0,
+                     stdout=out)
+        self.assertIn('Deleted 3 expired registration(s)', out.getvalue())
+        usernames = sorted(User.objects.values_list('username', flat=True))
+        self.assertEqual(usernames, ['active', 'pending'])
+        self.assertEqual(UserProfile.objects.count(), 2)
@@ -0,0 +1,125 @@
+import datetime
+from io import StringIO
+
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.db import connection
+from django.utils import timezone
+
+from user_account.sessions import SessionStore
+from user_account.management.commands.benchmark_sessions import \
+    SESSION_WRITE
+
+
+class CoalescingSessionStoreTests(TestCase):
+
+    ''' Tests for the user_account.sessions engine '''
+
+    def save_writes(self, session):
+        with CaptureQueriesContext(connection) as queries:
+            session.save()
+        matches = [SESSION_WRITE.search(query['sql'])
+                   for query in queries.captured_queries]
+        return [match.group(1) for match in matches if match]
+
+    def test_new_session_is_one_insert(self):
+        ''' Test a new session is written with its data at once '''
+        session = SessionStore()
+        session['user'] = 1
+        self.assertEqual(self.save_writes(session), ['INSERT INTO'])
+        self.assertEqual(
+            SessionStore(session.session_key).load(), {'user': 1})
+
+    def test_missing_session_is_not_written(self):
+        ''' Test loading an unknown key does not create an empty row '''
+        session = SessionStore('missing')
+        self.assertEqual(session.load(), {})
+        self.assertIsNone(session.session_key)
+        self.assertEqual(Session.objects.count(), 0)
+
+    def test_unchanged_session_is_not_saved(self):
+        ''' Test saving a session whose data did not change is skipped '''
+        session = SessionStore()
+        session['user'] = 1
+        session.save()
+        session = SessionStore(session.session_key)
+        session['user'] = 1
+        self.assertTrue(session.modified)
+        self.assertEqual(self.save_writes(session), [])
+
+    def test_nested_change_is_saved(self):
+        ''' Test a value changed in place is written once marked modified '''
+        session = SessionStore()
+        session['cart'] = [1]
+        session.save()
+        session = SessionStore(session.session_key)
+        session['cart'].append(2)
+        session.modified = True
+        self.assertEqual(self.save_writes(session), ['UPDATE'])
+        self.assertEqual(
+            SessionStore(session.session_key).load(), {'cart': [1, 2]})
+
+    @override_settings(SESSION_SAVE_INTERVAL=0)
+    def test_expiry_is_refreshed_after_the_interval(self):
+        ''' Test an unchanged session is saved when its expiry is due '''
+        session = SessionStore()
+        session['user'] = 1
+        session.save()
+        session = SessionStore(session.session_key)
+        session.load()
+        self.assertEqual(self.save_writes(session), ['UPDATE'])
+
+    def test_cycle_key_keeps_data_under_a_new_key(self):
+        ''' Test cycle_key deletes the old row and inserts the new one '''
+        session = SessionStore()
+        session['user'] = 1
+        session.save()
+        old_key = session.session_key
+        session.cycle_key()
+        session.save()
+        self.assertNotEqual(session.session_key, old_key)
+        self.assertEqual(list(Session.objects.values_list(
+            'session_key', flat=True)), [session.session_key])
+        self.assertEqual(
+            SessionStore(session.session_key).load(), {'user': 1})
+
+
+class SweepSessionsTests(TestCase):
+
+    ''' Tests for the sweep_sessions command '''
+
+    def setUp(self):
+        now = timezone.now()
+        for index in range(5):
+            Session.objects.create(
+                session_key='expired{0}'.format(index), session_data='',
+                expire_date=now - datetime.timedelta(1))
+        Session.objects.create(session_key='current', session_data='',
+                               expire_date=now + datetime.timedelta(1))
+
+    def test_sweep_in_batches(self):
+        ''' Test expired sessions are deleted and current ones kept '''
+        out = StringIO()
+        call_command('sweep_sessions', once=True, batch_size=2, sleep=0,
+                     stdout=out)
+        self.assertIn('Deleted 5 expired session(s)', out.getvalue())
+        self.assertEqual(list(Session.objects.values_list(
+            'session_key', flat=True)), ['current'])
+
+
+class BenchmarkSessionsTests(TestCase):
+
+    ''' Tests for the benchmark_sessions command '''
+
+    def test_benchmark_counts_login_writes(self):
+        ''' Test writes are reported per step and rolled back '''
+        out = StringIO()
+        call_command('benchmark_sessions', users=1,
+                     engines=['user_account.sessions'], stdout=out)
+        lines = dict(line.split(None, 1) for line in
+                     out.getvalue().splitlines()[3:])
+        self.assertEqual(lines['login'].strip(), '1.0')
+        self.assertEqual(lines['registration'].strip(), '0.0')
+        self.assertEqual(Session.objects.count(), 0)
@@ -0,0 +1,105 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.test import TestCase
+
+from user_account import sms
+from user_account.models import UserProfile
+from ..testing_utilities import populate_test_db, delete_test_data
+
+
+LOCMEM = 'user_account.sms.backends.locmem.SMSBackend'
+BATCH = 'user_account.sms.backends.batch.SMSBackend'
+
+
+class SMSBackendTests(TestCase):
+
+    ''' Tests for the sms backends '''
+
+    def test_locmem_backend(self):
+        ''' Test the locmem backend keeps messages in sms.outbox '''
+        sent = sms.send_sms('hello', ['+2541234567'], '+1')
+        self.assertEqual(sent, 1)
+        self.assertEqual(sms.outbox[0].to, ['+2541234567'])
+        self.assertEqual(sms.outbox[0].body, 'hello')
+
+    def test_send_mass_sms(self):
+        ''' Test many messages go through one connection '''
+        datatuple = [('code {0}'.format(i), ['+25412345{0:02d}'.format(i)],
+                      None) for i in range(5)]
+        self.assertEqual(sms.send_mass_sms(datatuple), 5)
+        self.assertEqual(len(sms.outbox), 5)
+
+    def test_console_backend(self):
+        ''' Test the console backend writes messages to its stream '''
+        stream = StringIO()
+        connection = sms.get_connection(
+            'user_account.sms.backends.console.SMSBackend', stream=stream)
+        sms.send_sms('hello', ['+2541234567'], '+1', connection=connection)
+        self.assertIn('To: +2541234567', stream.getvalue())
+        self.assertIn('hello', stream.getvalue())
+
+    def test_filebased_backend(self):
+        ''' Test the file backend writes messages under SMS_FILE_PATH '''
+        directory = tempfile.mkdtemp()
+        try:
+            with self.settings(SMS_FILE_PATH=directory):
+                connection = sms.get_connection(
+                    'user_account.sms.backends.filebased.SMSBackend')
+                sms.send_sms('hello', ['+2541234567'], connection=connection)
+            filenames = os.listdir(directory)
+            self.assertEqual(len(filenames), 1)
+            with open(os.path.join(directory, filenames[0])) as sms_file:
+                self.assertIn('hello', sms_file.read())
+        finally:
+            shutil.rmtree(directory)
+
+    def test_batch_backend_sends_chunks_concurrently(self):
+        ''' Test the batch backend sends every message in chunks '''
+        connection = sms.get_connection(BATCH, batch_backend=LOCMEM,
+                                        batch_size=3, concurrency=2)
+        messages = [sms.SMSMessage(str(i), ['+2541234567'])
+                    for i in range(10)]
+        self.assertEqual(connection.send_messages(messages), 10)
+        self.assertEqual(sorted(int(message.body) for message in sms.outbox),
+                         list(range(10)))
+
+    def test_batch_backend_coalesces_until_flush(self):
+        ''' Test added messages wait for the connection to close '''
+        with sms.get_connection(BATCH, batch_backend=LOCMEM) as connection:
+            connection.add(sms.SMSMessage('hello', ['+2541234567']))
+            self.assertEqual(len(sms.outbox), 0)
+        self.assertEqual(len(sms.outbox), 1)
+
+    def test_twilio_backend(self):
+        ''' Test the Twilio backend sends to every recipient '''
+        connection = sms.get_connection(
+            'user_account.sms.backends.twilio.SMSBackend')
+        with mock.patch.object(connection.client, 'send_message') as send:
+            sent = sms.send_sms('hello', ['+2541234567', '+2547654321'],
+                                '+1', connection=connection)
+        self.assertEqual(sent, 1)
+        self.assertEqual(send.call_count, 2)
+
+
+class SendSMSTests(TestCase):
+
+    ''' Tests for UserProfile.send_sms '''
+
+    def setUp(self):
+        populate_test_db()
+        self.user_profile = UserProfile.objects.get(
+            activation_key='f6115c62e890btest2')
+
+    def test_send_sms_uses_configured_backend(self):
+        ''' Test the verification code goes through SMS_BACKEND '''
+        self.assertTrue(self.user_profile.send_sms(12345))
+        self.assertEqual(len(sms.outbox), 1)
+        self.assertEqual(sms.outbox[0].to, ['+2541234567'])
+        self.assertIn('12345', sms.outbox[0].body)
+
+    def tearDown(self):
+        delete_test_data()
@@ -0,0 +1,56 @@
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+
+from user_account import sqlite
+
+
+class SqliteSettingsTests(TestCase):
+
+    ''' Tests for the sqlite connection settings '''
+
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA {0}'.format(name))
+            return cursor.fetchone()[0]
+
+    @override_settings(SQLITE_JOURNAL_MODE='WAL', SQLITE_SYNCHRONOUS='NORMAL',
+                       SQLITE_BUSY_TIMEOUT=2.5)
+    def test_pragmas(self):
+        ''' Test the statements follow the settings '''
+        self.assertEqual(sqlite.pragmas(), [
+            'PRAGMA journal_mode=WAL',
+            'PRAGMA synchronous=NORMAL',
+            'PRAGMA busy_timeout=2500',
+        ])
+
+    @override_settings(SQLITE_JOURNAL_MODE=None, SQLITE_SYNCHRONOUS=None,
+                       SQLITE_BUSY_TIMEOUT=None)
+    def test_no_pragmas(self):
+        ''' Test nothing is changed when the settings are unset '''
+        self.assertEqual(sqlite.pragmas(), [])
+
+    @override_settings(SQLITE_JOURNAL_MODE=None, SQLITE_SYNCHRONOUS=None,
+                       SQLITE_BUSY_TIMEOUT=3)
+    def test_new_connections_are_configured(self):
+        ''' Test the pragmas are applied when a connection is made '''
+        # the other pragmas cannot change inside the test's transaction
+        previous = self.pragma('busy_timeout')
+        self.addCleanup(connection.connection.execute,
+                        'PRAGMA busy_timeout={0}'.format(previous))
+        sqlite.configure_connection(sender=connection.__class__,
+                                    connection=connection)
+        self.assertEqual(self.pragma('busy_timeout'), 3000)
+
+    def test_test_database_is_configured(self):
+        ''' Test the test database connection went through the hook '''
+        self.assertEqual(self.pragma('busy_timeout'),
+                         int(settings.SQLITE_BUSY_TIMEOUT * 1000))
+        self.assertEqual(self.pragma('synchronous'), 1)
+
+    def test_benchmark_needs_a_database_file(self):
+        ''' Test the benchmark refuses the in-memory test database '''
+        with self.assertRaises(CommandError):
+            call_command('benchmark_registrations', seconds=0)
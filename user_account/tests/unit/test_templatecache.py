@@ -0,0 +1,81 @@
+import os
+import json
+import shutil
+import tempfile
+from unittest import mock
+
+from django.contrib.staticfiles.templatetags import staticfiles
+from django.core.cache import caches
+from django.test import TestCase, Client, override_settings
+
+from user_account import templatecache
+from ..testing_utilities import populate_test_db, delete_test_data, \
+    login_client_user
+
+
+class TemplateCacheTests(TestCase):
+
+    ''' Tests for the cached templates and fragments of base.html '''
+
+    def setUp(self):
+        populate_test_db()
+        caches['template_fragments'].clear()
+        self.client = Client()
+
+    def tearDown(self):
+        delete_test_data()
+
+    def test_fragments_vary_on_authentication(self):
+        ''' Test signed in users don't get the anonymous navbar '''
+        content = self.client.get('/user/home/').content.decode('utf-8')
+        self.assertIn('Register', content)
+        self.assertNotIn('Logout', content)
+        login_client_user(self)
+        content = self.client.get('/user/home/').content.decode('utf-8')
+        self.assertIn('Logout', content)
+        self.assertNotIn('Register', content)
+
+    def test_fragments_are_reused(self):
+        ''' Test a second render takes the layout from the cache '''
+        self.client.get('/user/home/')
+        with mock.patch.object(staticfiles, 'static') as static:
+            content = self.client.get('/user/home/').content.decode('utf-8')
+        self.assertFalse(static.called)
+        self.assertIn('css/site.css', content)
+
+    def test_keys_carry_the_template_digest(self):
+        ''' Test a deploy changing a template changes every key '''
+        key = templatecache.make_key('template.cache.navbar', '', 1)
+        self.assertIn(templatecache.release(), key)
+        with mock.patch.object(templatecache, '_digest',
+                               return_value='next-release'):
+            templatecache.reset()
+            self.addCleanup(templatecache.reset)
+            self.assertNotEqual(
+                templatecache.make_key('template.cache.navbar', '', 1), key)
+
+    def test_digest_covers_the_static_manifest(self):
+        ''' Test a deploy changing only a static file changes the keys '''
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        manifest = os.path.join(root, 'staticfiles.json')
+        with override_settings(STATIC_ROOT=root, STATICFILES_STORAGE=(
+                'user_account.assets.CompressedManifestStorage')):
+            digest = templatecache._digest()
+            with open(manifest, 'w') as manifest_file:
+                json.dump({'paths': {'css/site.css': 'css/site.1.css'}},
+                          manifest_file)
+            self.assertNotEqual(templatecache._digest(), digest)
+
+    def test_template_files(self):
+        ''' Test the digest covers the app's templates '''
+        names = [name for name, _ in templatecache.template_files()]
+        self.assertIn('user_account/base.html', names)
+
+    def test_production_uses_the_cached_loader(self):
+        ''' Test production parses each template once per worker '''
+        from beyonic_portal.settings import production
+        options = production.TEMPLATES[0]['OPTIONS']
+        self.assertFalse(production.TEMPLATES[0]['APP_DIRS'])
+        self.assertEqual(options['loaders'][0][0],
+                         'django.template.loaders.cached.Loader')
@@ -0,0 +1,55 @@
+import threading
+from unittest import mock
+
+import httplib2
+import twilio
+from django.test import TestCase
+
+from user_account import twilio_client
+
+
+def _response(status, content):
+    return httplib2.Response({'status': status}), content.encode('utf-8')
+
+
+class TwilioClientTests(TestCase):
+
+    ''' Tests for the shared Twilio client '''
+
+    def test_client_is_shared_per_credentials(self):
+        ''' Test the registry hands out one client per credentials '''
+        client = twilio_client.get_client('AC1', 'token')
+        self.assertIs(twilio_client.get_client('AC1', 'token'), client)
+        self.assertIsNot(twilio_client.get_client('AC2', 'token'), client)
+
+    @mock.patch('httplib2.Http.request')
+    def test_send_message_reuses_connection(self, request):
+        ''' Test messages sent from one thread share an Http object '''
+        request.return_value = _response(201, '{"sid": "SM1"}')
+        client = twilio_client.TwilioClient('AC1', 'token')
+        client.send_message(to='+2541234567', from_='+1', body='hi')
+        http = client._http()
+        client.send_message(to='+2541234567', from_='+1', body='hi')
+        self.assertIs(client._http(), http)
+        self.assertEqual(client.calls, 2)
+        headers = request.call_args[1]['headers']
+        self.assertTrue(headers['Authorization'].startswith('Basic '))
+
+    def test_threads_get_their_own_connection(self):
+        ''' Test Http objects are not shared between threads '''
+        client = twilio_client.TwilioClient('AC1', 'token')
+        https = []
+        thread = threading.Thread(target=lambda: https.append(client._http()))
+        thread.start()
+        thread.join()
+        self.assertIsNot(https[0], client._http())
+
+    @mock.patch('httplib2.Http.request')
+    def test_error_response_raises(self, request):
+        ''' Test an error response raises TwilioRestException '''
+        request.return_value = _response(
+            400, '{"code": 21211, "message": "Invalid To number"}')
+        client = twilio_client.TwilioClient('AC1', 'token')
+        with self.assertRaises(twilio.TwilioRestException) as error:
+            client.send_message(to='+0', from_='+1', body='hi')
+        self.assertEqual(error.exception.code, 21211)
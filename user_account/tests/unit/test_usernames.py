@@ -0,0 +1,154 @@
+import json
+
+from django.test import TestCase, Client, override_settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.urlresolvers import reverse
+
+from user_account import accounts, usernames
+from user_account.forms import RegistrationForm
+from ..testing_utilities import set_up_form_values
+
+
+class BloomFilterTests(TestCase):
+
+    ''' Tests for usernames.BloomFilter '''
+
+    def test_added_values_are_always_found(self):
+        ''' Test the filter has no false negatives '''
+        names = usernames.BloomFilter(1000)
+        for index in range(1000):
+            names.add('user{0}'.format(index))
+        for index in range(1000):
+            self.assertIn('user{0}'.format(index), names)
+
+    def test_false_positive_rate(self):
+        ''' Test few unknown values are reported as probably present '''
+        names = usernames.BloomFilter(1000, error_rate=0.01)
+        for index in range(1000):
+            names.add('user{0}'.format(index))
+        false_positives = sum(1 for index in range(10000)
+                              if 'other{0}'.format(index) in names)
+        self.assertLess(false_positives, 300)
+
+
+class UsernameUniquenessTests(TestCase):
+
+    ''' Tests for relying on the unique constraint for usernames '''
+
+    def setUp(self):
+        self.entries = set_up_form_values()
+        self.entries['password1'] = self.entries['password2'] = 'secret123'
+        User.objects.create_user(username='taken', password='secret123')
+
+    def test_form_does_not_query_by_default(self):
+        ''' Test the form validates the username without a query '''
+        self.entries['username'] = 'taken'
+        form = RegistrationForm(data=self.entries)
+        with self.assertNumQueries(0):
+            self.assertTrue(form.is_valid())
+
+    def test_save_registration_raises_username_taken(self):
+        ''' Test a duplicate insert is reported as UsernameTaken '''
+        user = accounts.build_user('taken', 'new@gmail.com', 'secret123',
+                                   'first', 'last')
+        with self.assertRaises(accounts.UsernameTaken):
+            accounts.save_registration(user, '+254720230439')
+        self.assertEqual(User.objects.filter(username='taken').count(), 1)
+
+    def test_view_maps_username_taken_to_form_error(self):
+        ''' Test a taken username is a form error, not a server error '''
+        self.entries['username'] = 'taken'
+        response = Client().post(reverse('registration'), self.entries)
+        self.assertEqual(response.status_code, 200)
+        self.assertFormError(response, 'form', 'username',
+                             'username taken is already taken ')
+
+    @override_settings(USERNAME_FILTER=True)
+    def test_filter_rejects_taken_username(self):
+        ''' Test the filter turns a taken username away in the form '''
+        self.entries['username'] = 'taken'
+        form = RegistrationForm(data=self.entries)
+        self.assertFalse(form.is_valid())
+        self.assertIn('username', form.errors)
+
+    @override_settings(USERNAME_FILTER=True)
+    def test_filter_answers_free_username_without_query(self):
+        ''' Test a name the filter has not seen costs no query '''
+        usernames.get_filter()
+        with self.assertNumQueries(0):
+            self.assertFalse(usernames.is_taken('free_name'))
+
+    @override_settings(USERNAME_FILTER=True)
+    def test_registered_username_is_added_to_the_filter(self):
+        ''' Test a new registration is seen by this process' filter '''
+        usernames.get_filter()
+        accounts.register('newuser', 'new@gmail.com', 'secret123',
+                          'first', 'last', '+254720230439')
+        self.assertIn('newuser', usernames.get_filter())
+
+
+class UsernameAvailableViewTests(TestCase):
+
+    ''' Tests for the username_available view '''
+
+    def setUp(self):
+        caches['default'].clear()
+        User.objects.create_user(username='taken', password='secret123')
+        usernames.reset_filter('USERNAME_FILTER')
+        self.client = Client()
+        self.url = reverse('username-available')
+
+    def check(self, username):
+        response = self.client.get(self.url, {'username': username})
+        self.assertEqual(response.status_code, 200)
+        return json.loads(response.content.decode('utf-8'))
+
+    def test_free_username(self):
+        ''' Test a free username is reported available without a query '''
+        self.check('warm_up')
+        with self.assertNumQueries(0):
+            data = self.check('free_name')
+        self.assertEqual(data, {'username': 'free_name', 'available': True,
+                                'message': ''})
+
+    def test_taken_username(self):
+        ''' Test a taken username is reported with the form's message '''
+        data = self.check('taken')
+        self.assertFalse(data['available'])
+        self.assertEqual(data['message'], 'username taken is already taken ')
+
+    def test_invalid_username(self):
+        ''' Test the form's regex rule applies '''
+        data = self.check('#$%^&*')
+        self.assertFalse(data['available'])
+        self.assertEqual(data['message'], 'Only alphanumeric characters '
+                                          'and underscores allowed')
+
+    @override_settings(USERNAME_CHECK_RATE=(2, 60))
+    def test_clients_are_throttled(self):
+        ''' Test a client going over the rate gets a 429 '''
+        self.check('one')
+        self.check('two')
+        response = self.client.get(self.url, {'username': 'three'})
+        self.assertEqual(response.status_code, 429)
+        other = self.client.get(self.url, {'username': 'three'},
+                                REMOTE_ADDR='10.0.0.2')
+        self.assertEqual(other.status_code, 200)
+
+    @override_settings(USERNAME_CHECK_RATE=(1, 60), THROTTLE_TRUSTED_PROXIES=1)
+    def test_clients_behind_a_proxy(self):
+        ''' Test clients behind the proxy get a count each '''
+        self.check('one')
+        forwarded = {'REMOTE_ADDR': '10.0.0.1',
+                     'HTTP_X_FORWARDED_FOR': '203.0.113.7'}
+        response = self.client.get(self.url, {'username': 'two'}, **forwarded)
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(self.url, {'username': 'three'},
+                                   **forwarded)
+        self.assertEqual(response.status_code, 429)
+        # a made up first entry doesn't give a fresh count
+        forwarded['HTTP_X_FORWARDED_FOR'] = '198.51.100.1, 203.0.113.7'
+        response = self.client.get(self.url, {'username': 'four'},
+                                   **forwarded)
+        self.assertEqual(response.status_code, 429)
@@ -0,0 +1,122 @@
+import datetime
+
+from django.test import TestCase
+from django.core.cache import caches
+from django.utils import timezone
+
+from user_account import verification
+from user_account.models import UserProfile, VerificationCode
+from ..testing_utilities import populate_test_db, delete_test_data
+
+
+class DatabaseCodeStoreTests(TestCase):
+
+    ''' Tests for the database backed verification code store '''
+
+    def setUp(self):
+        self.store = verification.DatabaseCodeStore()
+
+    def test_set_and_get(self):
+        ''' Test a stored code can be read back and replaced '''
+        self.store.set('+2541234567', 12345)
+        self.assertEqual(self.store.get('+2541234567'), '12345')
+        self.store.set('+2541234567', 54321)
+        self.assertEqual(self.store.get('+2541234567'), '54321')
+        self.assertEqual(VerificationCode.objects.count(), 1)
+
+    def test_keys_are_namespaced(self):
+        ''' Test codes are stored under the configured prefix '''
+        self.store.set('+2541234567', 12345)
+        self.assertTrue(VerificationCode.objects.filter(
+            key='verification:+2541234567').exists())
+
+    def test_expired_code_is_ignored_and_swept(self):
+        ''' Test an expired code is not returned and gets swept '''
+        self.store.set('+2541234567', 12345)
+        VerificationCode.objects.update(
+            expires=timezone.now() - datetime.timedelta(seconds=1))
+        self.assertIsNone(self.store.get('+2541234567'))
+        self.assertEqual(self.store.sweep(), 1)
+        self.assertEqual(VerificationCode.objects.count(), 0)
+
+    def test_delete(self):
+        ''' Test a deleted code is gone '''
+        self.store.set('+2541234567', 12345)
+        self.store.delete('+2541234567')
+        self.assertIsNone(self.store.get('+2541234567'))
+
+
+class CacheCodeStoreTests(TestCase):
+
+    ''' Tests for the cache backed verification code store '''
+
+    def test_set_and_get(self):
+        ''' Test codes are kept in the cache under a namespaced key '''
+        store = verification.CacheCodeStore()
+        store.set('+2541234567', 12345)
+        self.assertEqual(store.get('+2541234567'), '12345')
+        self.assertEqual(
+            caches['default'].get('verification:+2541234567'), '12345')
+        store.delete('+2541234567')
+        self.assertIsNone(store.get('+2541234567'))
+
+
+class TotpCodeStoreTests(TestCase):
+
+    ''' Tests for the stateless, time derived verification codes '''
+
+    def setUp(self):
+        self.store = verification.TotpCodeStore(secret='secret', step=60,
+                                                skew=1)
+
+    def test_issued_code_verifies_without_storage(self):
+        ''' Test an issued code verifies and nothing is stored '''
+        code = self.store.issue('+2541234567')
+        self.assertEqual(len(code), 5)
+        self.assertTrue(self.store.verify('+2541234567', code))
+        self.assertFalse(self.store.verify('+2547654321', code))
+        self.assertEqual(VerificationCode.objects.count(), 0)
+
+    def test_code_is_accepted_within_skew_only(self):
+        ''' Test codes from adjacent windows verify, older ones do not '''
+        window = self.store.window()
+        previous = self.store.code_for('+2541234567', window - 1)
+        stale = self.store.code_for('+2541234567', window - 2)
+        self.assertTrue(self.store.verify('+2541234567', previous))
+        self.assertFalse(self.store.verify('+2541234567', stale))
+
+    def test_codes_depend_on_secret(self):
+        ''' Test another secret derives other codes '''
+        other = verification.TotpCodeStore(secret='other', step=60)
+        window = self.store.window()
+        self.assertNotEqual(self.store.code_for('+2541234567', window),
+                            other.code_for('+2541234567', window))
+
+
+class VerifyCodeTests(TestCase):
+
+    ''' Tests for UserProfile.verify_code against the configured store '''
+
+    def setUp(self):
+        populate_test_db()
+        self.user_profile = UserProfile.objects.get(
+            activation_key='f6115c62e890btest2')
+
+    def test_verify_code(self):
+        ''' Test only the stored code verifies '''
+        self.assertFalse(self.user_profile.verify_code(None))
+        code = verification.get_store().issue('+2541234567')
+        self.assertTrue(self.user_profile.verify_code(str(code)))
+        self.assertFalse(self.user_profile.verify_code('1111'))
+
+    def test_store_follows_settings(self):
+        ''' Test the store is rebuilt when the setting changes '''
+        store = 'user_account.verification.CacheCodeStore'
+        with self.settings(VERIFICATION_CODE_STORE=store):
+            self.assertIsInstance(verification.get_store(),
+                                  verification.CacheCodeStore)
+        self.assertIsInstance(verification.get_store(),
+                              verification.DatabaseCodeStore)
+
+    def tearDown(self):
+        delete_test_data()
@@ -5,7 +5,7 @@ from django.core.urlresolvers import resolve
 from django.test import TestCase, Client
 from django.utils import timezone
 
-from user_account.models import UserProfile
+from user_account.models import OutboundNotification, UserProfile
 from user_account.views import success, home
 
 from ..testing_utilities import (populate_test_db,
@@ -205,6 +205,22 @@ class ConfirmViewTests(TestCase):
                              host=None, msg_prefix='',
                              fetch_redirect_response=True)
 
+    def test_confirm_sends_a_fresh_code(self):
+        ''' Test confirming an inactive account queues a new sms code '''
+        user = self.user_profile.user
+        user.is_active = False
+        user.save()
+        self.client.get(self.confirm_url)
+        sms = OutboundNotification.objects.get(
+            profile=self.user_profile, channel=OutboundNotification.SMS)
+        self.assertTrue(self.user_profile.verify_code(sms.payload))
+        # not again once the phone number is verified
+        user.is_active = True
+        user.save()
+        self.client.get(self.confirm_url)
+        self.assertEqual(OutboundNotification.objects.filter(
+            channel=OutboundNotification.SMS).count(), 1)
+
     def test_confirm_displays_error__message_when_key_expires(self):
         '''Test confirm view displays error message when key expires'''
         self.user_profile.key_expires = timezone.now() - datetime.timedelta(2)
@@ -214,6 +230,31 @@ class ConfirmViewTests(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, error)
 
+    def test_confirm_accepts_signed_token(self):
+        ''' Test a signed activation token redirects to verification '''
+        token_url = reverse(
+            'confirm', args=[self.user_profile.activation_token()])
+        response = self.client.get(token_url)
+        self.assertRedirects(response, self.phone_verification_url,
+                             status_code=302, target_status_code=200)
+
+    def test_confirm_rejects_expired_token(self):
+        ''' Test an expired token shows the expiry message '''
+        self.user_profile.key_expires = timezone.now() - datetime.timedelta(2)
+        token_url = reverse(
+            'confirm', args=[self.user_profile.activation_token()])
+        response = self.client.get(token_url)
+        error = 'Sorry, but the activation key has expired!'
+        self.assertContains(response, error)
+
+    def test_confirm_rejects_tampered_token(self):
+        ''' Test a token with a forged user id is not found '''
+        token = self.user_profile.activation_token()
+        user_pk, rest = token.split(':', 1)
+        forged = '{0}:{1}'.format(int(user_pk) + 1, rest)
+        response = self.client.get(reverse('confirm', args=[forged]))
+        self.assertTemplateUsed(response, 'user_account/error404.html')
+
     def tearDown(self):
         delete_test_data()
 
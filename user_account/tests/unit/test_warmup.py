@@ -0,0 +1,47 @@
+import importlib
+from unittest import mock
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.urlresolvers import get_resolver
+from django.test import TestCase, override_settings
+
+from user_account import phones, warmup
+
+
+class WarmUpTests(TestCase):
+
+    ''' Tests for user_account.warmup '''
+
+    def test_template_names(self):
+        ''' Test every template of the app is found '''
+        names = warmup.template_names()
+        self.assertIn('user_account/base.html', names)
+        self.assertIn('user_account/register.html', names)
+        self.assertEqual(len(names), 9)
+
+    @override_settings(WARMUP_PHONE_REGIONS=('KE', 'UG'))
+    def test_warm_up(self):
+        ''' Test the application is ready for its first request '''
+        application = WSGIHandler()
+        warmup.warm_up(application)
+        self.assertIsNotNone(application._request_middleware)
+        self.assertTrue(get_resolver(None)._populated)
+        self.assertGreater(phones.cache_info()['parse'].currsize, 0)
+        response = self.client.get('/user/login/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_first_request(self):
+        ''' Test a request is timed through the WSGI application '''
+        self.assertGreater(warmup.request(WSGIHandler(), '/user/login/'), 0)
+
+    def test_wsgi_warms_up_when_asked(self):
+        ''' Test beyonic_portal.wsgi only warms up with WSGI_WARMUP '''
+        from beyonic_portal import wsgi
+        self.addCleanup(importlib.reload, wsgi)
+        with mock.patch.object(warmup, 'warm_up') as warm_up:
+            with self.settings(WSGI_WARMUP=False):
+                importlib.reload(wsgi)
+            self.assertFalse(warm_up.called)
+            with self.settings(WSGI_WARMUP=True):
+                importlib.reload(wsgi)
+            warm_up.assert_called_once_with(wsgi.application)
@@ -0,0 +1,48 @@
+"""
+Fixed window rate limits per client, counted in a cache shared by the
+workers.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+CACHE_PREFIX = 'user_account.throttle:'
+
+
+def client_ip(request):
+    """
+    The address the request came from. Behind THROTTLE_TRUSTED_PROXIES
+    reverse proxies, each appending the address it was called from to
+    X-Forwarded-For, that is the entry the outermost one added: the ones
+    before it can be made up by the client.
+    """
+    proxies = settings.THROTTLE_TRUSTED_PROXIES
+    if proxies:
+        forwarded = [address.strip() for address in request.META.get(
+            'HTTP_X_FORWARDED_FOR', '').split(',') if address.strip()]
+        if len(forwarded) >= proxies:
+            return forwarded[-proxies]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def is_throttled(request, scope, limit, period):
+    """
+    Count a request from this client against scope and tell whether
+    it went over limit requests in the current period (seconds)
+    """
+    cache = caches[settings.THROTTLE_CACHE]
+    window = int(time.time() // period)
+    key = '{0}{1}:{2}:{3}'.format(CACHE_PREFIX, scope, client_ip(request),
+                                  window)
+    # add() is a no-op when the key exists, incr() is atomic in shared
+    # caches like memcached and redis
+    if cache.add(key, 1, period):
+        return limit < 1
+    try:
+        return cache.incr(key) > limit
+    except ValueError:
+        # the window expired between add() and incr()
+        cache.add(key, 1, period)
+        return limit < 1
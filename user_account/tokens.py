@@ -0,0 +1,39 @@
+import time
+import calendar
+
+from django.core import signing
+from django.utils import baseconv
+
+
+SALT = 'user_account.activation'
+
+
+def make_activation_token(user_pk, expires):
+    """
+    Return a signed, url safe token carrying the user's primary key
+    and the moment the activation link expires.
+    """
+    timestamp = calendar.timegm(expires.utctimetuple())
+    value = '{0}:{1}'.format(user_pk, baseconv.base62.encode(timestamp))
+    return signing.Signer(salt=SALT).sign(value)
+
+
+def read_activation_token(token):
+    """
+    Return (user_pk, expired) for a token made by make_activation_token,
+    without touching the database.
+    Raises signing.BadSignature for a forged or malformed token.
+    """
+    value = signing.Signer(salt=SALT).unsign(token)
+    try:
+        user_pk, expires = value.split(':')
+        user_pk = int(user_pk)
+        expires = baseconv.base62.decode(expires)
+    except ValueError:
+        raise signing.BadSignature('Malformed activation token')
+    return user_pk, expires < time.time()
+
+
+def is_activation_token(value):
+    """ Tokens carry ':' separators, the legacy 40 char keys never do """
+    return ':' in value
@@ -0,0 +1,110 @@
+import json
+import time
+import base64
+import logging
+import threading
+from urllib.parse import urlencode
+
+from django.conf import settings
+
+from . import metrics
+
+
+logger = logging.getLogger(__name__)
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+class TwilioClient(object):
+
+    '''
+    Sends sms through the Twilio REST API over one persistent https
+    connection per thread.
+
+    twilio's own TwilioRestClient opens a new httplib2.Http, and so a
+    new TLS connection, for every request. This client keeps the
+    httplib2.Http around and sends the credentials up front instead
+    of waiting for the 401 challenge.
+    '''
+
+    def __init__(self, account_sid, auth_token, timeout=None, base=None):
+        self.messages_uri = '/'.join((
+            base or settings.TWILIO_API_BASE, '2010-04-01', 'Accounts',
+            account_sid, 'Messages.json'))
+        credentials = '{0}:{1}'.format(account_sid, auth_token)
+        self.authorization = 'Basic ' + base64.b64encode(
+            credentials.encode('utf-8')).decode('ascii')
+        self.timeout = timeout
+        self.calls = 0
+        self.total_time = 0.0
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+
+    def _http(self):
+        http = getattr(self._local, 'http', None)
+        if http is None:
+            # twilio, httplib2 and the rest of the provider stack are
+            # only imported by a process that sends an sms
+            import httplib2
+            from twilio.rest.resources.base import get_cert_file
+            from twilio.rest.resources.connection import Connection
+            http = httplib2.Http(timeout=self.timeout,
+                                 ca_certs=get_cert_file(),
+                                 proxy_info=Connection.proxy_info())
+            self._local.http = http
+        return http
+
+    def _record(self, elapsed):
+        with self._stats_lock:
+            self.calls += 1
+            self.total_time += elapsed
+        logger.debug('twilio request took {0:.1f} ms'.format(elapsed * 1000))
+
+    def send_message(self, to, from_, body):
+        """ Send an sms, raises TwilioRestException when Twilio refuses it """
+        import twilio
+        headers = {
+            'Authorization': self.authorization,
+            'Accept': 'application/json',
+            'Accept-Charset': 'utf-8',
+            'Content-Type': 'application/x-www-form-urlencoded',
+            'User-Agent': 'twilio-python/{0}'.format(twilio.__version__),
+        }
+        data = urlencode({'To': to, 'From': from_, 'Body': body})
+        start = time.time()
+        try:
+            with metrics.outbound('twilio'):
+                response, content = self._http().request(
+                    self.messages_uri, 'POST', headers=headers, body=data)
+        finally:
+            self._record(time.time() - start)
+
+        content = content.decode('utf-8')
+        if response.status >= 400:
+            try:
+                error = json.loads(content)
+                code, message = error['code'], error['message']
+            except (ValueError, KeyError):
+                code, message = None, content
+            raise twilio.TwilioRestException(
+                status=response.status, uri=self.messages_uri, msg=message,
+                code=code, method='POST')
+        return json.loads(content)
+
+
+def get_client(account_sid=None, auth_token=None):
+    """
+    Return the process wide client for the given credentials,
+    defaulting to TWILIO_ACCOUNT_SID and TWILIO_AUTH_TOKEN.
+    """
+    key = (account_sid or settings.TWILIO_ACCOUNT_SID,
+           auth_token or settings.TWILIO_AUTH_TOKEN)
+    client = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                client = _clients[key] = TwilioClient(
+                    key[0], key[1], timeout=settings.TWILIO_TIMEOUT)
+    return client
@@ -5,11 +5,13 @@ urlpatterns = patterns(
     'user_account.views',
 
     url(r'^sign-up/$', 'registration', name='registration'),
+    url(r'^username-available/$', 'username_available',
+        name='username-available'),
     url(r'^success/(?P<pk>[-\w]+)/$', 'success', name='success'),
     url(r'^phone-verification/(?P<pk>[-\w]+)/$',
         'phone_verification',
         name='phone-verification'),
-    url(r'^accounts/confirm/(?P<activation_key>[-\w]+)/$',
+    url(r'^accounts/confirm/(?P<activation_key>[-\w:]+)/$',
         'confirm',
         name='confirm'),
     url(r'^login/$', 'LoginRequest', name='user_login'),
@@ -0,0 +1,104 @@
+"""
+Which usernames are taken. The unique constraint on auth_user is what
+actually keeps them unique, see accounts.save_registration; this is
+only a cheap early answer for the forms.
+"""
+import math
+import time
+import struct
+import hashlib
+import threading
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+
+_filter = None
+_filter_lock = threading.Lock()
+
+
+class BloomFilter(object):
+
+    '''
+    A fixed size set of strings answering "certainly not in it" or
+    "probably in it", wrong about the latter error_rate of the time
+    once capacity strings were added.
+    '''
+
+    def __init__(self, capacity, error_rate=0.01):
+        self.size = max(8, int(math.ceil(
+            -capacity * math.log(error_rate) / math.log(2) ** 2)))
+        self.hashes = max(1, int(round(self.size / capacity * math.log(2))))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.built = time.time()
+
+    def _positions(self, value):
+        digest = hashlib.sha256(value.encode('utf-8')).digest()
+        first, second = struct.unpack('>QQ', digest[:16])
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value):
+        return all(self.bits[position >> 3] & (1 << (position & 7))
+                   for position in self._positions(value))
+
+
+def build_filter():
+    """ A filter of every username in the database """
+    capacity = max(settings.USERNAME_FILTER_CAPACITY,
+                   2 * User.objects.count())
+    usernames = BloomFilter(capacity, settings.USERNAME_FILTER_ERROR_RATE)
+    for username in User.objects.values_list(
+            'username', flat=True).iterator():
+        usernames.add(username)
+    return usernames
+
+
+def get_filter():
+    """
+    This process' filter, rebuilt every USERNAME_FILTER_REFRESH seconds
+    to pick up the names registered by the other processes
+    """
+    global _filter
+    usernames = _filter
+    if usernames is None or \
+            time.time() - usernames.built > settings.USERNAME_FILTER_REFRESH:
+        with _filter_lock:
+            if _filter is usernames:
+                _filter = build_filter()
+            usernames = _filter
+    return usernames
+
+
+def add(username):
+    """ Record a username this process just registered """
+    if _filter is not None:
+        _filter.add(username)
+
+
+def is_taken(username, use_filter=None):
+    """
+    Whether username belongs to an account. With the filter, by default
+    only when USERNAME_FILTER is on, a name the filter has never seen
+    costs no query.
+
+    A name registered by another process since the last rebuild may
+    be reported free, the insert then fails on the unique constraint.
+    """
+    if use_filter is None:
+        use_filter = settings.USERNAME_FILTER
+    if use_filter and username not in get_filter():
+        return False
+    return User.objects.filter(username=username).exists()
+
+
+@receiver(setting_changed)
+def reset_filter(setting, **kwargs):
+    global _filter
+    if setting.startswith('USERNAME_FILTER'):
+        _filter = None
@@ -0,0 +1,212 @@
+import hmac
+import time
+import random
+import struct
+import hashlib
+import datetime
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.db import IntegrityError, transaction
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+
+_store = None
+_store_lock = threading.Lock()
+_random = random.SystemRandom()
+
+
+def generate_code(length=None):
+    """ Return a random numeric code with length digits """
+    length = length or settings.VERIFICATION_CODE_LENGTH
+    return _random.randint(10**(length - 1), 10**length - 1)
+
+
+class VerificationCodeStore(object):
+
+    '''
+    Keeps the sms verification codes between the request that sends
+    them and the one that checks them. Subclasses must work across
+    worker processes.
+    '''
+
+    def __init__(self, prefix=None, timeout=None):
+        self.prefix = prefix or settings.VERIFICATION_CODE_PREFIX
+        self.timeout = timeout or settings.VERIFICATION_CODE_TIMEOUT
+
+    def make_key(self, phone_number):
+        return '{0}:{1}'.format(self.prefix, phone_number)
+
+    def issue(self, phone_number):
+        """ Create, remember and return a new code for phone_number """
+        code = generate_code()
+        self.set(phone_number, code)
+        return code
+
+    def verify(self, phone_number, code):
+        """ Whether code is the one issued for phone_number """
+        stored = self.get(phone_number)
+        return stored is not None and str(code) == str(stored)
+
+    def revoke(self, phone_number):
+        """ Forget the code once it has been used """
+        self.delete(phone_number)
+
+    def set(self, phone_number, code, timeout=None):
+        raise NotImplementedError
+
+    def get(self, phone_number):
+        raise NotImplementedError
+
+    def delete(self, phone_number):
+        raise NotImplementedError
+
+
+class CacheCodeStore(VerificationCodeStore):
+
+    '''
+    Stores codes in one of the CACHES, selected by
+    VERIFICATION_CODE_CACHE. Only use it with a cache shared by all
+    workers (memcached, redis, database), never with LocMemCache.
+    '''
+
+    def __init__(self, alias=None, **kwargs):
+        super(CacheCodeStore, self).__init__(**kwargs)
+        self.cache = caches[alias or settings.VERIFICATION_CODE_CACHE]
+
+    def set(self, phone_number, code, timeout=None):
+        self.cache.set(self.make_key(phone_number), str(code),
+                       timeout or self.timeout)
+
+    def get(self, phone_number):
+        return self.cache.get(self.make_key(phone_number))
+
+    def delete(self, phone_number):
+        self.cache.delete(self.make_key(phone_number))
+
+
+class DatabaseCodeStore(VerificationCodeStore):
+
+    '''
+    Stores codes in the verification_code table, which every worker
+    sees without any outside service. Expired rows are swept at most
+    every VERIFICATION_CODE_SWEEP_INTERVAL seconds.
+    '''
+
+    def __init__(self, **kwargs):
+        super(DatabaseCodeStore, self).__init__(**kwargs)
+        self.last_sweep = 0
+
+    @property
+    def model(self):
+        from .models import VerificationCode
+        return VerificationCode
+
+    def set(self, phone_number, code, timeout=None):
+        key = self.make_key(phone_number)
+        expires = timezone.now() + datetime.timedelta(
+            seconds=timeout or self.timeout)
+        values = {'code': str(code), 'expires': expires}
+        if not self.model.objects.filter(key=key).update(**values):
+            try:
+                with transaction.atomic():
+                    self.model.objects.create(key=key, **values)
+            except IntegrityError:
+                # another worker inserted the same key in the meantime
+                self.model.objects.filter(key=key).update(**values)
+        self.maybe_sweep()
+
+    def get(self, phone_number):
+        codes = self.model.objects.filter(
+            key=self.make_key(phone_number),
+            expires__gt=timezone.now()).values_list('code', flat=True)
+        for code in codes:
+            return code
+        return None
+
+    def delete(self, phone_number):
+        self.model.objects.filter(key=self.make_key(phone_number)).delete()
+
+    def sweep(self):
+        """ Delete the expired codes, returns how many were removed """
+        self.last_sweep = time.time()
+        expired = self.model.objects.filter(expires__lte=timezone.now())
+        count = expired.count()
+        if count:
+            expired.delete()
+        return count
+
+    def maybe_sweep(self):
+        interval = settings.VERIFICATION_CODE_SWEEP_INTERVAL
+        if time.time() - self.last_sweep > interval:
+            self.sweep()
+
+
+class TotpCodeStore(VerificationCodeStore):
+
+    '''
+    Derives the codes instead of storing them, the way RFC 6238 TOTP
+    does: an HMAC of the current time window keyed with a per phone
+    number secret derived from VERIFICATION_CODE_SECRET. Any worker on
+    any node can verify a code without a storage round trip.
+
+    A code stays valid for the window it was issued in plus
+    VERIFICATION_CODE_TOTP_SKEW windows either side, and cannot be
+    revoked before that.
+    '''
+
+    def __init__(self, secret=None, step=None, skew=None, **kwargs):
+        super(TotpCodeStore, self).__init__(**kwargs)
+        secret = secret or settings.VERIFICATION_CODE_SECRET
+        self.secret = secret.encode('utf-8')
+        self.step = step or settings.VERIFICATION_CODE_TOTP_STEP
+        self.skew = settings.VERIFICATION_CODE_TOTP_SKEW \
+            if skew is None else skew
+        self.digits = settings.VERIFICATION_CODE_LENGTH
+
+    def window(self, at=None):
+        return int((time.time() if at is None else at) // self.step)
+
+    def code_for(self, phone_number, window):
+        """ HOTP (RFC 4226) of window, keyed for phone_number """
+        key = hmac.new(self.secret, self.make_key(phone_number).encode(
+            'utf-8'), hashlib.sha256).digest()
+        digest = hmac.new(key, struct.pack('>Q', window),
+                          hashlib.sha1).digest()
+        offset = digest[-1] & 0x0f
+        value = struct.unpack('>I', digest[offset:offset + 4])[0] & 0x7fffffff
+        return str(value % 10**self.digits).zfill(self.digits)
+
+    def issue(self, phone_number):
+        return self.code_for(phone_number, self.window())
+
+    def verify(self, phone_number, code):
+        current = self.window()
+        code = str(code)
+        return any(
+            hmac.compare_digest(self.code_for(phone_number, window), code)
+            for window in range(current - self.skew, current + self.skew + 1))
+
+    def revoke(self, phone_number):
+        pass
+
+
+def get_store():
+    """ Return the configured VERIFICATION_CODE_STORE, created once """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = import_string(settings.VERIFICATION_CODE_STORE)()
+    return _store
+
+
+@receiver(setting_changed)
+def reset_store(setting, **kwargs):
+    global _store
+    if setting.startswith('VERIFICATION_CODE'):
+        _store = None
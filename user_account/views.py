@@ -1,6 +1,3 @@
-import datetime
-import random
-import hashlib
 import logging
 
 from django.shortcuts import render, get_object_or_404, redirect
@@ -9,21 +6,21 @@ from django.utils.translation import ugettext_lazy as _
 from django.contrib import messages
 from django.contrib.auth import authenticate, login, logout
 from django.utils import timezone
-from django.core.cache import cache
 from django.conf import settings
+from django.core import signing
+from django.http import Http404, JsonResponse
 
+from . import accounts, pagecache, throttling, tokens, usernames, \
+    verification
 from .models import UserProfile
-from .forms import RegistrationForm, LoginForm, PhoneVerificationForm
+from .forms import RegistrationForm, LoginForm, PhoneVerificationForm, \
+    taken_message
 
 
 logger = logging.getLogger(__name__)
 
 
-def _get_code(length=5):
-    """ Return a numeric code with length digits """
-    return random.sample(range(10**(length - 1), 10**length), 1)[0]
-
-
+@pagecache.cache_anonymous
 def registration(request):
     page_title = 'User Registration'
     template_name = 'user_account/register.html'
@@ -50,48 +47,47 @@ def registration(request):
             email = form.cleaned_data['email']
             password = form.cleaned_data['password1']
 
-            user = User.objects.create_user(username=username,
-                                            email=email,
-                                            password=password)
-
-            user.is_active = False
-            user.first_name = first_name.upper()
-            user.last_name = last_name.upper()
-            user.save()
-
-            # Build the activation key for their account
-            encoded_rand = str(random.random()).encode('utf-8')
-            salt = hashlib.sha224(encoded_rand).hexdigest()[:5]
-            salted_username = (salt + user.username).encode('utf-8')
-            activation_key = hashlib.sha224(
-                salted_username).hexdigest()[:40]
-            key_expires = timezone.now() + datetime.timedelta(2)
-
-            # Create and save their profile
-            profile = UserProfile(user=user,
-                                  activation_key=activation_key,
-                                  key_expires=key_expires,
-                                  phone_number=phone_number)
-            profile.save()
-            msg = _('new user registered successfully. {0}').format(profile)
-            logger.info(msg)
-            # store the code in the cache for later verification.
-            # valid for 24 hrs
-            code = _get_code()
-            cache.set(phone_number, code, 24 * 3600)
-            profile.send_activation_link()
-            profile.send_sms(code)
-            return redirect(success, pk=user.pk)
-        else:
-            msg = ("Ooops! Please correct the highlighted fields,"
-                   " then try again.")
-            messages.warning(request, _(msg))
-            return render(request, template_name, locals())
+            try:
+                profile = accounts.register(username, email, password,
+                                            first_name, last_name,
+                                            phone_number)
+            except accounts.UsernameTaken:
+                form.add_error('username', taken_message(username))
+            except accounts.PhoneNumberTaken:
+                form.add_error('phone_number', _(
+                    'phone number {0} is already registered').format(
+                        phone_number))
+            else:
+                return redirect(success, pk=profile.user_id)
+        msg = ("Ooops! Please correct the highlighted fields,"
+               " then try again.")
+        messages.warning(request, _(msg))
+        return render(request, template_name, locals())
     else:
         form = RegistrationForm()
         return render(request, template_name, locals())
 
 
+def username_available(request):
+    """ JSON for the sign-up page: can ?username= still be registered """
+    limit, period = settings.USERNAME_CHECK_RATE
+    if throttling.is_throttled(request, 'username_available', limit, period):
+        return JsonResponse({'error': str(_('Too many requests, please '
+                                            'try again in a moment'))},
+                            status=429)
+    username = request.GET.get('username', '')
+    # the form's own rules, then the warm filter of taken usernames
+    errors = RegistrationForm(data={'username': username}).errors
+    if 'username' in errors:
+        available, message = False, errors['username'][0]
+    elif usernames.is_taken(username, use_filter=True):
+        available, message = False, taken_message(username)
+    else:
+        available, message = True, ''
+    return JsonResponse({'username': username, 'available': available,
+                         'message': str(message)})
+
+
 def confirm(request, activation_key):
     page_title = 'Account confirmation'
     expired = False
@@ -101,18 +97,35 @@ def confirm(request, activation_key):
                ' new users').format(request.user.username)
         messages.warning(request, _(msg))
         return redirect(home)
-    user_profile = get_object_or_404(UserProfile,
-                                     activation_key=activation_key)
-    if user_profile.key_expires < timezone.now():
-        expired = True
-        return render(request, template_name, locals())
-    user_account = user_profile.user
+    if tokens.is_activation_token(activation_key):
+        # signed token: the signature and expiry are checked without
+        # the database, the profile is then fetched by the user's pk
+        try:
+            user_pk, expired = tokens.read_activation_token(activation_key)
+        except signing.BadSignature:
+            raise Http404
+        if expired:
+            return render(request, template_name, locals())
+        user_profile = get_object_or_404(UserProfile, user_id=user_pk)
+    else:
+        # legacy 40 char key, looked up through its index
+        user_profile = get_object_or_404(UserProfile,
+                                         activation_key=activation_key)
+        if user_profile.key_expires < timezone.now():
+            expired = True
+            return render(request, template_name, locals())
     msg = 'Congratulations! your email has been verified successfully.'
     messages.info(request, _(msg))
+    if not user_profile.user.is_active:
+        # the code sent at registration may have expired by now, see
+        # VERIFICATION_CODE_STORE
+        code = verification.get_store().issue(str(user_profile.phone_number))
+        user_profile.queue_sms(code)
     # redirect to phone verification page
-    return redirect(phone_verification, pk=user_account.pk)
+    return redirect(phone_verification, pk=user_profile.user_id)
 
 
+@pagecache.cache_anonymous
 def home(request):
     template_name = 'user_account/home.html'
     page_title = 'Beyonic Portal'
@@ -144,7 +157,7 @@ def phone_verification(request, pk):
             if form.is_valid():
                 code = form.cleaned_data['code']
                 if user_profile.verify_code(code):
-                    cache.delete(phone_number)
+                    verification.get_store().revoke(phone_number)
                     user.is_active = True
                     user.save()
                     user.is_authenticated = True
@@ -168,6 +181,7 @@ def phone_verification(request, pk):
         return render(request, template_name, locals())
 
 
+@pagecache.cache_anonymous
 def LoginRequest(request):
     template_name = 'user_account/login.html'
 
@@ -187,9 +201,8 @@ def LoginRequest(request):
                 login(request, siteuser)
                 user_profile = siteuser.my_profile
                 phone_number = str(user_profile.phone_number)
-                code = _get_code()
-                cache.set(phone_number, code, 24 * 3600)
-                user_profile.send_sms(code)
+                code = verification.get_store().issue(phone_number)
+                user_profile.queue_sms(code)
                 return redirect(phone_verification, pk=siteuser.pk)
 
             elif siteuser and not siteuser.is_active:
@@ -0,0 +1,136 @@
+"""
+The work a worker would otherwise do on its first requests, done up
+front: beyonic_portal.wsgi runs warm_up when WSGI_WARMUP is set. With a
+server that loads the application before forking its workers
+(gunicorn --preload) every worker then shares the result.
+
+    python -m user_account.warmup [--warm-up] path...
+
+times the first requests of a fresh process, see benchmark_warmup.
+"""
+import io
+import os
+import sys
+import glob
+import json
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.core.urlresolvers import get_resolver
+from django.db import connections
+from django.template import engines
+from django.template.loader import get_template
+from django.utils import formats, translation
+from django.utils.module_loading import import_string
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(__file__), 'templates')
+
+
+def template_names():
+    """ The templates of this app, as get_template names them """
+    return sorted(
+        os.path.relpath(filename, TEMPLATE_DIR).replace(os.sep, '/')
+        for filename in glob.glob(os.path.join(
+            TEMPLATE_DIR, 'user_account', '*.html')))
+
+
+def compile_templates():
+    # kept by the cached loader, otherwise this still loads the loaders
+    # and the tag libraries the templates use
+    for name in template_names():
+        get_template(name)
+
+
+def populate_urls():
+    resolver = get_resolver(None)
+    # compiles every pattern and builds the reverse lookup tables
+    resolver.reverse_dict
+    resolver.resolve('/')
+
+
+def load_phone_metadata():
+    import phonenumbers
+    from . import phones
+    for region in settings.WARMUP_PHONE_REGIONS:
+        example = phonenumbers.example_number(region)
+        if example is not None:
+            phones.normalize(phonenumbers.format_number(
+                example, phonenumbers.PhoneNumberFormat.E164))
+
+
+def prepare_models():
+    for model in apps.get_models():
+        model._meta.get_fields()
+
+
+def load_translations():
+    translation.activate(settings.LANGUAGE_CODE)
+    # the format module of the language
+    formats.get_format('DATE_INPUT_FORMATS')
+    translation.deactivate()
+
+
+def import_request_modules():
+    """ What a request imports on first use """
+    for engine in engines.all():
+        # the context processors of the django backend
+        getattr(engine, 'engine', engine).template_context_processors
+    import_string(settings.MESSAGE_STORAGE)
+    import_string(settings.SESSION_SERIALIZER)
+
+
+def check_databases():
+    """
+    Connect once, so a bad database fails the start and the connection
+    settings (see user_account.sqlite) are applied, then disconnect:
+    forked workers must not share a connection.
+    """
+    for connection in connections.all():
+        connection.ensure_connection()
+    connections.close_all()
+
+
+def warm_up(application):
+    """ Prepare application, a WSGIHandler, for its first request """
+    application.load_middleware()
+    import_request_modules()
+    prepare_models()
+    load_translations()
+    populate_urls()
+    compile_templates()
+    load_phone_metadata()
+    check_databases()
+
+
+def request(application, path):
+    """ Seconds application takes to answer a GET of path """
+    environ = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': '',
+        'SERVER_NAME': '127.0.0.1', 'SERVER_PORT': '8000',
+        'REMOTE_ADDR': '127.0.0.1', 'SERVER_PROTOCOL': 'HTTP/1.1',
+        'wsgi.url_scheme': 'http', 'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr, 'wsgi.multithread': False,
+        'wsgi.multiprocess': True, 'wsgi.run_once': False,
+        'wsgi.version': (1, 0)}
+    start = time.perf_counter()
+    body = application(environ, lambda status, headers: None)
+    for _ in body:
+        pass
+    body.close()
+    return time.perf_counter() - start
+
+
+def main(argv):
+    paths = [arg for arg in argv[1:] if arg != '--warm-up']
+    from beyonic_portal.wsgi import application
+    start = time.perf_counter()
+    if '--warm-up' in argv:
+        warm_up(application)
+    warm_up_time = time.perf_counter() - start
+    times = [request(application, path) for path in paths]
+    json.dump({'warm_up': warm_up_time, 'requests': times}, sys.stdout)
+
+
+if __name__ == '__main__':
+    main(sys.argv)